@@ -0,0 +1,305 @@
+"""
+計算結果的磁碟快取 (content-addressed artifact cache)
+
+莊家機率表、單局結果機率、策略表等都是輸入 (規則、牌的副數、程式版本) 的
+確定性函數,但每次啟動都要重算。本模組以輸入內容的雜湊值當作鍵,把結果存到磁碟:
+
+    - 鍵 = sha256(種類 + 輸入參數的正規化 JSON + 產生該結果的程式碼版本)
+    - 寫入先寫暫存檔再 os.replace,多個行程同時寫入也不會讀到半個檔案
+    - 整個快取有大小上限,超過時依最後使用時間 (LRU) 刪除最舊的項目
+    - array.array / numpy 陣列 / bytes 以原始資料存放,讀取時直接 memory map,
+      不需要反序列化;其他物件以 pickle 存放
+
+用法:
+    cache = default_cache()
+    table = cache.get_or_compute('dealer_dist', {'rules': rules_settings(rules)},
+                                 lambda: compute(rules), code=table_rules)
+
+快取資料夾預設為程式所在資料夾下的 .artifact_cache,可用環境變數
+BLACKJACK_CACHE_DIR 改變;BLACKJACK_CACHE_DIR=off 則停用快取。
+"""
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為選用套件
+    np = None
+
+
+CACHE_ENV = 'BLACKJACK_CACHE_DIR'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 快取格式版本;格式改變時遞增,舊的快取會自動失效
+FORMAT_VERSION = 1
+
+# 檔案格式: magic + 資料種類 + 中繼資料長度 + 中繼資料 (JSON) + 補齊到 ALIGNMENT + 資料
+FILE_MAGIC = b'BJCACHE1'
+HEADER = struct.Struct('<8sBI')
+ALIGNMENT = 64
+
+KIND_PICKLE = 0
+KIND_BYTES = 1
+KIND_ARRAY = 2      # array.array
+KIND_NDARRAY = 3    # numpy.ndarray
+
+# 讀取損毀的快取檔案時可能出現的錯誤 (json / pickle / 陣列形狀不符)
+_CORRUPT_ERRORS = (struct.error, ValueError, TypeError, KeyError, EOFError, AttributeError,
+                   ImportError, pickle.UnpicklingError)
+
+_code_versions = {}
+
+
+def code_version(module):
+    """
+    模組原始碼的雜湊值 (程式碼一改,相關快取就自動失效)
+    """
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return getattr(module, '__name__', str(module))
+    if path not in _code_versions:
+        with open(path, 'rb') as file:
+            _code_versions[path] = hashlib.sha256(file.read()).hexdigest()[:16]
+    return _code_versions[path]
+
+
+def make_key(kind, inputs, code=None):
+    """
+    計算快取鍵
+
+    參數:
+        kind: 結果種類 (例如 'dealer_dist')
+        inputs: 可 JSON 化的輸入參數
+        code: 產生結果的模組 (或模組列表),其原始碼版本會納入鍵
+
+    回傳:
+        64 字元的十六進位字串
+    """
+    modules = code if isinstance(code, (list, tuple)) else ([code] if code else [])
+    material = {
+        'format': FORMAT_VERSION,
+        'kind': kind,
+        'inputs': inputs,
+        'code': [code_version(m) for m in modules],
+    }
+    blob = json.dumps(material, sort_keys=True, separators=(',', ':'), default=repr)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def _payload_offset(meta_len):
+    offset = HEADER.size + meta_len
+    return offset + (-offset % ALIGNMENT)
+
+
+def _encode(value):
+    # 回傳 (資料種類, 中繼資料, 資料 bytes-like)
+    if isinstance(value, (bytes, bytearray)):
+        return KIND_BYTES, {}, value
+    if isinstance(value, array):
+        return KIND_ARRAY, {'typecode': value.typecode}, value
+    if np is not None and isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        return KIND_NDARRAY, {'dtype': value.dtype.str, 'shape': list(value.shape)}, value
+    return KIND_PICKLE, {}, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+class ArtifactCache:
+    """
+    以資料夾存放的快取
+
+    參數:
+        directory: 快取資料夾
+        max_bytes: 快取總大小上限 (超過時刪除最久未使用的項目)
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.bin')
+
+    def get(self, key, default=None):
+        """
+        讀取快取;陣列類資料以 memory map 載入 (唯讀)
+
+        回傳:
+            快取的值,沒有時回傳 default
+
+        功能說明:
+            - 截斷或損毀的項目視為沒有快取,並從磁碟刪除 (下次重新計算後寫入)
+        """
+        path = self._path(key)
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return default
+        with file:
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # 空檔案
+                self._discard(path)
+                return default
+        try:
+            value = self._decode(data)
+        except _CORRUPT_ERRORS:
+            # 檔案被截斷或損毀: 視為沒有快取並刪除
+            data.close()
+            self._discard(path)
+            return default
+        if value is None:  # 這個環境無法載入的種類 (例如沒有 numpy)
+            data.close()
+            return default
+
+        try:
+            os.utime(path)  # 更新最後使用時間 (LRU)
+        except OSError:
+            pass
+        return value
+
+    def _decode(self, data):
+        # 解析一個快取檔案;檔案損毀時丟出 _CORRUPT_ERRORS 之一
+        if len(data) < HEADER.size:
+            raise ValueError("快取檔案不完整")
+        magic, kind, meta_len = HEADER.unpack_from(data, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError("不是快取檔案")
+        meta = json.loads(data[HEADER.size:HEADER.size + meta_len])
+        offset = _payload_offset(meta_len)
+        if offset > len(data):
+            raise ValueError("快取檔案不完整")
+
+        if kind == KIND_PICKLE:
+            value = pickle.loads(data[offset:])
+            data.close()
+            return value
+        if kind == KIND_BYTES:
+            return memoryview(data)[offset:]
+        if kind == KIND_ARRAY:
+            return memoryview(data)[offset:].cast(meta['typecode'])
+        if kind == KIND_NDARRAY and np is not None:
+            return np.frombuffer(data, dtype=np.dtype(meta['dtype']),
+                                 offset=offset).reshape(meta['shape'])
+        return None
+
+    def _discard(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def put(self, key, value):
+        """
+        寫入快取 (原子性寫入),之後依大小上限清理
+        """
+        kind, meta, payload = _encode(value)
+        meta_blob = json.dumps(meta).encode('utf-8')
+        offset = _payload_offset(len(meta_blob))
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(HEADER.pack(FILE_MAGIC, kind, len(meta_blob)))
+                file.write(meta_blob)
+                file.write(b'\0' * (offset - HEADER.size - len(meta_blob)))
+                file.write(memoryview(payload).cast('B'))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def get_or_compute(self, kind, inputs, compute, code=None):
+        """
+        有快取就讀取,沒有就呼叫 compute() 計算並存入
+
+        參數:
+            kind / inputs / code: 見 make_key
+            compute: 不需參數的函數,回傳要快取的值
+        """
+        key = make_key(kind, inputs, code)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            try:
+                self.put(key, value)
+            except OSError:  # 磁碟已滿等: 只是少了快取,計算結果照常回傳
+                pass
+        return value
+
+    def entries(self):
+        """
+        回傳 [(最後使用時間, 大小, 路徑)],依時間由舊到新排序
+        """
+        result = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.bin'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size, entry.path))
+        result.sort()
+        return result
+
+    def evict(self):
+        """
+        總大小超過上限時,刪除最久未使用的項目
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self._discard(path)
+
+
+class NullCache:
+    """
+    停用快取時使用: 每次都直接計算
+    """
+
+    def get(self, key, default=None):
+        return default
+
+    def put(self, key, value):
+        pass
+
+    def get_or_compute(self, kind, inputs, compute, code=None):
+        return compute()
+
+
+_default_cache = None
+
+
+def default_cache():
+    """
+    取得預設快取 (依環境變數 BLACKJACK_CACHE_DIR 決定位置,'off' 表示停用)
+    """
+    global _default_cache
+    if _default_cache is None:
+        directory = os.environ.get(CACHE_ENV)
+        if directory == 'off':
+            _default_cache = NullCache()
+        else:
+            if not directory:
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+                directory = os.path.join(script_dir, '.artifact_cache')
+            try:
+                _default_cache = ArtifactCache(directory)
+            except OSError:
+                _default_cache = NullCache()
+    return _default_cache
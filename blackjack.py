@@ -1,6 +1,11 @@
 
 import random
 import os
+import sys
+
+from profiling import PROFILER
+from table_rules import (CLI_RULES, OUTCOME_BLACKJACK, OUTCOME_LOSE, OUTCOME_PUSH, OUTCOME_WIN,
+                         bankruptcy_subsidy, blackjack_winnings, dealer_should_hit)
 
 
 # ======== 玩家資料管理函數 ========
@@ -43,16 +48,28 @@ def load_player_data(filename="players.txt"):
     return players
 
 
+def format_win_rate(total, wins):
+    """
+    計算勝率字串
+    
+    參數:
+        total: 總場數
+        wins: 勝場數
+    
+    回傳:
+        勝率字串,例如 "50.0%" (沒有比賽紀錄時為 "0.0%")
+    """
+    if total > 0:
+        return f"{(wins / total) * 100:.1f}%"
+    return "0.0%"
+
+
 def save_player_data(players, filename="players.txt"):
     try:
         with open(filename, 'w', encoding='utf-8') as file:
             for name, data in players.items():
                 # 計算勝率
-                if data['total'] > 0:
-                    win_rate = (data['wins'] / data['total']) * 100
-                    win_rate_str = f"{win_rate:.1f}%"
-                else:
-                    win_rate_str = "0.0%"
+                win_rate_str = format_win_rate(data['total'], data['wins'])
                 
                 # 寫入格式: 名字,金額,總場數,勝場數,勝率
                 line = f"{name},{data['money']},{data['total']},{data['wins']},{win_rate_str}\n"
@@ -75,32 +92,43 @@ def get_or_create_player(players):
         # 新玩家
         print(f"\n歡迎新玩家 {name}!")
         print("系統已為您開設帳戶,起始金額: $100")
-        players[name] = {
-            'money': 100,
-            'total': 0,
-            'wins': 0,
-            'win_rate': '0.0%'
-        }
+        create_player(players, name)
     
     return name, players[name]
 
 
-def check_bankruptcy(player_data):
+def create_player(players, name):
+    """
+    開設新帳戶 (起始金額 $100)
+    
+    回傳:
+        新玩家的資料字典
+    """
+    players[name] = {
+        'money': 100,
+        'total': 0,
+        'wins': 0,
+        'win_rate': '0.0%'
+    }
+    return players[name]
+
+
+def check_bankruptcy(player_data, subsidy=10):
     if player_data['money'] <= 0:
         print("\n" + "=" * 50)
-        print("你已賠光所有資產，在此贊助$10")
+        print(f"你已賠光所有資產，在此贊助${subsidy}")
         print("=" * 50)
-        player_data['money'] = 10
+        player_data['money'] = subsidy
 
 
-def get_bet_amount(player_data):
+def get_bet_amount(player_data, min_bet=10):
     while True:
         print(f"\n目前持有金額: ${player_data['money']}")
         try:
-            bet = int(input(f"請輸入下注金額 (最少$10, 最多${player_data['money']}): "))
+            bet = int(input(f"請輸入下注金額 (最少${min_bet}, 最多${player_data['money']}): "))
             
-            if bet < 10:
-                print("下注金額不得低於$10")
+            if bet < min_bet:
+                print(f"下注金額不得低於${min_bet}")
             elif bet > player_data['money']:
                 print(f"下注金額不得超過您的持有金額 ${player_data['money']}")
             else:
@@ -127,9 +155,7 @@ def update_game_result(player_data, bet, is_win):
         print(f"\n[=] 平手! 金額不變, 目前持有: ${player_data['money']}")
     
     # 計算勝率
-    if player_data['total'] > 0:
-        win_rate = (player_data['wins'] / player_data['total']) * 100
-        player_data['win_rate'] = f"{win_rate:.1f}%"
+    player_data['win_rate'] = format_win_rate(player_data['total'], player_data['wins'])
 
 
 # ======== 卡牌相關函數 ========
@@ -426,7 +452,7 @@ def initial_deal(deck, player_hand, dealer_hand):
     add_card_to_hand(dealer_hand, deal_card(deck))
 
 
-def player_turn(deck, player_hand, dealer_hand):
+def player_turn(deck, player_hand, dealer_hand, choose=input):
     """
     玩家的回合
     
@@ -434,6 +460,7 @@ def player_turn(deck, player_hand, dealer_hand):
         deck: 牌組
         player_hand: 玩家手牌
         dealer_hand: 莊家手牌
+        choose: 取得玩家選擇的函數 (預設為 input;批次模式傳入腳本的動作)
     
     回傳:
         True (玩家停牌), False (玩家爆牌)
@@ -446,7 +473,7 @@ def player_turn(deck, player_hand, dealer_hand):
         - 停牌: 結束玩家回合
     """
     while True:
-        choice = input("\n你要 [H]要牌(Hit) 還是 [S]停牌(Stand)? ").upper()
+        choice = choose("\n你要 [H]要牌(Hit) 還是 [S]停牌(Stand)? ").upper()
         
         if choice == 'H':
             # 要牌
@@ -469,28 +496,29 @@ def player_turn(deck, player_hand, dealer_hand):
             print("無效的輸入,請輸入 H 或 S")
 
 
-def dealer_turn(deck, dealer_hand):
+def dealer_turn(deck, dealer_hand, rules=CLI_RULES):
     """
     莊家的回合
     
     參數:
         deck: 牌組
         dealer_hand: 莊家手牌
+        rules: 牌桌規則 (table_rules.create_rules)
     
     回傳:
         True (莊家停牌), False (莊家爆牌)
     
     功能說明:
-        - 莊家按照固定規則行動
+        - 莊家按照固定規則行動 (查 rules 的莊家要牌表)
         - 點數 < 17: 必須要牌
-        - 點數 >= 17: 必須停牌
+        - 點數 >= 17: 必須停牌 (H17 規則下軟 17 仍要牌)
         - 如果莊家爆牌,玩家獲勝
     """
     print("\n莊家的回合...")
     
-    # 莊家必須在點數小於17時要牌
-    while get_hand_value(dealer_hand) < 17:
-        print("\n莊家點數小於17,必須要牌...")
+    # 莊家依規則要牌 (adjust_for_ace 之後仍有 A 算 11 點即為軟牌)
+    while dealer_should_hit(rules, get_hand_value(dealer_hand), dealer_hand['aces'] > 0):
+        print(f"\n莊家點數 {get_hand_value(dealer_hand)},必須要牌...")
         new_card = deal_card(deck)
         print(f"莊家抽到: {card_to_string(new_card)}")
         add_card_to_hand(dealer_hand, new_card)
@@ -504,82 +532,438 @@ def dealer_turn(deck, dealer_hand):
     return True
 
 
-def play_game(player_name, player_data):
-    # 檢查是否破產
-    check_bankruptcy(player_data)
-    
-    # 顯示歡迎訊息
-    show_welcome()
-    
-    # 下注
-    bet = get_bet_amount(player_data)
-    print(f"\n本局下注: ${bet}")
+def record_hand(history, player_name, bet, net, outcome, player_hand, dealer_hand):
+    """
+    把一局寫入牌局紀錄
     
-    # 建立並洗牌
-    deck = create_deck()
-    shuffle_deck(deck)
+    參數:
+        history: hand_history.HistoryWriter (None 表示不記錄)
+        net: 本局輸贏金額
+        outcome: 結果代碼 (table_rules.OUTCOME_*)
+    """
+    if history is not None:
+        with PROFILER.phase('record_hand'):
+            history.record(player_name, bet, net, outcome, player_hand['cards'], dealer_hand['cards'])
+
+
+def round_snapshot(player_name, player_data, bet, deck, player_hand, dealer_hand, state='PLAYING'):
+    """
+    一局的狀態 (格式見 game_snapshot.encode_snapshot,文字版只有一個座位)
     
-    # 建立玩家和莊家的手牌
-    player_hand = create_hand()
-    dealer_hand = create_hand()
+    參數:
+        state: 'PLAYING' (發牌後、結算前) 或 'RESULT' (已結算、尚未存檔)
+    """
+    return {
+        'state': state, 'player': player_name,
+        'money': player_data['money'], 'total': player_data['total'], 'wins': player_data['wins'],
+        'bet': bet, 'deck': deck, 'dealer': dealer_hand['cards'],
+        'hands': [player_hand['cards']], 'results': [None],
+        'active_seat': 0, 'message': '',
+    }
+
+
+def play_game(player_name, player_data, rules=CLI_RULES, bet=None, choose=input, history=None,
+              checkpoint=None, resume=None):
+    """
+    進行一局
     
-    # 發初始牌
-    initial_deal(deck, player_hand, dealer_hand)
+    參數:
+        bet: 下注金額 (None 表示詢問玩家)
+        choose: 取得玩家選擇的函數 (見 player_turn)
+        history: hand_history.HistoryWriter,提供時記錄這一局
+        checkpoint: game_snapshot.Checkpoint,提供時發牌後與每次詢問前寫入檢查點,
+                    結算後寫入 RESULT 狀態 (由呼叫端存檔後清除)
+        resume: 檢查點讀出的快照,提供時略過下注與發牌,從同一副牌繼續
+    """
+    if resume is None:
+        # 檢查是否破產
+        check_bankruptcy(player_data, bankruptcy_subsidy(rules))
+        
+        # 顯示歡迎訊息
+        show_welcome()
+        
+        # 下注 (批次模式由腳本指定下注金額)
+        if bet is None:
+            with PROFILER.phase('bet'):
+                bet = get_bet_amount(player_data, rules['min_bet'])
+        print(f"\n本局下注: ${bet}")
+        PROFILER.count('rounds')
+        
+        # 建立並洗牌
+        with PROFILER.phase('shuffle'):
+            deck = create_deck()
+            shuffle_deck(deck)
+        
+        # 建立玩家和莊家的手牌
+        player_hand = create_hand()
+        dealer_hand = create_hand()
+        
+        # 發初始牌
+        with PROFILER.phase('initial_deal'):
+            initial_deal(deck, player_hand, dealer_hand)
+    else:
+        bet = resume['bet']
+        deck = resume['deck']
+        player_hand = create_hand()
+        dealer_hand = create_hand()
+        for card in resume['hands'][0]:
+            add_card_to_hand(player_hand, card)
+        for card in resume['dealer']:
+            add_card_to_hand(dealer_hand, card)
+        print(f"\n繼續上次未完成的牌局, 本局下注: ${bet}")
+    money_before = player_data['money']
+    
+    # 發牌後到結算前,每次等待玩家輸入之前都寫入檢查點
+    if checkpoint is not None:
+        def save_checkpoint():
+            with PROFILER.phase('checkpoint'):
+                checkpoint.save(round_snapshot(player_name, player_data, bet, deck,
+                                               player_hand, dealer_hand))
+        
+        def choose_with_checkpoint(prompt="", choose=choose):
+            save_checkpoint()
+            return choose(prompt)
+        
+        save_checkpoint()
+        choose = choose_with_checkpoint
     
+    finish_game(player_name, player_data, rules, bet, choose, history, money_before,
+                deck, player_hand, dealer_hand)
+    if checkpoint is not None:
+        with PROFILER.phase('checkpoint'):
+            checkpoint.save(round_snapshot(player_name, player_data, bet, deck,
+                                           player_hand, dealer_hand, state='RESULT'))
+
+
+def finish_game(player_name, player_data, rules, bet, choose, history, money_before,
+                deck, player_hand, dealer_hand):
+    """
+    發牌之後的流程: 檢查 Blackjack -> 玩家回合 -> 莊家回合 -> 結算並記錄
+    """
     # 顯示初始牌面
     show_hands(player_hand, dealer_hand, hide_dealer=True)
     
-    # 檢查是否有人直接拿到 Blackjack (21點)
-    if get_hand_value(player_hand) == 21:
+    # 檢查是否有人直接拿到 Blackjack (前兩張 21 點;從檢查點繼續的多張 21 點不算)
+    if len(player_hand['cards']) == 2 and get_hand_value(player_hand) == 21:
         print("\n恭喜!你拿到 Blackjack!")
         show_hands(player_hand, dealer_hand, hide_dealer=False)
-        update_game_result(player_data, bet, True)
+        PROFILER.count('blackjacks')
+        with PROFILER.phase('settlement'):
+            update_game_result(player_data, blackjack_winnings(rules, bet), True)
+        record_hand(history, player_name, bet, player_data['money'] - money_before,
+                    OUTCOME_BLACKJACK, player_hand, dealer_hand)
         return
     
     # 玩家回合
-    player_continue = player_turn(deck, player_hand, dealer_hand)
+    with PROFILER.phase('player_turn'):
+        player_continue = player_turn(deck, player_hand, dealer_hand, choose)
     
     # 如果玩家爆牌,直接輸掉
     if not player_continue:
-        update_game_result(player_data, bet, False)
+        PROFILER.count('player_busts')
+        with PROFILER.phase('settlement'):
+            update_game_result(player_data, bet, False)
+        record_hand(history, player_name, bet, player_data['money'] - money_before,
+                    OUTCOME_LOSE, player_hand, dealer_hand)
         return
     
     # 顯示莊家的完整手牌
     show_hands(player_hand, dealer_hand, hide_dealer=False)
     
     # 莊家回合
-    dealer_continue = dealer_turn(deck, dealer_hand)
+    with PROFILER.phase('dealer_turn'):
+        dealer_continue = dealer_turn(deck, dealer_hand, rules)
     
     # 如果莊家爆牌,玩家獲勝
     if not dealer_continue:
-        update_game_result(player_data, bet, True)
+        PROFILER.count('dealer_busts')
+        with PROFILER.phase('settlement'):
+            update_game_result(player_data, bet, True)
+        record_hand(history, player_name, bet, player_data['money'] - money_before,
+                    OUTCOME_WIN, player_hand, dealer_hand)
         return
     
     # 如果莊家也沒爆牌,判定勝負
-    result = show_final_result(player_hand, dealer_hand)
-    update_game_result(player_data, bet, result)
+    with PROFILER.phase('settlement'):
+        result = show_final_result(player_hand, dealer_hand)
+        update_game_result(player_data, bet, result)
+    outcome = {True: OUTCOME_WIN, False: OUTCOME_LOSE, None: OUTCOME_PUSH}[result]
+    record_hand(history, player_name, bet, player_data['money'] - money_before,
+                outcome, player_hand, dealer_hand)
+
+
+# ======== 批次模式 ========
+
+# 批次模式最多顯示幾行錯誤
+BATCH_ERROR_LINES = 20
+
+
+def parse_batch_line(line):
+    """
+    解析批次腳本的一行
+    
+    參數:
+        line: "名字,下注金額[,動作]",例如 "alice,20,HHS"
+    
+    回傳:
+        (名字, 下注金額, 動作字串);空行或 # 開頭的註解回傳 None
+    
+    功能說明:
+        - 動作為 H (要牌) / S (停牌) 的字串,用完時自動停牌
+        - 格式錯誤時丟出 ValueError
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    parts = [part.strip() for part in line.split(',')]
+    if len(parts) not in (2, 3) or not parts[0]:
+        raise ValueError("格式應為 名字,下注金額[,動作]")
+    try:
+        bet = int(parts[1])
+    except ValueError:
+        raise ValueError(f"下注金額不是數字: {parts[1]}") from None
+    actions = parts[2].upper() if len(parts) == 3 else ""
+    if set(actions) - set('HS'):
+        raise ValueError(f"動作只能是 H 或 S: {parts[2]}")
+    return parts[0], bet, actions
+
+
+def scripted_choices(actions):
+    """
+    回傳可取代 input() 的函數: 依序回傳腳本中的動作,用完後一律停牌
+    """
+    remaining = iter(actions)
+    
+    def choose(prompt=""):
+        return next(remaining, 'S')
+    
+    return choose
+
+
+def run_batch(lines, players, rules=CLI_RULES, errors=None, history=None):
+    """
+    依腳本連續進行多局,不需要任何輸入
+    
+    參數:
+        lines: 腳本的行 (檔案物件或字串列表)
+        players: 玩家資料字典 (會直接更新,新名字自動開設帳戶)
+        rules: 牌桌規則
+        errors: 若提供列表,無法執行的行會以 (行號, 內容, 原因) 加入
+        history: hand_history.HistoryWriter,提供時記錄每一局
+    
+    回傳:
+        {名字: {'hands': 局數, 'wins': 勝場, 'net': 淨輸贏}}
+    
+    功能說明:
+        - 每一行與 play_game 完全相同的流程進行一局 (含破產補助)
+        - 下注金額不合規則的行會略過並記錄錯誤
+        - 不存檔,由呼叫端在全部結束後存一次
+    """
+    results = {}
+    for line_no, line in enumerate(lines, 1):
+        try:
+            parsed = parse_batch_line(line)
+        except ValueError as e:
+            if errors is not None:
+                errors.append((line_no, line.rstrip('\n'), str(e)))
+            continue
+        if parsed is None:
+            continue
+        
+        name, bet, actions = parsed
+        # 先檢查下注金額 (以破產補助後的金額為準);新名字先在暫存的字典開設帳戶,
+        # 合乎規則後才加入 players,略過的行不會改動任何玩家資料
+        player_data = players[name] if name in players else create_player({}, name)
+        money = player_data['money'] if player_data['money'] > 0 else bankruptcy_subsidy(rules)
+        if bet < rules['min_bet'] or bet > money:
+            if errors is not None:
+                errors.append((line_no, line.rstrip('\n'),
+                               f"下注金額須介於 ${rules['min_bet']} ~ ${money}"))
+            continue
+        players[name] = player_data
+        check_bankruptcy(player_data, bankruptcy_subsidy(rules))
+        
+        money_before = player_data['money']
+        wins_before = player_data['wins']
+        play_game(name, player_data, rules, bet=bet, choose=scripted_choices(actions),
+                  history=history)
+        
+        stats = results.setdefault(name, {'hands': 0, 'wins': 0, 'net': 0})
+        stats['hands'] += 1
+        stats['wins'] += player_data['wins'] - wins_before
+        stats['net'] += player_data['money'] - money_before
+    return results
+
+
+def format_batch_summary(results, players, elapsed):
+    """
+    批次模式的結果摘要
+    """
+    hands = sum(stats['hands'] for stats in results.values())
+    speed = hands / elapsed if elapsed > 0 else 0
+    lines = ["=" * 50, f"批次完成: {hands} 局, {elapsed:.2f} 秒 ({speed:.0f} 局/秒)"]
+    for name, stats in results.items():
+        lines.append(f"{name}: {stats['hands']} 局, 勝 {stats['wins']}, "
+                     f"淨輸贏 ${stats['net']:+d}, 目前持有 ${players[name]['money']}")
+    lines.append("=" * 50)
+    return "\n".join(lines)
+
+
+def main_batch(path, rules=CLI_RULES, verbose=False, history=None):
+    """
+    批次模式主程式: 讀檔 -> 依腳本進行所有局 -> 存檔一次 -> 顯示摘要
+    
+    參數:
+        path: 腳本檔案路徑,'-' 表示從 stdin 讀取
+        verbose: 是否顯示每一局的完整過程
+        history: hand_history.HistoryWriter,提供時記錄每一局
+    
+    回傳:
+        結束代碼 (有無法執行的行時為 1)
+    """
+    import contextlib
+    import time
+    
+    with PROFILER.phase('load_player_data'):
+        players = load_player_data()
+    
+    errors = []
+    start = time.perf_counter()
+    try:
+        source = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    except OSError as e:
+        print(f"無法開啟批次腳本: {e}", file=sys.stderr)
+        return 2
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = sys.stdout if verbose else devnull
+            with contextlib.redirect_stdout(output):
+                results = run_batch(source, players, rules, errors, history)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - start
+    
+    # 全部結束後只存檔一次
+    with PROFILER.phase('save_player_data'):
+        save_player_data(players)
+    
+    print(format_batch_summary(results, players, elapsed))
+    for line_no, line, reason in errors[:BATCH_ERROR_LINES]:
+        print(f"第 {line_no} 行略過 ({reason}): {line}", file=sys.stderr)
+    if len(errors) > BATCH_ERROR_LINES:
+        print(f"... 共 {len(errors)} 行略過", file=sys.stderr)
+    return 1 if errors else 0
 
 
 # ======== 主程式 ========
 
-def main():
+def main(argv=None):
+    import argparse
+    import profiling
+    
+    parser = argparse.ArgumentParser(description="Blackjack (21點) 文字版")
+    parser.add_argument('--batch', metavar='FILE', default=None,
+                        help="批次模式: 依腳本 (每行 名字,下注金額,動作) 連續進行,'-' 表示 stdin")
+    parser.add_argument('--seed', type=int, default=None, help="亂數種子 (相同腳本與種子可重播)")
+    parser.add_argument('--verbose', action='store_true', help="批次模式顯示每一局的過程")
+    parser.add_argument('--history', metavar='FILE', default=None,
+                        help="把每一局附加到牌局紀錄檔 (見 hand_history.py)")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args(argv)
+    profiling.configure(args.profile)
+    
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    history = None
+    if args.history is not None:
+        from hand_history import HistoryWriter
+        try:
+            history = HistoryWriter(args.history)
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 2
+    
+    try:
+        if args.batch is not None:
+            # 批次模式是離線重播,不寫入即時記分板
+            return main_batch(args.batch, verbose=args.verbose, history=history)
+        from game_snapshot import open_checkpoint
+        from scoreboard import open_scoreboard
+        scoreboard = open_scoreboard()
+        try:
+            play_interactive(history, scoreboard, open_checkpoint)
+        finally:
+            if scoreboard is not None:
+                scoreboard.close()
+    finally:
+        if history is not None:
+            history.close()
+
+
+def restore_player(player_data, snapshot):
+    """
+    依檢查點還原玩家資料 (金額與戰績以檢查點為準,可能比 players.txt 新)
+    """
+    player_data['money'] = snapshot['money']
+    player_data['total'] = snapshot['total']
+    player_data['wins'] = snapshot['wins']
+    player_data['win_rate'] = format_win_rate(player_data['total'], player_data['wins'])
+    print(f"\n偵測到上次未結束的牌局, 持有金額以當時為準: ${player_data['money']}")
+
+
+def play_interactive(history=None, scoreboard=None, open_checkpoint=None):
+    """
+    互動模式: 登入 -> 每局結束存檔 -> 詢問是否再玩一局
+    
+    參數:
+        history: hand_history.HistoryWriter,提供時記錄每一局
+        scoreboard: scoreboard.Scoreboard,提供時每局結束後更新
+        open_checkpoint: game_snapshot.open_checkpoint,提供時登入後先還原
+                         該玩家上次未結束的牌局,並在每局進行中寫入檢查點
+    """
     # 載入玩家資料
-    players = load_player_data()
+    with PROFILER.phase('load_player_data'):
+        players = load_player_data()
     
-    # 取得或建立玩家
+    # 取得或建立玩家;該玩家有檢查點時直接回到上次的牌局
     player_name, player_data = get_or_create_player(players)
+    checkpoint = resume = None
+    if open_checkpoint is not None:
+        checkpoint = open_checkpoint('cli', player_name)
+    if checkpoint is not None:
+        with PROFILER.phase('restore_checkpoint'):
+            resume = checkpoint.load()
+        if resume is not None and resume['player'] != player_name:
+            resume = None
+    if resume is not None:
+        restore_player(player_data, resume)
     
     # 遊戲循環
     while True:
-        # 開始新遊戲
-        play_game(player_name, player_data)
+        # 開始新遊戲 (或繼續檢查點中的牌局;已結算的只需要存檔)
+        if resume is None or resume['state'] == 'PLAYING':
+            with PROFILER.phase('play_game'):
+                play_game(player_name, player_data, history=history, checkpoint=checkpoint,
+                          resume=resume)
+        resume = None
+        if scoreboard is not None:
+            scoreboard.publish(player_name, player_data)
         
-        # 存檔 (每局結束後都要存檔)
-        save_player_data(players)
+        # 存檔 (每局結束後都要存檔),存檔之後才清除檢查點;
+        # 牌局紀錄也在這裡寫出,不等累積滿一批
+        with PROFILER.phase('save_player_data'):
+            save_player_data(players)
+        if history is not None:
+            history.flush()
+        if checkpoint is not None:
+            checkpoint.clear()
         print("\n[系統] 資料已儲存")
         
         # 重新載入資料 (確保是最新的)
-        players = load_player_data()
+        with PROFILER.phase('load_player_data'):
+            players = load_player_data()
         print(f"players->{players}")
         player_data = players[player_name]
         
@@ -602,4 +986,4 @@ def main():
 
 # 執行遊戲
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -3,6 +3,13 @@ import sys
 import random
 import os
 
+import hand_index
+from game_snapshot import open_checkpoint
+from profiling import PROFILER
+from scoreboard import open_scoreboard
+from table_rules import (MAX_SEATS, PYGAME_RULES, bankruptcy_subsidy, blackjack_winnings,
+                         dealer_should_hit)
+
 # ======== 1. 核心邏輯與資料管理 ========
 
 def load_player_data(filename="players.txt"):
@@ -24,8 +31,8 @@ def load_player_data(filename="players.txt"):
                             'wins': int(parts[3]),
                             'win_rate': parts[4] if len(parts) > 4 else "0.0%"
                         }
-    except Exception:
-        pass
+    except Exception as e:
+        print(f"讀檔錯誤: {e}")
     return players
 
 def save_player_data(players, filename="players.txt"):
@@ -42,10 +49,10 @@ def save_player_data(players, filename="players.txt"):
     except Exception as e:
         print(f"存檔錯誤: {e}")
 
-def create_deck():
+def create_deck(num_decks=1):
     suits = ['♠', '♥', '♦', '♣']
     ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
-    deck = [(s, r) for s in suits for r in ranks]
+    deck = [(s, r) for s in suits for r in ranks] * num_decks
     random.shuffle(deck)
     return deck
 
@@ -58,13 +65,21 @@ def get_card_value(card):
     else:
         return int(rank)
 
-def calculate_hand_value(cards):
+def calculate_hand_state(cards):
+    # 回傳 (點數, 是否為軟牌);沒爆牌時直接查 hand_index 的預先計算表
+    state = hand_index.card_state(cards)
+    if state != hand_index.BUST_STATE:
+        return hand_index.TOTAL[state], hand_index.SOFT[state] == 1
+    # 爆牌時照實際點數顯示 (A 全部算 1 點)
     value = sum(get_card_value(card) for card in cards)
     aces = sum(1 for card in cards if card[1] == 'A')
     while value > 21 and aces > 0:
         value -= 10
         aces -= 1
-    return value
+    return value, aces > 0
+
+def calculate_hand_value(cards):
+    return calculate_hand_state(cards)[0]
 
 # ======== 2. Pygame 視覺與介面設定 ========
 
@@ -156,22 +171,35 @@ class Button:
 
 # 遊戲主程式類別
 class BlackjackGame:
-    def __init__(self):
+    def __init__(self, rules=PYGAME_RULES, num_seats=1):
+        if not 1 <= num_seats <= MAX_SEATS:
+            raise ValueError(f"座位數必須介於 1~{MAX_SEATS}")
+        self.rules = rules
+        self.table_seats = num_seats  # 牌桌的座位數,同一位玩家同時下注,共用一副牌與莊家
+        self.num_seats = num_seats    # 本局實際下注的座位數 (資金不足時減少,見 start_betting)
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Python Blackjack - Pygame 版")
         self.clock = pygame.time.Clock()
         
-        self.players = load_player_data()
+        with PROFILER.phase('load_player_data'):
+            self.players = load_player_data()
         self.current_player_name = ""
         
+        # 跨行程的即時記分板 (停用或無法使用時為 None)
+        self.scoreboard = open_scoreboard()
+        self.leaderboard = []
+        self.leaderboard_time = None
+        
         # 遊戲狀態: LOGIN, BETTING, PLAYING, RESULT
         self.state = "LOGIN"
         
         # 輸入框變數
         self.input_text = ""
         
-        # 遊戲變數
-        self.player_hand = []
+        # 遊戲變數 (每個座位一手牌;bet 為每個座位的下注金額)
+        self.player_hands = []
+        self.seat_results = []
+        self.active_seat = 0
         self.dealer_hand = []
         self.deck = []
         self.bet = 0
@@ -179,6 +207,10 @@ class BlackjackGame:
         
         # 按鈕群組
         self.buttons = []
+        
+        # 當機保護: 每個動作之後寫入檢查點,登入時還原該玩家上次未結束的牌局
+        # (每位玩家一個檢查點,同一台電腦的多個牌桌不會互相覆蓋)
+        self.checkpoint = None
 
     def init_buttons(self):
         self.buttons = []
@@ -247,9 +279,14 @@ class BlackjackGame:
     def draw_game_area(self):
         # 1. 顯示玩家資訊
         player_data = self.players.get(self.current_player_name, {'money': 0, 'win_rate': '0%'})
-        info_text = f"玩家: {self.current_player_name}  |  籌碼: ${player_data['money']}  |  本局下注: ${self.bet}"
+        if self.num_seats == 1:
+            info_text = f"玩家: {self.current_player_name}  |  籌碼: ${player_data['money']}  |  本局下注: ${self.bet}"
+        else:
+            info_text = f"玩家: {self.current_player_name}  |  籌碼: ${player_data['money']}  |  每座位下注: ${self.bet} x {self.num_seats}"
         info_surf = FONT_MEDIUM.render(info_text, True, (255, 215, 0))
         self.screen.blit(info_surf, (20, 20))
+        
+        self.draw_leaderboard()
 
         # 2. 畫莊家區域
         dealer_text = FONT_MEDIUM.render("莊家手牌", True, COLOR_WHITE)
@@ -263,17 +300,28 @@ class BlackjackGame:
              score_text = f"點數: {calculate_hand_value(self.dealer_hand)}"
              self.screen.blit(FONT_SMALL.render(score_text, True, COLOR_GRAY), (50, 290))
 
-        # 3. 畫玩家區域
-        player_text = FONT_MEDIUM.render("您的手牌", True, COLOR_WHITE)
-        self.screen.blit(player_text, (50, 400))
+        # 3. 畫玩家區域 (多座位時每個座位一欄,卡牌依欄寬重疊)
+        if self.num_seats == 1:
+            player_text = FONT_MEDIUM.render("您的手牌", True, COLOR_WHITE)
+            self.screen.blit(player_text, (50, 400))
         
-        for i, card in enumerate(self.player_hand):
-            self.draw_card(card, 50 + i * 110, 440)
+        column_width = (SCREEN_WIDTH - 50) // self.num_seats
+        for seat, hand in enumerate(self.player_hands):
+            x0 = 50 + seat * column_width
+            step = 110
+            if self.num_seats > 1:
+                is_active = (self.state == "PLAYING" and seat == self.active_seat)
+                label_color = (255, 215, 0) if is_active else COLOR_WHITE
+                self.screen.blit(FONT_SMALL.render(f"座位 {seat + 1}", True, label_color), (x0, 405))
+                if len(hand) > 1:
+                    step = min(110, max(15, (column_width - CARD_WIDTH - 10) // (len(hand) - 1)))
             
-        if self.player_hand:
-            p_score = calculate_hand_value(self.player_hand)
+            for i, card in enumerate(hand):
+                self.draw_card(card, x0 + i * step, 440)
+                
+            p_score = calculate_hand_value(hand)
             score_text = f"點數: {p_score}"
-            self.screen.blit(FONT_SMALL.render(score_text, True, COLOR_GRAY), (50, 590))
+            self.screen.blit(FONT_SMALL.render(score_text, True, COLOR_GRAY), (x0, 590))
 
         # 4. 顯示訊息
         if self.message:
@@ -284,6 +332,28 @@ class BlackjackGame:
             pygame.draw.rect(self.screen, (0,0,0, 180), bg_rect, border_radius=10)
             self.screen.blit(msg_surf, msg_rect)
 
+    def publish_score(self):
+        # 把目前玩家的金額與戰績寫到記分板
+        if self.scoreboard is not None:
+            self.scoreboard.publish(self.current_player_name,
+                                    self.players[self.current_player_name])
+
+    def draw_leaderboard(self):
+        # 右上角的排行榜 (所有牌桌共用),每 0.5 秒從共享記憶體讀取一次
+        if self.scoreboard is None:
+            return
+        now = pygame.time.get_ticks()
+        if self.leaderboard_time is None or now - self.leaderboard_time >= 500:
+            self.leaderboard = self.scoreboard.leaderboard(5)
+            self.leaderboard_time = now
+        
+        x = SCREEN_WIDTH - 240
+        self.screen.blit(FONT_SMALL.render("排行榜", True, (255, 215, 0)), (x, 70))
+        for i, entry in enumerate(self.leaderboard):
+            color = (255, 215, 0) if entry['name'] == self.current_player_name else COLOR_WHITE
+            text = f"{i + 1}. {entry['name']}  ${entry['money']}"
+            self.screen.blit(FONT_SMALL.render(text, True, color), (x, 100 + i * 28))
+
     def handle_login(self):
         title = FONT_LARGE.render("BLACKJACK 21點", True, (255, 215, 0))
         self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 100))
@@ -306,9 +376,91 @@ class BlackjackGame:
             if name not in self.players:
                 self.players[name] = {'money': 100, 'total': 0, 'wins': 0, 'win_rate': '0.0%'}
             self.input_text = ""
-            self.bet = 0
-            self.state = "BETTING"
+            self.checkpoint = open_checkpoint('pygame', name)
+            if not self.restore_checkpoint():
+                self.bet = 0
+                self.state = "BETTING"
+                self.start_betting()
             self.init_buttons()
+            self.publish_score()
+            self.save_checkpoint()
+
+    def start_betting(self):
+        """
+        進入下注階段前檢查資金:
+            - 金額 <= 0 時給予破產補助 (與文字版的 check_bankruptcy 相同)
+            - 不夠每個座位都下最低注時,本局只使用資金足夠的座位數
+        """
+        data = self.players[self.current_player_name]
+        min_bet = self.rules['min_bet']
+        if data['money'] <= 0:
+            data['money'] = bankruptcy_subsidy(self.rules)
+            self.message = f"破產補助 ${data['money']}"
+            self.publish_score()
+        self.num_seats = max(1, min(self.table_seats, data['money'] // min_bet))
+        if data['money'] < min_bet:
+            self.message = f"資金不足最低下注 ${min_bet}"
+        elif self.num_seats < self.table_seats and not self.message:
+            self.message = f"資金只夠 {self.num_seats} 個座位"
+
+    def snapshot(self):
+        # 目前的牌局狀態 (格式見 game_snapshot.encode_snapshot)
+        data = self.players[self.current_player_name]
+        return {
+            'state': self.state, 'player': self.current_player_name,
+            'money': data['money'], 'total': data['total'], 'wins': data['wins'],
+            'bet': self.bet, 'deck': self.deck, 'dealer': self.dealer_hand,
+            'hands': self.player_hands, 'results': self.seat_results,
+            'active_seat': self.active_seat, 'message': self.message,
+        }
+
+    def save_checkpoint(self):
+        if self.checkpoint is None or self.state == "LOGIN":
+            return
+        with PROFILER.phase('checkpoint'):
+            self.checkpoint.save(self.snapshot())
+
+    def restore_checkpoint(self):
+        """
+        還原目前玩家上次的牌局: 金額與戰績以檢查點為準 (可能比 players.txt 新),
+        牌局進行中時從同一副牌、同一個座位繼續
+
+        回傳:
+            是否有還原
+        """
+        if self.checkpoint is None:
+            return False
+        with PROFILER.phase('restore_checkpoint'):
+            snapshot = self.checkpoint.load()
+        if (snapshot is None or snapshot['state'] == "LOGIN"
+                or snapshot['player'] != self.current_player_name):
+            return False
+        
+        data = self.players[self.current_player_name]
+        data['money'] = snapshot['money']
+        data['total'] = snapshot['total']
+        data['wins'] = snapshot['wins']
+        
+        self.state = snapshot['state']
+        self.bet = snapshot['bet']
+        self.deck = snapshot['deck']
+        self.dealer_hand = snapshot['dealer']
+        self.player_hands = snapshot['hands']
+        self.seat_results = snapshot['results']
+        self.active_seat = snapshot['active_seat']
+        self.message = snapshot['message']
+        if self.player_hands:
+            self.num_seats = len(self.player_hands)
+        elif self.state == "BETTING":
+            self.start_betting()
+        return True
+
+    def shutdown(self):
+        # 牌局進行中離開時保留檢查點 (下次啟動必須把這一局打完),否則清除
+        if self.checkpoint is not None and self.state != "PLAYING":
+            self.checkpoint.clear()
+        pygame.quit()
+        sys.exit()
 
     def run(self):
         self.init_buttons()
@@ -317,8 +469,7 @@ class BlackjackGame:
             mouse_pos = pygame.mouse.get_pos()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+                    self.shutdown()
                 
                 # 文字輸入處理
                 if event.type == pygame.KEYDOWN:
@@ -355,6 +506,12 @@ class BlackjackGame:
             self.clock.tick(FPS)
 
     def handle_action(self, code):
+        # 每個動作分別計時 (例如 handle_action.DEAL)
+        with PROFILER.phase('handle_action.' + code):
+            self._handle_action(code)
+        self.save_checkpoint()
+
+    def _handle_action(self, code):
         # [修復重點] 先處理登入，避免存取尚未存在的玩家名稱
         if code == "LOGIN_CONFIRM":
             self.perform_login()
@@ -364,93 +521,147 @@ class BlackjackGame:
         player_data = self.players[self.current_player_name]
         
         if code == "BET_10":
-            if player_data['money'] >= self.bet + 10:
+            if player_data['money'] >= (self.bet + 10) * self.num_seats:
                 self.bet += 10
         elif code == "BET_50":
-            if player_data['money'] >= self.bet + 50:
+            if player_data['money'] >= (self.bet + 50) * self.num_seats:
                 self.bet += 50
         elif code == "BET_RESET":
             self.bet = 0
             
         elif code == "DEAL":
-            if self.bet < 10:
-                self.message = "最少下注 $10"
+            if self.bet < self.rules['min_bet']:
+                self.message = f"最少下注 ${self.rules['min_bet']}"
                 return
-            if self.bet > player_data['money']:
+            if self.bet * self.num_seats > player_data['money']:
                 self.message = "資金不足"
                 return
             
             self.message = ""
-            self.deck = create_deck()
-            self.player_hand = [self.deck.pop(), self.deck.pop()]
+            self.deck = create_deck(self.rules['num_decks'])
+            # 發牌順序同 blackjack_sim.make_round_player: 每個座位兩張,再來莊家兩張
+            self.player_hands = [[self.deck.pop(), self.deck.pop()] for _ in range(self.num_seats)]
             self.dealer_hand = [self.deck.pop(), self.deck.pop()]
+            self.seat_results = [None] * self.num_seats
+            self.active_seat = 0
             self.state = "PLAYING"
             self.init_buttons()
-            
-            if calculate_hand_value(self.player_hand) == 21:
-                self.game_over(player_blackjack=True)
+            self.advance_seat()
 
         elif code == "HIT":
-            self.player_hand.append(self.deck.pop())
-            if calculate_hand_value(self.player_hand) > 21:
-                self.game_over(winner="Dealer")
+            hand = self.player_hands[self.active_seat]
+            hand.append(self.draw_from_deck())
+            if calculate_hand_value(hand) > 21:
+                self.seat_results[self.active_seat] = "Dealer"
+                self.active_seat += 1
+                self.advance_seat()
 
         elif code == "STAND":
-            while calculate_hand_value(self.dealer_hand) < 17:
-                self.dealer_hand.append(self.deck.pop())
-            
-            p_val = calculate_hand_value(self.player_hand)
-            d_val = calculate_hand_value(self.dealer_hand)
-            
-            if d_val > 21:
-                self.game_over(winner="Player")
-            elif p_val > d_val:
-                self.game_over(winner="Player")
-            elif p_val < d_val:
-                self.game_over(winner="Dealer")
-            else:
-                self.game_over(winner="Tie")
+            self.active_seat += 1
+            self.advance_seat()
 
         elif code == "RESTART":
-            self.player_hand = []
+            self.player_hands = []
+            self.seat_results = []
+            self.active_seat = 0
             self.dealer_hand = []
             self.bet = 0
             self.message = ""
             self.state = "BETTING"
-            
-            if self.players[self.current_player_name]['money'] <= 0:
-                 self.players[self.current_player_name]['money'] = 10
-                 self.message = "破產補助 $10"
-                 
+            self.start_betting()
             self.init_buttons()
 
         elif code == "QUIT":
-            pygame.quit()
-            sys.exit()
-
-    def game_over(self, winner=None, player_blackjack=False):
-        self.state = "RESULT"
-        self.init_buttons()
+            self.shutdown()
+
+    def draw_from_deck(self):
+        # 多座位時一副牌可能不夠用,牌用完就接上一副新洗的牌
+        if not self.deck:
+            self.deck = create_deck(self.rules['num_decks'])
+        return self.deck.pop()
+
+    def advance_seat(self):
+        """
+        從 active_seat 起找下一個需要行動的座位;
+        前兩張 21 點的座位直接記為 Blackjack。所有座位都結束時結算整輪。
+        """
+        while self.active_seat < self.num_seats:
+            if calculate_hand_value(self.player_hands[self.active_seat]) != 21:
+                return
+            self.seat_results[self.active_seat] = "Blackjack"
+            self.active_seat += 1
+        self.finish_round()
+
+    def finish_round(self):
+        # 還有座位沒爆牌、沒拿 Blackjack 時,莊家補牌一次並與這些座位比點數
+        pending = [i for i, result in enumerate(self.seat_results) if result is None]
+        if pending:
+            while dealer_should_hit(self.rules, *calculate_hand_state(self.dealer_hand)):
+                self.dealer_hand.append(self.draw_from_deck())
+            d_val = calculate_hand_value(self.dealer_hand)
+            
+            for i in pending:
+                p_val = calculate_hand_value(self.player_hands[i])
+                if d_val > 21:
+                    self.seat_results[i] = "Player"
+                elif p_val > d_val:
+                    self.seat_results[i] = "Player"
+                elif p_val < d_val:
+                    self.seat_results[i] = "Dealer"
+                else:
+                    self.seat_results[i] = "Tie"
         
-        data = self.players[self.current_player_name]
+        self.game_over(self.seat_results)
+
+    def settle_seat(self, data, result):
+        # 結算一個座位,回傳結果訊息
         data['total'] += 1
         
-        if player_blackjack:
+        if result == "Blackjack":
             data['wins'] += 1
-            data['money'] += int(self.bet * 1.5)
-            self.message = "Blackjack! 贏得 1.5倍!"
-        elif winner == "Player":
+            data['money'] += blackjack_winnings(self.rules, self.bet)
+            return f"Blackjack! 贏得 {self.rules['blackjack_payout']:g}倍!"
+        elif result == "Player":
             data['wins'] += 1
             data['money'] += self.bet
-            self.message = "恭喜獲勝!"
-        elif winner == "Dealer":
+            return "恭喜獲勝!"
+        elif result == "Dealer":
             data['money'] -= self.bet
-            self.message = "莊家獲勝!"
+            return "莊家獲勝!"
+        else:
+            return "平手!"
+
+    def game_over(self, results):
+        self.state = "RESULT"
+        self.init_buttons()
+        
+        data = self.players[self.current_player_name]
+        messages = [self.settle_seat(data, result) for result in results]
+        
+        if len(messages) == 1:
+            self.message = messages[0]
         else:
-            self.message = "平手!"
+            net = sum({"Blackjack": blackjack_winnings(self.rules, self.bet), "Player": self.bet,
+                       "Dealer": -self.bet}.get(result, 0) for result in results)
+            wins = sum(1 for result in results if result in ("Blackjack", "Player"))
+            self.message = f"贏 {wins}/{len(results)} 座位, 淨輸贏 ${net:+d}"
             
-        save_player_data(self.players)
+        PROFILER.count('rounds')
+        with PROFILER.phase('save_player_data'):
+            save_player_data(self.players)
+        self.publish_score()
 
 if __name__ == "__main__":
-    game = BlackjackGame()
+    import argparse
+    import profiling
+    
+    parser = argparse.ArgumentParser(description="Blackjack (21點) Pygame 版")
+    parser.add_argument('--seats', type=int, default=1, help=f"座位數 (1~{MAX_SEATS})")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    if not 1 <= args.seats <= MAX_SEATS:
+        parser.error(f"座位數必須介於 1~{MAX_SEATS}")
+    profiling.configure(args.profile)
+    
+    game = BlackjackGame(num_seats=args.seats)
     game.run()
\ No newline at end of file
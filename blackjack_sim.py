@@ -0,0 +1,946 @@
+"""
+Blackjack 模擬引擎與資金 (bankroll) 模擬器
+
+blackjack.py 的 get_bet_amount / update_game_result / check_bankruptcy
+定義了資金規則:
+    - 最低下注 $10,不得超過持有金額
+    - 贏: +下注金額 (平賠);Blackjack 依規則為 1:1 或 3:2 (game_over 的 int(bet * 1.5))
+    - 輸: -下注金額;平手: 金額不變
+    - 金額 <= 0 時,下一局開始前補助 $10
+
+本模組分兩層:
+    1. play_hand(): 不經過 input()/print() 的單局自動對局,規則與 play_game 相同;
+       make_hand_player(rules) 依 table_rules 的規則產生專用的單局函數
+    2. simulate_bankrolls(): 以單局結果的機率分布,同時推演大量玩家的資金變化,
+       回報破產機率、每千局的補助成本、以及第一次破產前的局數分布
+    3. estimate_ev(): 逐批模擬並以 sim_stats 追蹤信賴區間,夠精確時自動停止
+    4. simulate_table(): 多座位共用一副牌,每輪只洗一次牌、莊家只補一次牌
+
+有安裝 numpy 時,所有玩家的資金以陣列一次推進一局;沒有 numpy 時退回逐一模擬。
+
+指令列用法:
+    python blackjack_sim.py --sessions 100000 --hands 1000 --bet 10
+    python blackjack_sim.py --ev-target 0.005
+    python blackjack_sim.py --seats 7 --rounds 100000 --strategy basic
+"""
+import random
+import sys
+from itertools import islice
+
+import artifact_cache
+import hand_index
+import shoe_gen
+import table_rules
+from shoe_gen import ShoeFile, shoe_stream
+from strategy_table import CompiledStrategy, basic_strategy, compile_strategy, validate
+from table_rules import (BUST, MAX_SEATS, NATURAL, OUTCOME_BLACKJACK, OUTCOME_LOSE,
+                         OUTCOME_NAMES, OUTCOME_PUSH, OUTCOME_SURRENDER, OUTCOME_WIN,
+                         PYGAME_RULES, SETTLE_SIZE, add_rules_arguments, create_rules,
+                         bankruptcy_subsidy, describe_rules, rules_from_args, rules_settings)
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為選用套件
+    np = None
+
+
+# ======== 卡牌 (以點數索引表示) ========
+
+# 模擬時每張牌只記點數索引: 0=A, 1~8 = 2~9, 9~12 = 10/J/Q/K
+RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+SUITS = ['♠', '♥', '♦', '♣']
+
+# 與 get_card_value 相同: A 先算 11 點, J/Q/K 算 10 點
+CARD_VALUES = [11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10]
+
+# 規則常數 (與 blackjack.py 相同)
+MIN_BET = 10
+STARTING_MONEY = 100
+BANKRUPTCY_SUBSIDY = 10
+DEALER_STAND = 17
+
+# 多座位時每手預留的牌數 (一輪可能用到的牌遠少於此)
+ROUND_CARDS_PER_HAND = 12
+
+
+def card_to_tuple(card_id):
+    """
+    將牌的編號 (0~51) 轉換成 blackjack.py 使用的 (花色, 點數) 元組
+    """
+    return SUITS[card_id // 13], RANKS[card_id % 13]
+
+
+def new_shoe(rng=random, num_decks=1):
+    """
+    建立並洗好一副牌 (只含點數索引)
+
+    參數:
+        rng: random.Random 物件 (預設使用 random 模組)
+        num_decks: 幾副牌
+
+    回傳:
+        點數索引列表,從尾端發牌 (與 deal_card 的 pop() 相同)
+    """
+    shoe = list(range(13)) * (4 * num_decks)
+    rng.shuffle(shoe)
+    return shoe
+
+
+def add_card(total, aces, rank):
+    """
+    將一張牌加入手牌並調整 A 的點數 (對應 add_card_to_hand + adjust_for_ace)
+
+    參數:
+        total: 目前點數
+        aces: 仍以 11 點計算的 A 數量 (軟牌)
+        rank: 新牌的點數索引
+
+    回傳:
+        (新點數, 新的軟 A 數量)
+    """
+    total += CARD_VALUES[rank]
+    if rank == 0:
+        aces += 1
+    while total > 21 and aces > 0:
+        total -= 10
+        aces -= 1
+    return total, aces
+
+
+# ======== 玩家策略 ========
+
+def dealer_mimic_strategy(total, soft, dealer_up):
+    """
+    預設玩家策略: 跟莊家一樣,點數小於 17 就要牌
+
+    參數:
+        total: 玩家目前點數
+        soft: 是否為軟牌 (有 A 以 11 點計算)
+        dealer_up: 莊家明牌的點數 (A 為 11)
+
+    回傳:
+        True (要牌) / False (停牌)
+    """
+    return total < DEALER_STAND
+
+
+def never_bust_strategy(total, soft, dealer_up):
+    """
+    絕不爆牌: 硬牌 12 點以上就停牌 (軟牌仍要牌到 18)
+    """
+    if soft:
+        return total < 18
+    return total < 12
+
+
+def simple_basic_strategy(total, soft, dealer_up):
+    """
+    簡化版基本策略 (只有要牌/停牌)
+
+    功能說明:
+        - 軟牌: 18 點以下要牌 (莊家明牌 2~8 時 18 點停牌)
+        - 硬牌: 莊家明牌 2~6 時 12 點以上停牌 (明牌 2、3 時 13 點以上),
+                莊家明牌 7 以上時要牌到 17
+    """
+    if soft:
+        if total == 18:
+            return dealer_up >= 9
+        return total < 18
+    if dealer_up >= 7:
+        return total < 17
+    if dealer_up <= 3:
+        return total < 13
+    return total < 12
+
+
+# 名稱 -> 策略函數 (供指令列與比較工具使用)
+STRATEGIES = {
+    'mimic': dealer_mimic_strategy,
+    'never_bust': never_bust_strategy,
+    'basic': simple_basic_strategy,
+}
+
+
+def resolve_strategy(name, rules=PYGAME_RULES):
+    """
+    依名稱取得策略
+
+    參數:
+        name: STRATEGIES 中的名稱、'chart' (內建完整基本策略表),
+              或 strategy_table.py 編譯出的 .bjs 檔案路徑
+        rules: 規則字典;.bjs 策略表必須通過 strategy_table.validate (只用規則允許的動作),
+               內建的 chart 則限制在規則允許的動作內
+
+    回傳:
+        策略函數或 CompiledStrategy
+    """
+    if name.endswith('.bjs'):
+        table = CompiledStrategy.load(name)
+        problems = validate(table, rules['actions'])
+        if problems:
+            raise ValueError(f"{name} 不符合規則 (允許的動作 {rules['actions']}): {problems[0]}"
+                             + (f" 等 {len(problems)} 個問題" if len(problems) > 1 else ""))
+        return table
+    if name == 'chart':
+        return basic_strategy(rules['actions'])
+    if name not in STRATEGIES:
+        raise ValueError(f"未知的策略: {name} (可用: {', '.join(STRATEGIES)}, chart, *.bjs)")
+    return STRATEGIES[name]
+
+
+# ======== 單局模擬 ========
+
+def play_hand(shoe, strategy=dealer_mimic_strategy):
+    """
+    自動進行一局 (規則與 play_game 相同,但不輸入、不輸出)
+
+    參數:
+        shoe: 點數索引列表,會從尾端取牌
+        strategy: 玩家策略函數 (見 dealer_mimic_strategy)
+
+    回傳:
+        結果代碼 (OUTCOME_BLACKJACK / WIN / PUSH / LOSE)
+
+    功能說明:
+        - 發牌順序與 initial_deal 相同: 玩家兩張,莊家兩張
+        - 玩家前兩張 21 點直接獲勝 (即使莊家也是 21 點)
+        - 玩家爆牌直接輸,莊家點數小於 17 必須要牌
+    """
+    pop = shoe.pop
+    p_total, p_aces = add_card(0, 0, pop())
+    p_total, p_aces = add_card(p_total, p_aces, pop())
+    d_up = pop()
+    d_total, d_aces = add_card(0, 0, d_up)
+    d_total, d_aces = add_card(d_total, d_aces, pop())
+
+    if p_total == 21:
+        return OUTCOME_BLACKJACK
+
+    dealer_up = CARD_VALUES[d_up]
+    while strategy(p_total, p_aces > 0, dealer_up):
+        p_total, p_aces = add_card(p_total, p_aces, pop())
+        if p_total > 21:
+            return OUTCOME_LOSE
+
+    while d_total < DEALER_STAND:
+        d_total, d_aces = add_card(d_total, d_aces, pop())
+
+    if d_total > 21 or p_total > d_total:
+        return OUTCOME_WIN
+    if p_total < d_total:
+        return OUTCOME_LOSE
+    return OUTCOME_PUSH
+
+
+def make_hand_player(rules):
+    """
+    依規則產生專用的單局函數
+
+    參數:
+        rules: table_rules.create_rules() 建立的規則字典
+
+    回傳:
+        play(shoe, strategy) -> 結果 tuple (結果代碼, 下注倍數[, 結果代碼, 下注倍數])
+        分牌時有兩組結果;以 settle() 換算成輸贏
+
+    功能說明:
+        - 莊家要牌與結算都查規則的預先計算表,不做規則判斷
+        - 規則不允許加倍/分牌/投降時,使用只有要牌/停牌的精簡版本,
+          策略介面與 play_hand 相同: strategy(total, soft, dealer_up) -> 是否要牌
+        - 否則策略需有 decide(total, soft, dealer_up, pair) 方法 (例如 CompiledStrategy);
+          一般策略函數會被視為只會要牌/停牌
+    """
+    settlement = rules['settlement']
+    peek = rules['dealer_peek']
+    values = CARD_VALUES
+    dealer_result = _make_dealer_player(rules)
+    # 手牌以 hand_index 的狀態表示,每張牌一次查表 (13 = 點數索引的種類數)
+    rank_next = hand_index.RANK_NEXT
+    natural = hand_index.BLACKJACK
+    totals = hand_index.TOTAL
+    soft = hand_index.SOFT
+    bust = hand_index.BUST_STATE
+
+    if not (rules['double'] or rules['split'] or rules['surrender']):
+        def play(shoe, strategy):
+            pop = shoe.pop
+            p_state = rank_next[rank_next[pop()] * 13 + pop()]
+            d_up = pop()
+            d_state = rank_next[rank_next[d_up] * 13 + pop()]
+            dealer_code = NATURAL if natural[d_state] else None
+
+            if natural[p_state]:
+                return settlement[NATURAL * SETTLE_SIZE + (dealer_code or totals[d_state])], 1
+            if peek and dealer_code:
+                return OUTCOME_LOSE, 1
+
+            dealer_up = values[d_up]
+            while strategy(totals[p_state], soft[p_state] == 1, dealer_up):
+                p_state = rank_next[p_state * 13 + pop()]
+                if p_state == bust:
+                    return OUTCOME_LOSE, 1
+            if dealer_code is None:
+                dealer_code = dealer_result(d_state, pop)
+            return settlement[totals[p_state] * SETTLE_SIZE + dealer_code], 1
+
+        return play
+
+    play_seat = _make_seat_player(rules)
+
+    def play(shoe, strategy):
+        decide = _decider(strategy, True)
+        pop = shoe.pop
+        c1 = pop()
+        c2 = pop()
+        d_up = pop()
+        d_state = rank_next[rank_next[d_up] * 13 + pop()]
+        dealer_code = NATURAL if natural[d_state] else None
+
+        if natural[rank_next[rank_next[c1] * 13 + c2]]:
+            return settlement[NATURAL * SETTLE_SIZE + (dealer_code or totals[d_state])], 1
+        if peek and dealer_code:
+            return OUTCOME_LOSE, 1
+
+        hands = play_seat(c1, c2, values[d_up], decide, pop)
+        if hands is None:
+            return OUTCOME_SURRENDER, 1
+        if dealer_code is None and any(final != BUST for final, _ in hands):
+            dealer_code = dealer_result(d_state, pop)
+        return _settle_hands(settlement, hands, dealer_code)
+
+    return play
+
+
+def _decider(strategy, use_table):
+    # 統一成 decide(total, soft, dealer_up, pair) -> 動作字元;
+    # use_table 為 False 時只用策略的 要牌/停牌 介面
+    decide = getattr(strategy, 'decide', None) if use_table else None
+    if decide is None:
+        def decide(total, soft, dealer_up, pair, _f=strategy):
+            return 'H' if _f(total, soft, dealer_up) else 'S'
+    return decide
+
+
+def _make_dealer_player(rules):
+    # 莊家補牌走 hand_index 的狀態: 每張牌一次查表,是否要牌也預先依狀態算好
+    # (爆牌狀態不要牌,其點數 BUST_TOTAL 即結算表的 BUST)
+    dealer_hits = rules['dealer_hits']
+    hits = bytes(state != hand_index.BUST_STATE and
+                 dealer_hits[hand_index.TOTAL[state] * 2 + hand_index.SOFT[state]]
+                 for state in range(hand_index.STATE_COUNT))
+    totals = hand_index.TOTAL
+    rank_next = hand_index.RANK_NEXT
+
+    def dealer_result(state, pop):
+        while hits[state]:
+            state = rank_next[state * 13 + pop()]
+        return totals[state]
+
+    return dealer_result
+
+
+def _settle_hands(settlement, hands, dealer_code):
+    # hands: [(最終點數或 BUST, 倍數), ...];全部爆牌時莊家不必補牌 (dealer_code 為 None)
+    result = ()
+    for final, mult in hands:
+        if final == BUST:
+            result += (OUTCOME_LOSE, mult)
+        else:
+            result += (settlement[final * SETTLE_SIZE + dealer_code], mult)
+    return result
+
+
+def _make_seat_player(rules):
+    """
+    產生單一座位的行動函數 (不含 Blackjack 判斷與莊家補牌)
+
+    回傳:
+        play_seat(c1, c2, dealer_up, decide, pop) -> None (投降) 或
+        [(最終點數或 BUST, 下注倍數), ...] (分牌時有兩手)
+    """
+    can_double = rules['double']
+    can_split = rules['split']
+    can_surrender = rules['surrender']
+    values = CARD_VALUES
+    # 手牌以 hand_index 的狀態表示;爆牌狀態的點數 BUST_TOTAL 即 BUST
+    rank_next = hand_index.RANK_NEXT
+    totals = hand_index.TOTAL
+    soft = hand_index.SOFT
+    bust = hand_index.BUST_STATE
+
+    def play_out(state, dealer_up, decide, pop, action, allow_double):
+        # 回傳 (最終點數或 BUST, 下注倍數)
+        while True:
+            if action == 'D':
+                if allow_double:
+                    return totals[rank_next[state * 13 + pop()]], 2
+                action = 'S' if soft[state] and totals[state] >= 18 else 'H'
+            if action == 'S':
+                return totals[state], 1
+            state = rank_next[state * 13 + pop()]
+            if state == bust:
+                return BUST, 1
+            allow_double = False
+            action = decide(totals[state], soft[state] == 1, dealer_up, 0)
+
+    def play_seat(c1, c2, dealer_up, decide, pop):
+        p_state = rank_next[rank_next[c1] * 13 + c2]
+        p_total = totals[p_state]
+        p_soft = soft[p_state] == 1
+        pair = 0
+        if can_split and values[c1] == values[c2]:
+            pair = 1 if c1 == 0 else values[c1]
+        action = decide(p_total, p_soft, dealer_up, pair)
+
+        if action == 'R':
+            if can_surrender:
+                return None
+            action = 'H'
+
+        if action == 'P' and pair:
+            hands = []
+            for card in (c1, c2):
+                state = rank_next[rank_next[card] * 13 + pop()]
+                if card == 0:
+                    hands.append((totals[state], 1))    # 分開的 A 各只能再拿一張牌
+                else:
+                    hands.append(play_out(state, dealer_up, decide, pop,
+                                          decide(totals[state], soft[state] == 1, dealer_up, 0),
+                                          can_double))
+            return hands
+
+        if action == 'P':
+            action = decide(p_total, p_soft, dealer_up, 0)
+        return [play_out(p_state, dealer_up, decide, pop, action, can_double)]
+
+    return play_seat
+
+
+def settle(result, payouts):
+    """
+    將 make_hand_player 的結果換算成輸贏 (以下注單位計)
+
+    參數:
+        result: (結果代碼, 倍數[, 結果代碼, 倍數])
+        payouts: 規則的 'payouts'
+    """
+    if len(result) == 2:
+        return payouts[result[0]] * result[1]
+    return payouts[result[0]] * result[1] + payouts[result[2]] * result[3]
+
+
+# ======== 多座位牌桌 ========
+
+def make_round_player(rules):
+    """
+    依規則產生多座位的單輪函數: 所有座位共用同一副牌與同一次莊家補牌
+
+    參數:
+        rules: table_rules.create_rules() 建立的規則字典
+
+    回傳:
+        play_round(shoe, strategies) -> 每個座位的結果 tuple 列表 (格式同 make_hand_player)
+
+    功能說明:
+        - 發牌順序延伸 initial_deal: 每個座位依序拿兩張,接著莊家兩張
+        - 所有座位依序行動完,莊家只補牌一次,再一次結算所有座位
+        - 所有座位都爆牌、投降或 Blackjack 時莊家不補牌
+        - 只有一個座位時,結果 (以及用掉的牌) 與 make_hand_player 完全相同
+    """
+    settlement = rules['settlement']
+    peek = rules['dealer_peek']
+    use_table = rules['double'] or rules['split'] or rules['surrender']
+    values = CARD_VALUES
+    dealer_result = _make_dealer_player(rules)
+    play_seat = _make_seat_player(rules)
+    rank_next = hand_index.RANK_NEXT
+    natural = hand_index.BLACKJACK
+    totals = hand_index.TOTAL
+
+    def play_round(shoe, strategies):
+        pop = shoe.pop
+        seats = [(pop(), pop()) for _ in strategies]
+        d_up = pop()
+        d_state = rank_next[rank_next[d_up] * 13 + pop()]
+        dealer_code = NATURAL if natural[d_state] else None
+        dealer_up = values[d_up]
+
+        results = [None] * len(seats)
+        pending = []
+        live = False
+        for i, ((c1, c2), strategy) in enumerate(zip(seats, strategies)):
+            if values[c1] + values[c2] == 21:
+                results[i] = (settlement[NATURAL * SETTLE_SIZE + (dealer_code or totals[d_state])], 1)
+            elif peek and dealer_code:
+                results[i] = (OUTCOME_LOSE, 1)
+            else:
+                hands = play_seat(c1, c2, dealer_up, _decider(strategy, use_table), pop)
+                if hands is None:
+                    results[i] = (OUTCOME_SURRENDER, 1)
+                else:
+                    pending.append((i, hands))
+                    live = live or any(final != BUST for final, _ in hands)
+
+        if live and dealer_code is None:
+            dealer_code = dealer_result(d_state, pop)
+        for i, hands in pending:
+            results[i] = _settle_hands(settlement, hands, dealer_code)
+        return results
+
+    return play_round
+
+
+def settle_round(results, bets, payouts):
+    """
+    多座位結算: 回傳每個座位的輸贏金額 (下注金額 * settle())
+    """
+    return [settle(result, payouts) * bet for result, bet in zip(results, bets)]
+
+
+def simulate_table(rounds, strategies, bets=None, rules=PYGAME_RULES, seed=None, shoes=None):
+    """
+    模擬多座位牌桌
+
+    參數:
+        rounds: 模擬輪數
+        strategies: 每個座位的策略 (座位數 = len(strategies),最多 MAX_SEATS)
+        bets: 每個座位的下注金額 (預設皆為最低下注)
+        rules: 規則字典
+        seed: 亂數種子
+        shoes: 洗好的牌序串流 (預設為 shoe_gen.shoe_stream);每輪使用一副新洗好的牌
+
+    回傳:
+        dict:
+            'rounds'  實際模擬的輪數
+            'seats'   每個座位的 {'outcomes': 各結果次數, 'net': 淨輸贏, 'wagered': 總下注, 'ev': 每單位下注的 EV}
+
+    功能說明:
+        - 每輪只洗一次牌、莊家只補一次牌,成本由所有座位分攤
+        - 牌可能不夠整輪使用時 (例如單副牌坐滿 7 人),先接上下一副新洗的牌
+    """
+    n = len(strategies)
+    if not 1 <= n <= MAX_SEATS:
+        raise ValueError(f"座位數必須介於 1~{MAX_SEATS}")
+    if bets is None:
+        bets = [rules['min_bet']] * n
+    if len(bets) != n:
+        raise ValueError("每個座位都要有下注金額")
+    if any(bet < rules['min_bet'] for bet in bets):
+        raise ValueError(f"下注金額不得低於${rules['min_bet']}")
+    if shoes is None:
+        shoes = shoe_stream(rules['num_decks'], seed=seed)
+    shoes = iter(shoes)
+
+    play_round = make_round_player(rules)
+    payouts = rules['payouts']
+    reserve = ROUND_CARDS_PER_HAND * (n + 1)
+    counts = [[0] * len(OUTCOME_NAMES) for _ in range(n)]
+    net = [0.0] * n
+    played = 0
+
+    for shoe in islice(shoes, rounds):
+        while len(shoe) < reserve:
+            extra = next(shoes, None)
+            if extra is None:
+                break
+            shoe[:0] = extra
+        results = play_round(shoe, strategies)
+        for i, (result, won) in enumerate(zip(results, settle_round(results, bets, payouts))):
+            counts[i][result[0]] += 1
+            net[i] += won
+        played += 1
+
+    seats = []
+    for i in range(n):
+        wagered = bets[i] * played
+        seats.append({'outcomes': counts[i], 'net': net[i], 'wagered': wagered,
+                      'ev': net[i] / wagered if wagered else 0.0})
+    return {'rounds': played, 'seats': seats}
+
+
+def format_table_report(result, names=None):
+    """
+    將 simulate_table 的結果整理成文字報告
+    """
+    lines = ["=" * 50, f"模擬輪數: {result['rounds']}  座位數: {len(result['seats'])}"]
+    for i, seat in enumerate(result['seats']):
+        label = names[i] if names else f"座位 {i + 1}"
+        total = sum(seat['outcomes']) or 1
+        rates = ", ".join(f"{name} {c / total:.2%}"
+                          for name, c in zip(OUTCOME_NAMES, seat['outcomes']))
+        lines.append(f"{label}: EV {seat['ev']:+.4f}  淨輸贏 ${seat['net']:.0f}  ({rates})")
+    lines.append("=" * 50)
+    return "\n".join(lines)
+
+
+def estimate_outcome_probabilities(hands=100000, strategy=dealer_mimic_strategy, seed=None,
+                                   shoes=None, rules=None):
+    """
+    以蒙地卡羅模擬估計單局結果的機率分布
+
+    參數:
+        hands: 模擬局數
+        strategy: 玩家策略
+        seed: 亂數種子
+        shoes: 洗好的牌序串流 (預設為 shoe_gen.shoe_stream)
+        rules: 規則字典 (預設為 play_hand 的規則)
+
+    回傳:
+        機率列表,順序同 OUTCOME_NAMES
+
+    功能說明:
+        - 與 play_game 相同,每局都使用一副新洗好的牌
+        - 牌序串流是空的 (沒有模擬任何一局) 時丟出 ValueError
+    """
+    num_decks = rules['num_decks'] if rules else 1
+    if shoes is None:
+        shoes = shoe_stream(num_decks, seed=seed)
+    counts = [0] * len(OUTCOME_NAMES)
+    played = 0
+    if rules is None:
+        for shoe in islice(shoes, hands):
+            counts[play_hand(shoe, strategy)] += 1
+            played += 1
+    else:
+        play = make_hand_player(rules)
+        for shoe in islice(shoes, hands):
+            counts[play(shoe, strategy)[0]] += 1
+            played += 1
+    if played == 0:
+        raise ValueError("沒有可模擬的牌局 (局數為 0 或牌序已用完)")
+    return [c / played for c in counts]
+
+
+def cached_outcome_probabilities(strategy, rules, hands=100000, seed=None, cache=None):
+    """
+    estimate_outcome_probabilities 的快取版本
+
+    參數:
+        strategy / rules / hands / seed: 見 estimate_outcome_probabilities
+        cache: artifact_cache 的快取物件 (預設為 default_cache())
+
+    功能說明:
+        - 沒有指定 seed 時結果是隨機的,不使用快取
+        - 鍵包含策略內容、規則、局數、種子,以及模擬相關模組的原始碼版本;
+          策略函數以 compile_strategy 編譯後的表當作內容 (必須是不帶狀態的純函數)
+    """
+    compute = lambda: estimate_outcome_probabilities(hands, strategy, seed, rules=rules)
+    if seed is None:
+        return compute()
+    if cache is None:
+        cache = artifact_cache.default_cache()
+    # 以策略表內容當作鍵: 策略函數先編譯成表 (同名的 lambda / 內部函數不會共用快取)
+    actions = getattr(strategy, 'actions', None)
+    if actions is None:
+        actions = compile_strategy(strategy).actions
+    inputs = {
+        'strategy': bytes(actions).hex(),
+        'rules': rules_settings(rules),
+        'hands': hands,
+        'seed': seed,
+        'numpy': np is not None,    # 有無 numpy 時,同一種子產生的牌序不同
+    }
+    return cache.get_or_compute('outcome_probabilities', inputs, compute,
+                                code=[sys.modules[__name__], table_rules, shoe_gen])
+
+
+def estimate_ev(target_half_width=0.005, batch_size=10000, max_hands=10000000,
+                strategy=dealer_mimic_strategy, rules=PYGAME_RULES, seed=None,
+                confidence=0.95, progress=None, shoes=None):
+    """
+    逐批模擬直到 EV 的信賴區間夠窄為止
+
+    參數:
+        target_half_width: 信賴區間半寬的目標 (以下注單位計,0.005 = ±0.5%)
+        batch_size: 每批局數
+        max_hands: 最多模擬幾局 (未收斂也會停止)
+        strategy: 玩家策略
+        rules: 規則字典 (table_rules.create_rules)
+        seed: 亂數種子
+        confidence: 信心水準
+        progress: 每批結束後呼叫的函數 progress(stats, force),例如 sim_stats.ProgressReporter();
+                  每批以 force=False 呼叫,結束時再以 force=True 呼叫一次 (要求一定輸出)
+        shoes: 洗好的牌序串流 (預設為 shoe_gen.shoe_stream;用完時停止)
+
+    回傳:
+        sim_stats.SimulationStats
+    """
+    from sim_stats import SimulationStats
+
+    if shoes is None:
+        shoes = shoe_stream(rules['num_decks'], seed=seed)
+    play = make_hand_player(rules)
+    payouts = rules['payouts']
+    stats = SimulationStats(OUTCOME_NAMES, confidence)
+
+    while stats.hands < max_hands:
+        n = min(batch_size, max_hands - stats.hands)
+        results = [play(shoe, strategy) for shoe in islice(shoes, n)]
+        if not results:
+            break
+        stats.update_batch([settle(r, payouts) for r in results], [r[0] for r in results])
+        if progress is not None:
+            progress(stats, force=False)
+        if stats.converged(target_half_width):
+            break
+
+    if progress is not None:
+        progress(stats, force=True)
+    return stats
+
+
+# ======== 資金模擬 ========
+
+def payout_table(blackjack_payout):
+    """
+    每種結果代碼對應的輸贏倍數;blackjack 以 int(bet * 倍數) 計算
+    """
+    return list(create_rules(blackjack_payout=blackjack_payout)['payouts'])
+
+
+def _simulate_numpy(probs, sessions, hands, bet, min_bet, subsidy, start, payouts, rng):
+    money = np.full(sessions, start, dtype=np.int64)
+    bust_hand = np.full(sessions, -1, dtype=np.int64)
+    subsidies = 0
+    outcome_values = np.array(payouts)
+    cum = np.cumsum(probs)
+    cum[-1] = 1.0
+
+    for hand in range(hands):
+        # check_bankruptcy: 金額 <= 0 時補助
+        broke = money <= 0
+        n_broke = int(np.count_nonzero(broke))
+        if n_broke:
+            subsidies += n_broke
+            money[broke] = subsidy
+
+        # get_bet_amount: 下注至少 min_bet、不超過持有金額;不足 min_bet 的玩家無法下注
+        wager = np.where(money >= min_bet, np.minimum(bet, money), 0)
+        outcome = np.searchsorted(cum, rng.random(sessions), side='right')
+        money += (wager * outcome_values[outcome]).astype(np.int64)
+
+        newly_bust = (money < min_bet) & (bust_hand < 0)
+        bust_hand[newly_bust] = hand + 1
+
+    return money, bust_hand, subsidies
+
+
+def _simulate_python(probs, sessions, hands, bet, min_bet, subsidy, start, payouts, rng):
+    money = [start] * sessions
+    bust_hand = [-1] * sessions
+    subsidies = 0
+    outcomes = range(len(probs))
+
+    for i in range(sessions):
+        m = start
+        first_bust = -1
+        for hand, outcome in enumerate(rng.choices(outcomes, weights=probs, k=hands), 1):
+            if m <= 0:
+                subsidies += 1
+                m = subsidy
+            if m < min_bet:
+                continue
+            wager = min(bet, m)
+            m += int(wager * payouts[outcome])
+            if m < min_bet and first_bust < 0:
+                first_bust = hand
+        money[i] = m
+        bust_hand[i] = first_bust
+
+    return money, bust_hand, subsidies
+
+
+def simulate_bankrolls(sessions=10000, hands=1000, bet=MIN_BET, start=STARTING_MONEY,
+                       blackjack_payout=1.5, probs=None, seed=None, rules=None):
+    """
+    同時模擬大量玩家的資金變化
+
+    參數:
+        sessions: 玩家 (場次) 數量
+        hands: 每位玩家玩幾局
+        bet: 每局下注金額 (不得低於最低下注;持有金額不足時押上全部,
+             但與前端相同,不足最低下注時無法下注,只有金額 <= 0 才補助)
+        start: 起始金額 (新玩家為 $100)
+        blackjack_payout: Blackjack 賠率 (1.0 = blackjack.py 的平賠, 1.5 = pygame 版的 3:2)
+        probs: 單局結果機率 (預設以 estimate_outcome_probabilities 估計;
+               只計結果代碼,加倍/分牌的倍數不列入)
+        seed: 亂數種子
+        rules: 規則字典;提供時以其莊家規則估計機率,並使用其 Blackjack 賠率與最低下注
+
+    回傳:
+        統計結果 dict:
+            'risk_of_ruin'            至少破產一次 (持有金額不足最低下注) 的比例
+            'subsidy_per_1000_hands'  每千局平均的補助金額
+            'bust_hands'              每位玩家第一次破產時的局數 (-1 表示沒有破產)
+            'final_money'             每位玩家最後的持有金額
+    """
+    min_bet = MIN_BET
+    subsidy = BANKRUPTCY_SUBSIDY
+    if rules is not None:
+        blackjack_payout = rules['blackjack_payout']
+        min_bet = rules['min_bet']
+        subsidy = bankruptcy_subsidy(rules)
+    if sessions < 1 or hands < 1:
+        raise ValueError("場數與局數至少為 1")
+    if bet < min_bet:
+        raise ValueError(f"下注金額不得低於${min_bet}")
+    if probs is None:
+        probs = estimate_outcome_probabilities(seed=seed, rules=rules)
+    payouts = payout_table(blackjack_payout)
+
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        money, bust_hand, subsidies = _simulate_numpy(probs, sessions, hands, bet, min_bet, subsidy,
+                                                    start, payouts, rng)
+        ruined = int(np.count_nonzero(bust_hand >= 0))
+    else:
+        rng = random.Random(seed)
+        money, bust_hand, subsidies = _simulate_python(probs, sessions, hands, bet, min_bet, subsidy,
+                                                     start, payouts, rng)
+        ruined = sum(1 for h in bust_hand if h >= 0)
+
+    return {
+        'sessions': sessions,
+        'hands': hands,
+        'bet': bet,
+        'blackjack_payout': blackjack_payout,
+        'probs': list(probs),
+        'risk_of_ruin': ruined / sessions,
+        'subsidies': subsidies,
+        'subsidy_per_1000_hands': subsidies * subsidy * 1000 / (sessions * hands),
+        'bust_hands': bust_hand,
+        'final_money': money,
+    }
+
+
+def percentile(values, q):
+    """
+    計算百分位數 (q 介於 0~100),不需要 numpy
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def format_report(result):
+    """
+    將 simulate_bankrolls 的結果整理成文字報告
+    """
+    lines = [
+        "=" * 50,
+        f"模擬場次: {result['sessions']}  每場局數: {result['hands']}  每局下注: ${result['bet']}",
+        "單局結果機率: " + ", ".join(
+            f"{name} {p:.2%}" for name, p in zip(OUTCOME_NAMES, result['probs'])),
+        f"破產機率 (risk of ruin): {result['risk_of_ruin']:.2%}",
+        f"補助成本: 每千局 ${result['subsidy_per_1000_hands']:.2f}",
+    ]
+    busts = [int(h) for h in result['bust_hands'] if h >= 0]
+    if busts:
+        lines.append("第一次破產的局數: " + ", ".join(
+            f"P{q} {percentile(busts, q):.0f}" for q in (10, 25, 50, 75, 90)))
+    final = [int(m) for m in result['final_money']]
+    lines.append(f"最終金額中位數: ${percentile(final, 50):.0f}")
+    lines.append("=" * 50)
+    return "\n".join(lines)
+
+
+def format_dealer_table(distributions, rules):
+    """
+    將 table_rules.dealer_distributions 的結果整理成表格 (每個明牌一列)
+    """
+    columns = list(range(table_rules.DEALER_STAND, 22)) + [NATURAL, BUST]
+    labels = [str(total) for total in columns[:-2]] + ['BJ', '爆牌']
+    rule = 'H17' if rules['dealer_hits_soft_17'] else 'S17'
+    lines = [f"莊家最終點數機率 (無限副牌, {rule})",
+             "明牌" + "".join(f"{label:>8}" for label in labels)]
+    for up in sorted(distributions):
+        dist = distributions[up]
+        name = 'A' if up == 11 else str(up)
+        lines.append(f"{name:>4}" + "".join(f"{dist[key]:>8.2%}" for key in columns))
+    return "\n".join(lines)
+
+
+# ======== 指令列介面 ========
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Blackjack 資金模擬")
+    parser.add_argument('--sessions', type=int, default=10000, help="模擬的玩家數")
+    parser.add_argument('--hands', type=int, default=1000, help="每位玩家的局數")
+    parser.add_argument('--bet', type=int, default=MIN_BET, help="每局下注金額")
+    parser.add_argument('--start', type=int, default=STARTING_MONEY, help="起始金額")
+    parser.add_argument('--strategy', default='mimic',
+                        help="玩家策略 (mimic / never_bust / basic / chart / *.bjs)")
+    parser.add_argument('--seed', type=int, default=None, help="亂數種子")
+    parser.add_argument('--ev-target', type=float, default=None,
+                        help="改為估計單局 EV,直到信賴區間半寬小於此值")
+    parser.add_argument('--shoe-file', default=None,
+                        help="估計 EV 時使用 shoe_gen.py 產生的牌序檔")
+    parser.add_argument('--seats', type=int, default=None,
+                        help="改為模擬多座位牌桌 (所有座位使用同一策略與下注金額)")
+    parser.add_argument('--rounds', type=int, default=100000, help="多座位牌桌的模擬輪數")
+    parser.add_argument('--dealer-table', action='store_true',
+                        help="改為顯示各明牌的莊家最終點數機率 (精確計算,不模擬)")
+    add_rules_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.sessions < 1 or args.hands < 1:
+        parser.error("場數與局數至少為 1")
+
+    try:
+        rules = rules_from_args(args)
+        strategy = resolve_strategy(args.strategy, rules)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if args.dealer_table:
+        print(format_dealer_table(table_rules.dealer_distributions(rules), rules))
+        return 0
+
+    print(f"規則: {describe_rules(rules)}")
+
+    if args.ev_target is not None:
+        from sim_stats import ProgressReporter
+        try:
+            shoe_file = ShoeFile(args.shoe_file, rules['num_decks']) if args.shoe_file else None
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        try:
+            stats = estimate_ev(args.ev_target, strategy=strategy, rules=rules,
+                                seed=args.seed, progress=ProgressReporter(),
+                                shoes=shoe_file.stream() if shoe_file else None)
+        finally:
+            if shoe_file:
+                shoe_file.close()
+        print(stats.summary())
+        return 0
+
+    if args.seats is not None:
+        try:
+            result = simulate_table(args.rounds, [strategy] * args.seats,
+                                    [args.bet] * args.seats, rules, args.seed)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(format_table_report(result))
+        return 0
+
+    try:
+        probs = cached_outcome_probabilities(strategy, rules, seed=args.seed)
+        result = simulate_bankrolls(args.sessions, args.hands, args.bet, args.start,
+                                    probs=probs, seed=args.seed, rules=rules)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(format_report(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
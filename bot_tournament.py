@@ -0,0 +1,651 @@
+"""
+機器人錦標賽: 大量下注 / 打法策略以相同的牌序互相比較
+
+每位參賽者 (entrant) 是「打法策略 + 下注策略」的組合,例如 "chart,martingale:160"。
+資金規則與兩個前端相同:
+    - 起始金額 $100 (get_or_create_player)
+    - 下注至少為最低下注、不超過持有金額 (get_bet_amount);持有金額不足最低下注時無法下注
+    - 金額 <= 0 時,下一局開始前補助到最低下注 (check_bankruptcy / bankruptcy_subsidy)
+前端沒有加倍/分牌;規則允許時,這一局加倍/分牌最多可能輸掉的金額超過持有金額,
+就不加倍也不分牌,所以金額不會變成負數。
+
+公平性: 每一場 (session) 由固定的種子產生牌序,所有參賽者在同一場中拿到完全相同的
+一串牌 (每局一副新洗好的牌,同 strategy_compare 的共同亂數);打法不同用掉的牌數
+不同,但不會影響下一局。
+
+賽制:
+    - roundrobin: 所有參賽者打相同的 sessions 場,每一場兩兩比較最後金額
+                  (贏 1 分、平手 0.5 分),以得分率排名
+    - bracket:    單淘汰;每輪所有存活者打新的 sessions 場,依序兩兩對戰,
+                  贏得較多場的晉級 (奇數人時最後一位輪空),直到剩下一位
+
+每位參賽者的每一場是一個工作,以 multiprocessing.Pool 分配到所有 CPU。
+同一場的工作連續排列,每個工作行程只需為每一場產生一次牌序。
+進度定時寫入 JSON 檢查點 (先寫 .tmp 再 os.replace),中斷後以相同的
+--checkpoint 重新執行即從上次的進度繼續;每輪結束時印出排名,並把前幾名
+寫入共享記憶體記分板 (scoreboard.py) 的排行榜。
+
+參賽者格式 "打法[,下注[:參數]]":
+    打法: blackjack_sim.resolve_strategy 接受的名稱 (mimic / never_bust / basic / chart / *.bjs)
+    下注: flat:金額 (預設 $10)、percent:百分比、martingale:上限 (輸了加倍,0 = 不設上限)、
+          paroli:次數 (贏了加倍,連贏幾次後回到最低下注)
+
+指令列用法:
+    python bot_tournament.py --grid --sessions 50 --hands 1000
+    python bot_tournament.py --entrant basic,flat --entrant chart,martingale:160 --format bracket
+    python bot_tournament.py --entrants bots.txt --checkpoint tour.json
+"""
+import json
+import os
+import sys
+import time
+
+from blackjack_sim import STARTING_MONEY, STRATEGIES, make_hand_player, resolve_strategy, settle
+from shoe_gen import RANK_TABLE, generate_shoes
+from table_rules import (PYGAME_RULES, bankruptcy_subsidy, create_rules, describe_rules,
+                         rules_settings)
+
+FORMATS = ('roundrobin', 'bracket')
+STATE_VERSION = 1
+
+# 寫入記分板時名字的前綴 (與真人玩家區分)
+BOT_PREFIX = 'bot:'
+
+
+# ======== 下注策略 ========
+
+def flat_betting(amount, min_bet):
+    # 每局固定金額
+    def next_bet(money, last):
+        return amount
+
+    return next_bet
+
+
+def percent_betting(percent, min_bet):
+    # 持有金額的固定比例 (以最低下注為單位無條件捨去)
+    def next_bet(money, last):
+        return int(money * percent / 100) // min_bet * min_bet
+
+    return next_bet
+
+
+def martingale_betting(cap, min_bet):
+    # 輸了加倍,贏了回到最低下注;超過上限 (0 = 不設上限) 時也回到最低下注
+    bet = min_bet
+
+    def next_bet(money, last):
+        nonlocal bet
+        if last < 0:
+            bet *= 2
+        elif last > 0:
+            bet = min_bet
+        if cap and bet > cap:
+            bet = min_bet
+        return bet
+
+    return next_bet
+
+
+def paroli_betting(steps, min_bet):
+    # 贏了加倍,連贏 steps 次或輸了就回到最低下注
+    bet = min_bet
+    streak = 0
+
+    def next_bet(money, last):
+        nonlocal bet, streak
+        if last > 0 and streak < steps:
+            bet *= 2
+            streak += 1
+        elif last != 0:
+            bet = min_bet
+            streak = 0
+        return bet
+
+    return next_bet
+
+
+# 名稱 -> (下注策略, 預設參數)
+BETTING = {
+    'flat': (flat_betting, 10),
+    'percent': (percent_betting, 10),
+    'martingale': (martingale_betting, 0),
+    'paroli': (paroli_betting, 3),
+}
+
+
+def parse_entrant(text):
+    """
+    解析參賽者描述 "打法[,下注[:參數]]",例如 "basic" 或 "chart,percent:20"
+
+    回傳:
+        (打法名稱, 下注策略名稱, 參數)
+    """
+    strategy, _, betting = text.strip().partition(',')
+    kind, _, param = (betting.strip() or 'flat').partition(':')
+    if not strategy:
+        raise ValueError(f"參賽者缺少打法: {text}")
+    if kind not in BETTING:
+        raise ValueError(f"未知的下注策略: {kind} (可用: {', '.join(BETTING)})")
+    try:
+        value = int(param) if param else BETTING[kind][1]
+    except ValueError:
+        raise ValueError(f"下注參數不是數字: {param}") from None
+    return strategy.strip(), kind, value
+
+
+def grid_entrants():
+    """
+    內建的參賽者組合: 每種打法 x (固定金額、比例、馬丁格爾上限、Paroli 次數)
+    """
+    bettings = ([f'flat:{amount}' for amount in range(10, 210, 10)]
+                + [f'percent:{percent}' for percent in range(5, 105, 5)]
+                + [f'martingale:{cap}' for cap in (0, 40, 80, 160, 320, 640)]
+                + [f'paroli:{steps}' for steps in range(1, 6)])
+    return [f'{strategy},{betting}' for strategy in list(STRATEGIES) + ['chart']
+            for betting in bettings]
+
+
+# ======== 單場模擬 ========
+
+def session_players(rules):
+    """
+    一場所需的單局函數
+
+    回傳:
+        (依規則的 play, 不加倍也不分牌的 play);規則本來就不能加倍/分牌時後者為 None
+    """
+    play = make_hand_player(rules)
+    if not (rules['double'] or rules['split']):
+        return play, None
+    settings = dict(rules_settings(rules), double=False, split=False)
+    return play, make_hand_player(create_rules(**settings))
+
+
+def play_session(strategy, next_bet, shoes, rules, players=None):
+    """
+    一位參賽者打完一場
+
+    參數:
+        strategy: 打法 (策略函數或 CompiledStrategy)
+        next_bet: 下注策略 next_bet(持有金額, 上一局輸贏) -> 下注金額 (每場要新建一個)
+        shoes: 每局的牌序 (點數索引的 bytes;每局複製成列表,不會被修改)
+        rules: 規則字典
+        players: session_players(rules) 的結果 (重複使用時傳入以省去建立成本)
+
+    回傳:
+        [最後金額, 補助次數, 總下注, 贏的局數]
+    """
+    if players is None:
+        players = session_players(rules)
+    play, capped = players
+    if capped is not None:
+        # 加倍與分牌 (可再加倍) 最多讓一局的輸贏變成幾倍下注
+        exposure = (2 if rules['double'] else 1) * (2 if rules['split'] else 1)
+        allowed = rules['actions'].replace('D', '').replace('P', '')
+        restricted = getattr(strategy, 'restricted', None)
+        capped_strategy = restricted(allowed) if restricted else strategy
+    payouts = rules['payouts']
+    min_bet = rules['min_bet']
+    subsidy = bankruptcy_subsidy(rules)
+    money = STARTING_MONEY
+    subsidies = wagered = wins = last = 0
+
+    for ranks in shoes:
+        # check_bankruptcy
+        if money <= 0:
+            subsidies += 1
+            money = subsidy
+        # get_bet_amount: 不足最低下注時無法下注
+        if money < min_bet:
+            continue
+        bet = min(max(next_bet(money, last), min_bet), money)
+        if capped is not None and bet * exposure > money:
+            result = capped(list(ranks), capped_strategy)
+        else:
+            result = play(list(ranks), strategy)
+        last = int(settle(result, payouts) * bet)
+        money += last
+        wagered += bet
+        if last > 0:
+            wins += 1
+    return [money, subsidies, wagered, wins]
+
+
+def session_seed(state, session):
+    # 每一輪、每一場有各自的種子 (同一輪所有參賽者相同)
+    return state['seed'] + state['round'] * state['sessions'] + session
+
+
+def session_shoes(seed, hands, num_decks):
+    """
+    一場的所有牌序 (點數索引的 bytes 列表)
+    """
+    return [bytes(shoe).translate(RANK_TABLE)
+            for shoe in generate_shoes(hands, num_decks, seed=seed)]
+
+
+# ======== 工作行程 ========
+
+_worker = {}
+
+
+def _init_worker(settings, entrants):
+    rules = create_rules(**settings)
+    _worker.update(rules=rules, players=session_players(rules), entrants=entrants, strategies={},
+                   shoes=(None, None))
+
+
+def _run_job(job):
+    entrant, session, seed, hands = job
+    rules = _worker['rules']
+
+    cached_seed, shoes = _worker['shoes']
+    if cached_seed != seed:
+        shoes = session_shoes(seed, hands, rules['num_decks'])
+        _worker['shoes'] = (seed, shoes)
+
+    strategy_name, kind, param = parse_entrant(_worker['entrants'][entrant])
+    strategy = _worker['strategies'].get(strategy_name)
+    if strategy is None:
+        strategy = _worker['strategies'][strategy_name] = resolve_strategy(strategy_name, rules)
+    next_bet = BETTING[kind][0](param, rules['min_bet'])
+    return entrant, session, play_session(strategy, next_bet, shoes, rules, _worker['players'])
+
+
+# ======== 錦標賽狀態 ========
+
+def create_tournament(entrants, tournament_format='roundrobin', sessions=20, hands=1000,
+                      rules=PYGAME_RULES, seed=None):
+    """
+    建立錦標賽狀態 (可直接寫成 JSON 檢查點)
+
+    參數:
+        entrants: 參賽者描述列表 (見 parse_entrant)
+        tournament_format: 'roundrobin' 或 'bracket'
+        sessions: 每輪每位參賽者打幾場
+        hands: 每場幾局
+        rules: 規則字典
+        seed: 亂數種子 (None 表示隨機)
+    """
+    if tournament_format not in FORMATS:
+        raise ValueError(f"未知的賽制: {tournament_format} (可用: {', '.join(FORMATS)})")
+    if len(entrants) < 2:
+        raise ValueError("至少要兩位參賽者")
+    if len(set(entrants)) != len(entrants):
+        raise ValueError("參賽者重複")
+    if sessions < 1 or hands < 1:
+        raise ValueError("場數與局數至少為 1")
+    for text in entrants:
+        parse_entrant(text)
+    if seed is None:
+        seed = int.from_bytes(os.urandom(4), 'little')
+    return {
+        'version': STATE_VERSION,
+        'format': tournament_format,
+        'entrants': list(entrants),
+        'rules': rules_settings(rules),
+        'seed': seed,
+        'sessions': sessions,
+        'hands': hands,
+        'round': 0,
+        'alive': list(range(len(entrants))),
+        'results': {},          # 本輪: 參賽者編號 (字串) -> 每場的結果 (未完成為 None)
+        'summary': [None] * len(entrants),
+        'matches': [],          # bracket: [輪, 甲, 乙, 甲得分, 乙得分, 晉級者]
+        'finished': False,
+    }
+
+
+def save_state(state, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def load_state(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        state = json.load(file)
+    if state.get('version') != STATE_VERSION:
+        raise ValueError(f"{path} 不是錦標賽檢查點")
+    return state
+
+
+def _round_results(state):
+    results = state['results']
+    for entrant in state['alive']:
+        results.setdefault(str(entrant), [None] * state['sessions'])
+    return results
+
+
+def pending_jobs(state):
+    """
+    本輪尚未完成的工作 (同一場的工作排在一起)
+    """
+    results = _round_results(state)
+    return [(entrant, session, session_seed(state, session), state['hands'])
+            for session in range(state['sessions'])
+            for entrant in state['alive']
+            if results[str(entrant)][session] is None]
+
+
+def _summarize(state, entrant, points):
+    rows = state['results'][str(entrant)]
+    return {
+        'round': state['round'],
+        'points': points,
+        'mean_money': sum(row[0] for row in rows) / len(rows),
+        'subsidies': sum(row[1] for row in rows),
+        'wagered': sum(row[2] for row in rows),
+        'wins': sum(row[3] for row in rows),
+        'hands': len(rows) * state['hands'],
+    }
+
+
+def round_robin_points(state):
+    """
+    每位存活者的兩兩比較得分率: 每一場與其他所有人比最後金額 (贏 1、平 0.5)
+    """
+    import bisect
+
+    alive = state['alive']
+    results = state['results']
+    points = dict.fromkeys(alive, 0.0)
+    for session in range(state['sessions']):
+        money = {entrant: results[str(entrant)][session][0] for entrant in alive}
+        ordered = sorted(money.values())
+        for entrant, value in money.items():
+            below = bisect.bisect_left(ordered, value)
+            equal = bisect.bisect_right(ordered, value) - below
+            points[entrant] += below + 0.5 * (equal - 1)
+    games = state['sessions'] * (len(alive) - 1)
+    return {entrant: value / games for entrant, value in points.items()}
+
+
+def head_to_head(state, a, b):
+    """
+    兩位參賽者在本輪各場的比分 (贏 1、平 0.5)
+    """
+    score_a = score_b = 0.0
+    for row_a, row_b in zip(state['results'][str(a)], state['results'][str(b)]):
+        if row_a[0] > row_b[0]:
+            score_a += 1
+        elif row_a[0] < row_b[0]:
+            score_b += 1
+        else:
+            score_a += 0.5
+            score_b += 0.5
+    return score_a, score_b
+
+
+def finish_round(state):
+    """
+    本輪所有工作完成後: 計分、淘汰、進入下一輪 (或結束)
+    """
+    alive = state['alive']
+    if state['format'] == 'roundrobin':
+        for entrant, share in round_robin_points(state).items():
+            state['summary'][entrant] = _summarize(state, entrant, share)
+        state['finished'] = True
+        return
+
+    winners = []
+    for i in range(0, len(alive) - 1, 2):
+        a, b = alive[i], alive[i + 1]
+        score_a, score_b = head_to_head(state, a, b)
+        state['summary'][a] = _summarize(state, a, score_a / state['sessions'])
+        state['summary'][b] = _summarize(state, b, score_b / state['sessions'])
+        if score_a != score_b:
+            winner = a if score_a > score_b else b
+        else:
+            # 同分時比平均金額,再相同則種子較前者晉級
+            winner = b if state['summary'][b]['mean_money'] > state['summary'][a]['mean_money'] else a
+        state['matches'].append([state['round'], a, b, score_a, score_b, winner])
+        winners.append(winner)
+    if len(alive) % 2:
+        bye = alive[-1]
+        state['summary'][bye] = _summarize(state, bye, 1.0)
+        winners.append(bye)
+
+    state['alive'] = winners
+    state['results'] = {}
+    if len(winners) == 1:
+        state['summary'][winners[0]]['round'] += 1
+        state['finished'] = True
+    else:
+        state['round'] += 1
+
+
+def standings(state):
+    """
+    目前的排名 (dict 列表,名次由高到低)
+
+    功能說明:
+        - roundrobin 依得分率;bracket 依晉級到的輪次,再依該輪得分率與平均金額
+    """
+    rows = []
+    for entrant, summary in enumerate(state['summary']):
+        if summary is not None:
+            rows.append(dict(summary, entrant=entrant, name=state['entrants'][entrant]))
+    rows.sort(key=lambda row: (-row['round'], -row['points'], -row['mean_money'], row['entrant']))
+    return rows
+
+
+def interim_leader(state):
+    """
+    本輪進行中時,已完成場次平均金額最高的參賽者 (名字, 平均金額, 完成場數)
+    """
+    best = None
+    for entrant in state['alive']:
+        done = [row[0] for row in state['results'].get(str(entrant), ()) if row is not None]
+        if done:
+            mean = sum(done) / len(done)
+            if best is None or mean > best[1]:
+                best = (state['entrants'][entrant], mean, len(done))
+    return best
+
+
+# ======== 執行 ========
+
+def run_tournament(state, workers=None, checkpoint=None, checkpoint_interval=10.0,
+                   progress=None, on_round=None):
+    """
+    執行 (或繼續) 錦標賽直到結束
+
+    參數:
+        state: create_tournament() 或 load_state() 的狀態 (會直接更新)
+        workers: 工作行程數 (預設為 CPU 數;1 表示在目前行程執行;小於 1 時丟出 ValueError)
+        checkpoint: 檢查點檔案路徑,每 checkpoint_interval 秒與每輪結束時寫入
+        progress: 定時呼叫的函數 progress(state, done, total, elapsed)
+        on_round: 每輪結束時呼叫的函數 on_round(state)
+
+    回傳:
+        standings(state)
+
+    功能說明:
+        - 中斷 (例如 Ctrl+C) 時先寫入檢查點再丟出例外
+        - 結果只取決於狀態與種子,中斷後繼續與一次跑完的結果完全相同
+    """
+    from multiprocessing import Pool
+
+    if workers is not None and workers < 1:
+        raise ValueError("工作行程數至少為 1")
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    if workers > 1:
+        pool = Pool(workers, initializer=_init_worker, initargs=(state['rules'], state['entrants']))
+    else:
+        _init_worker(state['rules'], state['entrants'])
+
+    try:
+        while not state['finished']:
+            jobs = pending_jobs(state)
+            results = state['results']
+            start = last_save = last_report = time.perf_counter()
+            if pool is not None:
+                chunksize = max(1, min(64, len(jobs) // (workers * 16)))
+                completed = pool.imap_unordered(_run_job, jobs, chunksize)
+            else:
+                completed = map(_run_job, jobs)
+
+            try:
+                for done, (entrant, session, row) in enumerate(completed, 1):
+                    results[str(entrant)][session] = row
+                    now = time.perf_counter()
+                    if progress is not None and now - last_report >= 1.0:
+                        last_report = now
+                        progress(state, done, len(jobs), now - start)
+                    if checkpoint and now - last_save >= checkpoint_interval:
+                        last_save = now
+                        save_state(state, checkpoint)
+            except KeyboardInterrupt:
+                if checkpoint:
+                    save_state(state, checkpoint)
+                raise
+
+            finish_round(state)
+            if checkpoint:
+                save_state(state, checkpoint)
+            if on_round is not None:
+                on_round(state)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return standings(state)
+
+
+def publish_standings(scoreboard, rows, top=10):
+    """
+    把前 top 名寫入記分板 (名字加上 bot: 前綴,金額為平均最後金額)
+
+    功能說明:
+        - 先刪除記分板上其他的 bot: 紀錄 (之前的輪次或之前的錦標賽),
+          機器人最多只佔 top 筆,不會擠掉真人玩家
+        - 記分板只是顯示用,寫入失敗時印出警告,錦標賽照常進行
+
+    回傳:
+        是否寫入成功
+    """
+    names = [BOT_PREFIX + row['name'] for row in rows[:top]]
+    try:
+        scoreboard.prune(BOT_PREFIX, keep=names)
+        for name, row in zip(names, rows):
+            scoreboard.update(name, round(row['mean_money']), row['hands'], row['wins'])
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"排名無法寫入記分板: {e}", file=sys.stderr)
+        return False
+    return True
+
+
+def format_standings(state, rows, top=20):
+    label = '得分率' if state['format'] == 'roundrobin' else '晉級/得分'
+    lines = [f"{'名次':>4}  {'參賽者':<28}{label:>10}{'平均金額':>10}{'補助':>8}{'勝率':>8}"]
+    for rank, row in enumerate(rows[:top], 1):
+        if state['format'] == 'roundrobin':
+            score = f"{row['points']:.1%}"
+        elif row['round'] > state['round']:
+            score = "冠軍"
+        else:
+            score = f"R{row['round'] + 1} {row['points']:.0%}"
+        rate = row['wins'] / row['hands'] if row['hands'] else 0.0
+        lines.append(f"{rank:>4}  {row['name']:<28}{score:>10}{row['mean_money']:>10.1f}"
+                     f"{row['subsidies']:>8}{rate:>8.1%}")
+    return "\n".join(lines)
+
+
+# ======== 指令列介面 ========
+
+def _read_entrants(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith('#')]
+
+
+def main(argv=None):
+    import argparse
+
+    from scoreboard import open_scoreboard
+    from table_rules import add_rules_arguments, rules_from_args
+
+    parser = argparse.ArgumentParser(description="機器人錦標賽")
+    parser.add_argument('--entrant', action='append', default=[], metavar='SPEC',
+                        help="參賽者 \"打法[,下注[:參數]]\",可重複")
+    parser.add_argument('--entrants', metavar='FILE', default=None, help="參賽者檔案 (每行一位)")
+    parser.add_argument('--grid', action='store_true', help="加入內建的參賽者組合")
+    parser.add_argument('--format', choices=FORMATS, default='roundrobin', help="賽制")
+    parser.add_argument('--sessions', type=int, default=20, help="每輪每位參賽者的場數")
+    parser.add_argument('--hands', type=int, default=1000, help="每場局數")
+    parser.add_argument('--seed', type=int, default=None, help="亂數種子")
+    parser.add_argument('--workers', type=int, default=None, help="工作行程數 (預設為 CPU 數)")
+    parser.add_argument('--checkpoint', metavar='FILE', default=None,
+                        help="檢查點檔案;已存在時從檢查點繼續 (忽略其他賽事參數)")
+    parser.add_argument('--top', type=int, default=20, help="顯示前幾名")
+    parser.add_argument('--publish', type=int, default=10, help="寫入記分板的名次數 (0 = 不寫入)")
+    add_rules_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("工作行程數至少為 1")
+
+    try:
+        if args.checkpoint and os.path.exists(args.checkpoint):
+            state = load_state(args.checkpoint)
+            print(f"從檢查點繼續: {args.checkpoint} (第 {state['round'] + 1} 輪)")
+        else:
+            entrants = list(args.entrant)
+            if args.entrants:
+                entrants += _read_entrants(args.entrants)
+            if args.grid:
+                entrants += grid_entrants()
+            rules = rules_from_args(args)
+            state = create_tournament(entrants, args.format, args.sessions, args.hands, rules,
+                                      args.seed)
+        # 先在主行程確認每種打法都能載入 (例如 .bjs 檔案存在)
+        rules = create_rules(**state['rules'])
+        for text in state['entrants']:
+            resolve_strategy(parse_entrant(text)[0], rules)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    scoreboard = open_scoreboard() if args.publish > 0 else None
+    print(f"{len(state['entrants'])} 位參賽者, 賽制 {state['format']}, 每輪 {state['sessions']} 場 x "
+          f"{state['hands']} 局, 種子 {state['seed']}")
+    print(f"規則: {describe_rules(rules)}")
+
+    def progress(state, done, total, elapsed):
+        hands = done * state['hands']
+        line = (f"[進度] 第 {state['round'] + 1} 輪 {done}/{total} 場, "
+                f"{hands / max(elapsed, 1e-9):,.0f} 局/秒")
+        leader = interim_leader(state)
+        if leader is not None:
+            line += f", 目前領先 {leader[0]} (平均 ${leader[1]:.1f}, {leader[2]} 場)"
+        print(line, file=sys.stderr)
+
+    def on_round(state):
+        rows = standings(state)
+        title = "最終排名" if state['finished'] else f"第 {state['round']} 輪結束, 剩 {len(state['alive'])} 位"
+        print("=" * 50)
+        print(title)
+        print(format_standings(state, rows, args.top))
+        if scoreboard is not None:
+            publish_standings(scoreboard, rows, args.publish)
+
+    try:
+        if state['finished']:
+            on_round(state)
+        else:
+            run_tournament(state, args.workers, args.checkpoint, progress=progress,
+                           on_round=on_round)
+    except KeyboardInterrupt:
+        if args.checkpoint:
+            print(f"\n已中斷,進度已寫入 {args.checkpoint}", file=sys.stderr)
+        return 1
+    finally:
+        if scoreboard is not None:
+            scoreboard.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
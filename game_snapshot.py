@@ -0,0 +1,270 @@
+"""
+進行中牌局的快照與還原 (checkpoint)
+
+下注金額要到 game_over / update_game_result 才會寫進 players.txt,牌局進行中
+程式當掉 (或直接關掉視窗) 時,牌、手牌與下注全部消失,等於把一手輸牌退回給玩家。
+本模組把整個牌局狀態壓成一小段二進位資料,在每個動作之後寫入檢查點檔案,
+下次啟動時直接還原到同一個畫面繼續:
+
+    - 狀態 (LOGIN / BETTING / PLAYING / RESULT)、座位數、目前座位、每座位下注
+    - 玩家名字與金額 / 總場數 / 勝場數 (還原時覆蓋讀檔的資料)
+    - 剩下的牌 (牌序即 shoe 位置)、莊家手牌、每個座位的手牌與結果、畫面訊息
+
+每張牌以 1 byte 的牌編號儲存 (同 blackjack_sim.card_to_tuple),一局的快照只有
+數十到數百 bytes,每次都完整寫入: 先寫 .tmp 再 os.replace,任何時候檔案都是
+完整的上一個或下一個版本。不呼叫 fsync,單次寫入約數十微秒;
+程式當掉不會遺失檢查點,但斷電時可能遺失最後一個動作。
+寫入失敗 (磁碟已滿等) 時只印出一次警告,牌局照常進行。
+
+每位玩家在每個前端各有一個檢查點 (<前端>-<名字雜湊>.snap),玩家登入時還原
+自己上次未結束的牌局;同一台電腦上的多個牌桌不會互相覆蓋,也不會還原到別人的牌局。
+檢查點目錄預設為程式所在資料夾的 .checkpoints/,可用環境變數
+BLACKJACK_CHECKPOINT_DIR 改變;BLACKJACK_CHECKPOINT_DIR=off 則停用。
+
+指令列用法:
+    python game_snapshot.py show pygame alice
+    python game_snapshot.py clear cli alice
+"""
+import hashlib
+import os
+import struct
+import sys
+
+from blackjack_sim import card_to_tuple
+
+CHECKPOINT_ENV = 'BLACKJACK_CHECKPOINT_DIR'
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.checkpoints')
+
+# 標頭: magic, 版本, 狀態, 座位數, 目前座位, 每座位下注, 金額, 總場數, 勝場數
+FILE_MAGIC = b'BJSNAP'
+FILE_VERSION = 1
+HEADER = struct.Struct('<6sHBBBxIqqq')
+SECTION = struct.Struct('<H')
+
+STATES = ['LOGIN', 'BETTING', 'PLAYING', 'RESULT']
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+# 座位結果 (BlackjackGame.seat_results): 0 表示尚未結束
+RESULTS = [None, 'Blackjack', 'Player', 'Dealer', 'Tie']
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+CARDS = [card_to_tuple(card_id) for card_id in range(52)]
+CARD_IDS = {card: card_id for card_id, card in enumerate(CARDS)}
+
+
+def _pack_cards(cards):
+    return bytes([CARD_IDS[card] for card in cards])
+
+
+def _unpack_cards(data):
+    return [CARDS[card_id] for card_id in data]
+
+
+def encode_snapshot(snapshot):
+    """
+    將牌局狀態編碼成 bytes
+
+    參數:
+        snapshot: 字典,欄位:
+            state, player, money, total, wins, bet, deck, dealer,
+            hands (每個座位的牌列表), results (每個座位的結果), active_seat, message
+
+    回傳:
+        bytes (標頭 + 各區段,每個區段前面是 2 bytes 的長度)
+    """
+    hands = snapshot['hands']
+    header = HEADER.pack(FILE_MAGIC, FILE_VERSION, STATE_CODES[snapshot['state']], len(hands),
+                         snapshot['active_seat'], snapshot['bet'], snapshot['money'],
+                         snapshot['total'], snapshot['wins'])
+    sections = [snapshot['player'].encode('utf-8'), snapshot['message'].encode('utf-8'),
+                _pack_cards(snapshot['deck']), _pack_cards(snapshot['dealer']),
+                bytes([RESULT_CODES[result] for result in snapshot['results']])]
+    sections.extend(_pack_cards(hand) for hand in hands)
+    parts = [header]
+    for section in sections:
+        parts.append(SECTION.pack(len(section)))
+        parts.append(section)
+    return b''.join(parts)
+
+
+def decode_snapshot(data):
+    """
+    encode_snapshot 的反向操作,格式錯誤時丟出 ValueError
+    """
+    try:
+        (magic, version, state, num_seats, active_seat, bet, money, total,
+         wins) = HEADER.unpack_from(data, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ValueError("不是牌局快照")
+        offset = HEADER.size
+        sections = []
+        for _ in range(5 + num_seats):
+            (length,) = SECTION.unpack_from(data, offset)
+            offset += SECTION.size
+            if offset + length > len(data):
+                raise ValueError("快照不完整")
+            sections.append(data[offset:offset + length])
+            offset += length
+        player, message, deck, dealer, results = sections[:5]
+        return {
+            'state': STATES[state],
+            'player': player.decode('utf-8'),
+            'money': money,
+            'total': total,
+            'wins': wins,
+            'bet': bet,
+            'deck': _unpack_cards(deck),
+            'dealer': _unpack_cards(dealer),
+            'hands': [_unpack_cards(hand) for hand in sections[5:]],
+            'results': [RESULTS[code] for code in results],
+            'active_seat': active_seat,
+            'message': message.decode('utf-8'),
+        }
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"快照格式錯誤: {e}") from None
+
+
+class Checkpoint:
+    """
+    一個前端 (一個牌桌) 的檢查點檔案
+
+    用法:
+        checkpoint = open_checkpoint('pygame', 'alice')
+        checkpoint.save(snapshot)      # 每個動作之後
+        snapshot = checkpoint.load()   # 登入時,沒有檢查點時為 None
+        checkpoint.clear()             # 牌局結束、沒有需要還原的狀態時
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._tmp_path = path + '.tmp'
+        self._warned = False
+
+    def _warn(self, error):
+        # 檢查點只是當機保護: 寫入失敗時只提示一次,不中斷牌局
+        if not self._warned:
+            self._warned = True
+            print(f"檢查點無法寫入,牌局照常進行 ({self.path}): {error}")
+
+    def save(self, snapshot):
+        """
+        寫入檢查點,成功時回傳 True (失敗時印出警告並回傳 False)
+        """
+        data = encode_snapshot(snapshot)
+        try:
+            with open(self._tmp_path, 'wb') as file:
+                file.write(data)
+            os.replace(self._tmp_path, self.path)
+        except OSError as e:
+            try:
+                os.unlink(self._tmp_path)
+            except OSError:
+                pass
+            self._warn(e)
+            return False
+        return True
+
+    def load(self):
+        """
+        讀取檢查點;檔案損毀時印出警告並回傳 None (不影響開始新的牌局)
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            return decode_snapshot(data)
+        except ValueError as e:
+            print(f"檢查點無法還原 ({self.path}): {e}")
+            return None
+
+    def clear(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self._warn(e)
+
+
+def checkpoint_dir():
+    """
+    依環境變數 BLACKJACK_CHECKPOINT_DIR 決定檢查點目錄,停用時回傳 None
+    """
+    directory = os.environ.get(CHECKPOINT_ENV) or DEFAULT_DIR
+    return None if directory == 'off' else directory
+
+
+def checkpoint_filename(frontend, player):
+    """
+    前端與玩家對應的檢查點檔名 (名字以雜湊表示,任何字元都能當作檔名)
+    """
+    digest = hashlib.sha256(player.encode('utf-8')).hexdigest()[:16]
+    return f"{frontend}-{digest}.snap"
+
+
+def open_checkpoint(frontend, player):
+    """
+    取得前端 ('pygame' / 'cli') 上某位玩家的檢查點,停用或目錄無法建立時回傳 None
+
+    功能說明:
+        - 與記分板相同,無法使用時印出警告,遊戲照常進行 (只是沒有當機保護)
+        - 讀出的快照屬於誰以快照內的 player 為準,呼叫端還原前應確認與登入的玩家相同
+    """
+    directory = checkpoint_dir()
+    if directory is None:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        print(f"檢查點無法使用: {e}")
+        return None
+    return Checkpoint(os.path.join(directory, checkpoint_filename(frontend, player)))
+
+
+def format_snapshot(snapshot):
+    def cards(hand):
+        return ' '.join(suit + rank for suit, rank in hand) or '-'
+
+    lines = [f"狀態: {snapshot['state']}  玩家: {snapshot['player']}  "
+             f"金額: ${snapshot['money']}  場數: {snapshot['total']}  勝場: {snapshot['wins']}",
+             f"每座位下注: ${snapshot['bet']}  目前座位: {snapshot['active_seat'] + 1}  "
+             f"剩餘牌數: {len(snapshot['deck'])}",
+             f"莊家: {cards(snapshot['dealer'])}"]
+    for seat, (hand, result) in enumerate(zip(snapshot['hands'], snapshot['results']), 1):
+        lines.append(f"座位 {seat}: {cards(hand)}  ({result or '進行中'})")
+    if snapshot['message']:
+        lines.append(f"訊息: {snapshot['message']}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="進行中牌局的檢查點")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('show', "顯示檢查點內容"), ('clear', "刪除檢查點")):
+        command_parser = sub.add_parser(command, help=help_text)
+        command_parser.add_argument('frontend', choices=['pygame', 'cli'])
+        command_parser.add_argument('player', help="玩家名字")
+    args = parser.parse_args(argv)
+
+    checkpoint = open_checkpoint(args.frontend, args.player)
+    if checkpoint is None:
+        print("檢查點已停用", file=sys.stderr)
+        return 1
+    if args.command == 'clear':
+        checkpoint.clear()
+        print(f"已刪除 {checkpoint.path}")
+        return 0
+    snapshot = checkpoint.load()
+    if snapshot is None:
+        print(f"沒有檢查點: {checkpoint.path}")
+        return 1
+    print(format_snapshot(snapshot))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,566 @@
+"""
+牌局紀錄 (hand history) 與分析查詢
+
+每一局以固定長度的二進位紀錄附加到檔案尾端,分析時以 numpy memory map
+分塊 (chunk) 讀取,每塊都以向量化運算篩選與分組統計,檔案再大也只佔固定的記憶體。
+
+每筆紀錄 (RECORD, 44 bytes):
+    player        玩家編號 (名字存在 <檔名>.names,一行一個,行號即編號)
+    time          時間 (Unix 秒)
+    bet / net     下注金額 / 本局輸贏 (含 Blackjack 賠率)
+    outcome       結果代碼 (table_rules.OUTCOME_*)
+    n_player / n_dealer / player_cards / dealer_cards
+                  雙方的牌 (點數索引 0=A ... 12=K,各最多 MAX_CARDS 張,空位為 EMPTY)
+
+分析時可用的欄位 (COLUMNS):
+    player, time, bet, net, outcome, hand (第幾局), upcard (莊家明牌點數, A = 11),
+    player_total, player_soft, start_total (前兩張牌的點數), dealer_total,
+    bust, dealer_bust, win, cards (玩家張數)
+
+點數計算沿用 blackjack.get_card_value 與 adjust_for_ace 的規則,以 hand_values()
+對整批手牌一次計算。
+
+用法:
+    with HistoryWriter('history.bin') as history:
+        history.record('alice', 10, 10, OUTCOME_WIN, player_cards, dealer_cards)
+
+    q = HandQuery('history.bin').where('bet', '>=', 20)
+    q.group_by('upcard')         # {2: {'hands': ..., 'win_rate': ..., ...}, ...}
+
+指令列用法:
+    python blackjack.py --batch script.txt --history history.bin
+    python hand_history.py info history.bin
+    python hand_history.py report history.bin --by upcard --where "bet>=20"
+    python hand_history.py timeline history.bin --bucket 1000 --player alice
+"""
+import os
+import re
+import struct
+import sys
+import time
+
+from blackjack import get_card_value
+from blackjack_sim import RANKS
+from table_rules import OUTCOME_BLACKJACK, OUTCOME_NAMES, OUTCOME_WIN
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為選用套件 (只有分析查詢需要)
+    np = None
+
+
+MAX_CARDS = 12
+EMPTY = 0xFF    # 牌的空位 (點數為 0)
+
+# 檔案格式: 標頭 (magic, 版本, 紀錄長度) + 連續的固定長度紀錄
+FILE_MAGIC = b'BJHAND'
+FILE_VERSION = 1
+HEADER = struct.Struct('<6sHI')
+RECORD = struct.Struct(f'<IIIiBBBx{MAX_CARDS}s{MAX_CARDS}s')
+
+# 每塊讀取的紀錄數 (約 44 MB)
+CHUNK_SIZE = 1 << 20
+
+# 寫檔時累積多少筆紀錄才寫出一次
+WRITE_BATCH = 4096
+
+# 點數索引 -> 點數 (由 get_card_value 產生,A 為 11)
+CARD_VALUES = [get_card_value(('', rank)) for rank in RANKS]
+ACE = CARD_VALUES.index(11)
+VALUE_TABLE = bytes(CARD_VALUES) + bytes(256 - len(CARD_VALUES))    # 含 EMPTY -> 0
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+
+STORED_COLUMNS = ('player', 'time', 'bet', 'net', 'outcome')
+DERIVED_COLUMNS = ('hand', 'upcard', 'player_total', 'player_soft', 'start_total',
+                   'dealer_total', 'bust', 'dealer_bust', 'win', 'cards')
+COLUMNS = STORED_COLUMNS + DERIVED_COLUMNS
+
+# 分組鍵小於此值時以 bincount 直接分組,否則以 np.unique
+DENSE_KEY_LIMIT = 1 << 16
+
+
+def names_path(path):
+    return path + '.names'
+
+
+def load_names(path):
+    """
+    讀取玩家名字表,回傳名字列表 (索引即玩家編號)
+    """
+    try:
+        with open(names_path(path), 'r', encoding='utf-8') as file:
+            return [line.rstrip('\n') for line in file]
+    except FileNotFoundError:
+        return []
+
+
+def pack_cards(cards):
+    """
+    將 (花色, 點數) 的牌列表轉成點數索引 bytes (超過 MAX_CARDS 張的部分不記錄)
+    """
+    ranks = bytes(RANK_INDEX[rank] for _, rank in cards[:MAX_CARDS])
+    return len(ranks), ranks.ljust(MAX_CARDS, bytes([EMPTY]))
+
+
+# ======== 寫入 ========
+
+class HistoryWriter:
+    """
+    附加寫入牌局紀錄
+
+    參數:
+        path: 紀錄檔路徑 (不存在時建立;已存在時接在尾端)
+
+    功能說明:
+        - 紀錄先累積在記憶體,每 WRITE_BATCH 筆寫出一次 (批次 / 模擬模式);
+          互動模式每局結束後呼叫 flush(),當機時最多遺失進行中的那一局
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.names = load_names(path)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        self._pending = bytearray()
+        self._count = 0
+
+        self._file = open(path, 'ab')
+        header = HEADER.pack(FILE_MAGIC, FILE_VERSION, RECORD.size)
+        with open(path, 'rb') as file:
+            existing = file.read(HEADER.size)
+        if len(existing) < HEADER.size and header.startswith(existing):
+            # 新檔案 (或寫標頭時當機): 重新寫入標頭
+            self._file.truncate(0)
+            self._file.write(header)
+        elif existing != header:
+            self._file.close()
+            raise ValueError(f"{path} 不是有效的牌局紀錄檔")
+        else:
+            # 寫紀錄時當機會留下不完整的最後一筆,截掉以免之後的紀錄全部錯位
+            size = self._file.tell()
+            partial = (size - HEADER.size) % RECORD.size
+            if partial:
+                self._file.truncate(size - partial)
+                print(f"{path}: 捨棄最後一筆不完整的紀錄 ({partial} bytes)", file=sys.stderr)
+        self._names_file = open(names_path(path), 'a', encoding='utf-8')
+
+    def _player_id(self, name):
+        player_id = self._ids.get(name)
+        if player_id is None:
+            player_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+            self._names_file.write(name + '\n')
+            self._names_file.flush()    # 名字要比紀錄先寫到磁碟
+        return player_id
+
+    def record(self, player, bet, net, outcome, player_cards, dealer_cards, timestamp=None):
+        """
+        記錄一局
+
+        參數:
+            player: 玩家名字
+            bet: 下注金額
+            net: 本局輸贏金額 (贏為正,輸為負)
+            outcome: 結果代碼 (table_rules.OUTCOME_*)
+            player_cards / dealer_cards: (花色, 點數) 的牌列表
+            timestamp: Unix 秒 (預設為現在)
+        """
+        n_player, p_ranks = pack_cards(player_cards)
+        n_dealer, d_ranks = pack_cards(dealer_cards)
+        if timestamp is None:
+            timestamp = time.time()
+        self._pending += RECORD.pack(self._player_id(player), int(timestamp), bet, net, outcome,
+                                     n_player, n_dealer, p_ranks, d_ranks)
+        self._count += 1
+        if self._count >= WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._pending)
+            self._pending.clear()
+            self._count = 0
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._names_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ======== 讀取與批次點數計算 ========
+
+def _record_dtype():
+    return np.dtype([('player', '<u4'), ('time', '<u4'), ('bet', '<u4'), ('net', '<i4'),
+                     ('outcome', 'u1'), ('n_player', 'u1'), ('n_dealer', 'u1'), ('pad', 'u1'),
+                     ('player_cards', 'u1', (MAX_CARDS,)),
+                     ('dealer_cards', 'u1', (MAX_CARDS,))])
+
+
+def open_records(path):
+    """
+    以 memory map 開啟紀錄檔,回傳結構化陣列 (需要 numpy)
+    """
+    if np is None:
+        raise RuntimeError("分析查詢需要 numpy")
+    with open(path, 'rb') as file:
+        header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} 不是有效的牌局紀錄檔")
+    magic, version, size = HEADER.unpack(header)
+    if magic != FILE_MAGIC or version != FILE_VERSION or size != RECORD.size:
+        raise ValueError(f"{path} 不是有效的牌局紀錄檔")
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    if count == 0:
+        return np.zeros(0, dtype=_record_dtype())
+    return np.memmap(path, dtype=_record_dtype(), mode='r', offset=HEADER.size, shape=(count,))
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    逐塊產生 (起始局數, 結構化陣列);每塊都是 memory map 的切片,不會整份讀入記憶體
+    """
+    records = open_records(path)
+    for start in range(0, len(records), chunk_size):
+        yield start, records[start:start + chunk_size]
+
+
+def hand_values(cards, max_cards=None):
+    """
+    批次計算手牌點數 (get_card_value + adjust_for_ace 的向量化版本)
+
+    參數:
+        cards: (n, k) 點數索引陣列,空位為 EMPTY
+        max_cards: 只看前幾張 (預設全部)
+
+    回傳:
+        (點數, 是否為軟牌) 兩個長度 n 的陣列
+
+    功能說明:
+        - A 先算 11 點;總點數超過 21 時,每張 A 可以改成 1 點 (減 10)
+        - 需要減幾次 = ceil((點數 - 21) / 10),但不超過 A 的張數
+        - 還有 A 算 11 點即為軟牌
+        - 逐欄累加 (每欄是一個一維陣列),比整個二維陣列查表快
+    """
+    table = np.frombuffer(VALUE_TABLE, dtype=np.uint8)
+    n, k = cards.shape
+    if max_cards is not None:
+        k = min(k, max_cards)
+    total = np.zeros(n, dtype=np.int16)
+    aces = np.zeros(n, dtype=np.int16)
+    for j in range(k):
+        column = cards[:, j]
+        total += table[column]
+        aces += column == ACE
+    adjust = np.minimum(aces, np.maximum(total - 12, 0) // 10)
+    total -= 10 * adjust
+    return total, aces > adjust
+
+
+class _Columns:
+    # 一塊紀錄的欄位,衍生欄位在第一次使用時才計算
+
+    def __init__(self, chunk, start):
+        self.chunk = chunk
+        self.start = start
+        self.cache = {}
+
+    def __getitem__(self, name):
+        value = self.cache.get(name)
+        if value is None:
+            value = self.cache[name] = self._compute(name)
+        return value
+
+    def max_cards(self, field):
+        # 這一塊中最多的張數 (之後的欄都是空位,不必計算)
+        return int(self.chunk[field].max()) if len(self.chunk) else 0
+
+    def _compute(self, name):
+        chunk = self.chunk
+        if name in STORED_COLUMNS:
+            return np.asarray(chunk[name])
+        if name == 'hand':
+            return np.arange(self.start, self.start + len(chunk), dtype=np.int64)
+        if name == 'upcard':
+            return np.asarray(CARD_VALUES, dtype=np.int16)[chunk['dealer_cards'][:, 0]]
+        if name in ('player_total', 'player_soft'):
+            total, soft = hand_values(chunk['player_cards'], self.max_cards('n_player'))
+            self.cache['player_soft'] = soft
+            return total if name == 'player_total' else soft
+        if name == 'start_total':
+            return hand_values(chunk['player_cards'], 2)[0]
+        if name == 'dealer_total':
+            return hand_values(chunk['dealer_cards'], self.max_cards('n_dealer'))[0]
+        if name == 'bust':
+            return self['player_total'] > 21
+        if name == 'dealer_bust':
+            return self['dealer_total'] > 21
+        if name == 'win':
+            outcome = self['outcome']
+            return (outcome == OUTCOME_WIN) | (outcome == OUTCOME_BLACKJACK)
+        if name == 'cards':
+            return np.asarray(chunk['n_player'])
+        raise KeyError(name)
+
+
+# ======== 查詢 ========
+
+OPERATORS = {
+    '==': lambda col, v: col == v,
+    '!=': lambda col, v: col != v,
+    '<': lambda col, v: col < v,
+    '<=': lambda col, v: col <= v,
+    '>': lambda col, v: col > v,
+    '>=': lambda col, v: col >= v,
+    'in': lambda col, v: np.isin(col, list(v)),
+}
+
+# 分組統計的累計欄位
+METRICS = ('hands', 'wins', 'busts', 'net', 'wagered')
+
+
+def _finish(stats):
+    # 由累計值算出比率
+    hands = stats['hands']
+    stats['win_rate'] = stats['wins'] / hands if hands else 0.0
+    stats['bust_rate'] = stats['busts'] / hands if hands else 0.0
+    stats['ev'] = stats['net'] / stats['wagered'] if stats['wagered'] else 0.0
+    return stats
+
+
+class HandQuery:
+    """
+    牌局紀錄的查詢 (篩選條件可串接,每次查詢都從頭串流整個檔案)
+
+    參數:
+        path: 紀錄檔路徑
+        chunk_size: 每塊紀錄數
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, conditions=()):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.conditions = tuple(conditions)
+        self._names = None
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = load_names(self.path)
+        return self._names
+
+    def where(self, column, op, value):
+        """
+        加上篩選條件,回傳新的查詢
+
+        參數:
+            column: 欄位名稱 (見 COLUMNS)
+            op: ==, !=, <, <=, >, >=, in
+            value: 比較值;player 欄位可用名字
+        """
+        if column not in COLUMNS:
+            raise ValueError(f"未知的欄位: {column}")
+        if op not in OPERATORS:
+            raise ValueError(f"未知的運算子: {op}")
+        if column == 'player':
+            value = self._player_ids(value)
+        query = HandQuery(self.path, self.chunk_size, self.conditions + ((column, op, value),))
+        query._names = self._names
+        return query
+
+    def _player_ids(self, value):
+        def to_id(name):
+            if isinstance(name, int):
+                return name
+            try:
+                return self.names.index(name)
+            except ValueError:
+                return -1   # 不存在的玩家: 不會符合任何紀錄
+        if isinstance(value, (list, tuple, set)):
+            return [to_id(v) for v in value]
+        return to_id(value)
+
+    def _chunks(self):
+        # 產生 (欄位, 篩選遮罩或 None)
+        for start, chunk in iter_chunks(self.path, self.chunk_size):
+            columns = _Columns(chunk, start)
+            mask = None
+            for column, op, value in self.conditions:
+                m = OPERATORS[op](columns[column], value)
+                mask = m if mask is None else mask & m
+            yield columns, mask
+
+    def _aggregate(self, key_func):
+        # key_func(columns) -> 分組鍵陣列 (None 表示不分組)
+        groups = {}
+        for columns, mask in self._chunks():
+            keys = key_func(columns)
+            data = {
+                'wins': columns['win'],
+                'busts': columns['bust'],
+                'net': columns['net'],
+                'wagered': columns['bet'],
+            }
+            if mask is not None:
+                keys = keys[mask] if keys is not None else None
+                data = {name: col[mask] for name, col in data.items()}
+            n = len(data['net'])
+            if n == 0:
+                continue
+            if keys is None:
+                keys = np.zeros(n, dtype=np.intp)
+
+            if keys.dtype.kind in 'biu' and keys.min() >= 0 and keys.max() < DENSE_KEY_LIMIT:
+                index = keys.astype(np.intp)
+                size = int(index.max()) + 1
+                unique = np.arange(size)
+            else:
+                unique, index = np.unique(keys, return_inverse=True)
+                size = len(unique)
+
+            sums = {'hands': np.bincount(index, minlength=size)}
+            for name, col in data.items():
+                sums[name] = np.bincount(index, weights=col, minlength=size)
+            for i in np.flatnonzero(sums['hands']):
+                key = unique[i].item()
+                stats = groups.get(key)
+                if stats is None:
+                    stats = groups[key] = dict.fromkeys(METRICS, 0)
+                for name in METRICS:
+                    stats[name] += int(sums[name][i])
+        return {key: _finish(stats) for key, stats in sorted(groups.items())}
+
+    def totals(self):
+        """
+        符合條件的全部紀錄的統計: hands, wins, busts, net, wagered, win_rate, bust_rate, ev
+        """
+        result = self._aggregate(lambda columns: None)
+        return result.get(0) or _finish(dict.fromkeys(METRICS, 0))
+
+    def group_by(self, column):
+        """
+        依欄位分組統計,回傳 {欄位值: 統計} (player 欄位以名字、outcome 欄位以結果名稱為鍵)
+        """
+        if column not in COLUMNS:
+            raise ValueError(f"未知的欄位: {column}")
+        result = self._aggregate(lambda columns: columns[column])
+        if column == 'player':
+            names = self.names
+            result = {names[k] if k < len(names) else k: v for k, v in result.items()}
+        elif column == 'outcome':
+            result = {OUTCOME_NAMES[k]: v for k, v in result.items()}
+        return result
+
+    def net_over_time(self, bucket=1000):
+        """
+        每位玩家的累計輸贏隨局數的變化
+
+        參數:
+            bucket: 每幾局 (以整份紀錄的局數計) 取一個點
+
+        回傳:
+            {名字: [(區段起始局數, 累計輸贏), ...]}
+        """
+        result = self._aggregate(
+            lambda columns: (columns['player'].astype(np.int64) << 32) | (columns['hand'] // bucket))
+        names = self.names
+        series = {}
+        for key, stats in result.items():
+            player, index = key >> 32, key & 0xFFFFFFFF
+            name = names[player] if player < len(names) else player
+            series.setdefault(name, []).append((index * bucket, stats['net']))
+        for points in series.values():
+            points.sort()
+            running = 0
+            for i, (start, net) in enumerate(points):
+                running += net
+                points[i] = (start, running)
+        return series
+
+
+# ======== 報告 ========
+
+def format_group_report(result, column):
+    """
+    將 group_by 的結果整理成表格
+    """
+    lines = [f"{column:>14}{'局數':>12}{'勝率':>9}{'爆牌率':>9}{'EV':>10}{'淨輸贏':>14}"]
+    for key, s in result.items():
+        lines.append(f"{str(key):>14}{s['hands']:>12}{s['win_rate']:>9.2%}{s['bust_rate']:>9.2%}"
+                     f"{s['ev']:>+10.4f}{s['net']:>14}")
+    return "\n".join(lines)
+
+
+def parse_condition(text):
+    """
+    解析指令列的篩選條件,例如 "bet>=20"、"player==alice"、"upcard in 10,11"
+    """
+    match = re.fullmatch(r'\s*(\w+)\s*(==|!=|<=|>=|<|>|\sin\s)\s*(.+?)\s*', text)
+    if not match:
+        raise ValueError(f"無法解析的條件: {text}")
+    column, op, value = match.group(1), match.group(2).strip(), match.group(3)
+    values = [v.strip() for v in value.split(',')] if op == 'in' else [value]
+    values = [int(v) if re.fullmatch(r'-?\d+', v) else v for v in values]
+    return column, op, values if op == 'in' else values[0]
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="牌局紀錄分析")
+    sub = parser.add_subparsers(dest='command', required=True)
+    info = sub.add_parser('info', help="顯示紀錄檔資訊")
+    info.add_argument('path')
+    report = sub.add_parser('report', help="分組統計 (勝率、爆牌率、EV、淨輸贏)")
+    report.add_argument('path')
+    report.add_argument('--by', default='upcard', help=f"分組欄位 ({', '.join(COLUMNS)})")
+    timeline = sub.add_parser('timeline', help="每位玩家的累計輸贏")
+    timeline.add_argument('path')
+    timeline.add_argument('--bucket', type=int, default=1000, help="每幾局取一個點")
+    timeline.add_argument('--player', action='append', default=None, help="只顯示這些玩家")
+    for p in (report, timeline):
+        p.add_argument('--where', action='append', default=[],
+                       help='篩選條件,例如 "bet>=20" (可重複)')
+        p.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="每塊紀錄數")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'info':
+            records = open_records(args.path)
+            print(f"{args.path}: {len(records)} 局, {len(load_names(args.path))} 位玩家, "
+                  f"每筆 {RECORD.size} bytes")
+            return 0
+
+        query = HandQuery(args.path, args.chunk_size)
+        for text in args.where:
+            query = query.where(*parse_condition(text))
+
+        start = time.perf_counter()
+        if args.command == 'report':
+            result = query.group_by(args.by)
+            print(format_group_report(result, args.by))
+            hands = sum(s['hands'] for s in result.values())
+        else:
+            if args.player:
+                query = query.where('player', 'in', args.player)
+            series = query.net_over_time(args.bucket)
+            for name, points in series.items():
+                print(f"{name}: " + ", ".join(f"{start}:{net:+d}" for start, net in points))
+            hands = None
+        elapsed = time.perf_counter() - start
+    except (OSError, ValueError, RuntimeError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if hands is not None:
+        print(f"({hands} 局, {elapsed:.2f} 秒)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
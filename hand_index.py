@@ -0,0 +1,173 @@
+"""
+以點數分布 (rank histogram) 為鍵的手牌點數索引
+
+手牌的點數只取決於每一類點數各有幾張,與發牌順序無關。把牌分成 10 類
+(A、2~9、10 點牌),匯入時列舉所有不爆牌的分布 (A 以 1 點計總和 <= 21,
+共數千種),每一種分配一個狀態編號並預先算好:
+
+    TOTAL       調整 A 之後的點數 (爆牌狀態為 BUST_TOTAL)
+    SOFT        是否仍有 A 以 11 點計算
+    BLACKJACK   是否為前兩張 21 點
+    CARDS       張數 (爆牌狀態為 0)
+
+以及轉移表 NEXT[狀態 * CLASSES + 類別] -> 加一張牌之後的狀態 (爆牌時為 BUST_STATE,
+BUST_STATE 加牌仍是 BUST_STATE)。計分與加牌都只是一次查表,
+莊家補牌、機率展開中重複出現的部分手牌不必重新計算點數。
+
+鍵 (key) 為壓縮的分布: 每類 KEY_BITS bits,key = sum(張數 << (KEY_BITS * 類別)),
+加一張牌即 key + CLASS_STEP[類別];state_of_key() 把鍵轉成狀態編號。
+
+用法:
+    state = EMPTY_STATE
+    for rank in ranks:      # blackjack_sim 的點數索引 (0 = A, 9~12 = 10/J/Q/K)
+        state = RANK_NEXT[state * RANKS + rank]
+    TOTAL[state], SOFT[state], BLACKJACK[state]
+"""
+import sys
+
+# 10 類點數: A, 2~9, 10 點牌 (A 以 1 點計)
+CLASSES = 10
+CLASS_VALUES = list(range(1, CLASSES + 1))
+
+# blackjack_sim 的點數索引 (A, 2~10, J, Q, K) -> 類別
+RANKS = 13
+RANK_CLASS = bytes(min(rank, CLASSES - 1) for rank in range(RANKS))
+
+# 字串點數 (blackjack.py / blackjack_pygame.py 的牌) -> 類別
+RANK_NAMES = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+NAME_CLASS = {name: RANK_CLASS[rank] for rank, name in enumerate(RANK_NAMES)}
+
+KEY_BITS = 5
+CLASS_STEP = [1 << (KEY_BITS * cls) for cls in range(CLASSES)]
+
+# 爆牌狀態的點數 (同 table_rules.BUST,可直接當作結算表的莊家結果)
+BUST_TOTAL = 22
+
+
+def pack_key(counts):
+    """
+    將每類張數 (長度 10 的序列,A 在最前) 壓成鍵
+    """
+    return sum(count << (KEY_BITS * cls) for cls, count in enumerate(counts))
+
+
+def unpack_key(key):
+    """
+    pack_key 的反向操作
+    """
+    mask = (1 << KEY_BITS) - 1
+    return [(key >> (KEY_BITS * cls)) & mask for cls in range(CLASSES)]
+
+
+def _build():
+    # 由空手牌開始逐張展開 (依張數排序,狀態編號越大張數越多);
+    # 每個狀態記下硬點數 (A 算 1 點) 與 A 的張數,加牌時只需加上該類點數
+    keys = [0]
+    hard = [0]
+    aces = [0]
+    cards = [0]
+    states = {0: 0}
+    nexts = []
+    position = 0
+    while position < len(keys):
+        key = keys[position]
+        for cls, value in enumerate(CLASS_VALUES):
+            if hard[position] + value > 21:
+                nexts.append(-1)
+                continue
+            new_key = key + CLASS_STEP[cls]
+            state = states.get(new_key)
+            if state is None:
+                state = states[new_key] = len(keys)
+                keys.append(new_key)
+                hard.append(hard[position] + value)
+                aces.append(aces[position] + (cls == 0))
+                cards.append(cards[position] + 1)
+            nexts.append(state)
+        position += 1
+
+    bust = len(keys)
+    nexts = [bust if state < 0 else state for state in nexts] + [bust] * CLASSES
+    soft = [bool(a) and h + 10 <= 21 for h, a in zip(hard, aces)]
+    totals = [h + 10 if s else h for h, s in zip(hard, soft)]
+    blackjack = [n == 2 and total == 21 for n, total in zip(cards, totals)]
+    return (keys, states, nexts, bytes(totals + [BUST_TOTAL]), bytes(soft + [False]),
+            bytes(blackjack + [False]), bytes(cards + [0]))
+
+
+KEYS, _STATES, NEXT, TOTAL, SOFT, BLACKJACK, CARDS = _build()
+EMPTY_STATE = 0
+BUST_STATE = len(KEYS)
+STATE_COUNT = BUST_STATE + 1
+
+# 以點數索引直接轉移 (省去一次類別查表),供模擬引擎的內層迴圈使用
+RANK_NEXT = [NEXT[row + cls] for row in range(0, STATE_COUNT * CLASSES, CLASSES)
+             for cls in RANK_CLASS]
+
+
+def state_of_key(key):
+    """
+    鍵 -> 狀態編號 (A 以 1 點計總和超過 21 時為 BUST_STATE)
+    """
+    state = _STATES.get(key)
+    return BUST_STATE if state is None else state
+
+
+def extend(state, cls):
+    """
+    加一張類別為 cls 的牌之後的狀態
+    """
+    return NEXT[state * CLASSES + cls]
+
+
+def value_class(value):
+    """
+    點數 (A 為 11 或 1) -> 類別
+    """
+    return 0 if value in (1, 11) else value - 1
+
+
+def rank_state(ranks):
+    """
+    點數索引列表 (blackjack_sim 的牌) -> 狀態編號
+    """
+    state = EMPTY_STATE
+    for rank in ranks:
+        state = RANK_NEXT[state * RANKS + rank]
+    return state
+
+
+def card_state(cards):
+    """
+    (花色, 點數) 元組列表 (blackjack.py / blackjack_pygame.py 的牌) -> 狀態編號
+    """
+    state = EMPTY_STATE
+    for _, name in cards:
+        state = NEXT[state * CLASSES + NAME_CLASS[name]]
+    return state
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="手牌點數索引")
+    parser.add_argument('cards', nargs='*', help="點數 (A 2 ... 10 J Q K),顯示該手牌的狀態")
+    args = parser.parse_args(argv)
+
+    print(f"{len(KEYS)} 種不爆牌的點數分布 (最多 {max(CARDS)} 張), 轉移表 {len(NEXT)} 格")
+    if args.cards:
+        unknown = [name for name in args.cards if name.upper() not in NAME_CLASS]
+        if unknown:
+            print(f"未知的點數: {', '.join(unknown)}", file=sys.stderr)
+            return 1
+        state = card_state(('', name.upper()) for name in args.cards)
+        if state == BUST_STATE:
+            print("爆牌")
+        else:
+            print(f"點數 {TOTAL[state]}, {'軟' if SOFT[state] else '硬'}牌"
+                  f"{', Blackjack' if BLACKJACK[state] else ''}, 鍵 {KEYS[state]:#x}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
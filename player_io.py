@@ -0,0 +1,287 @@
+"""
+玩家資料的串流匯入/匯出與格式轉換工具
+
+load_player_data() 會一次把整個 players.txt 讀進記憶體,只認得 5 欄的 CSV,
+而且遇到錯誤就整個放棄。本模組以 generator 逐行處理,記憶體用量固定,
+可以在下列格式之間轉換:
+
+    csv    players.txt 格式: 名字,金額,總場數,勝場數[,勝率]
+    jsonl  每行一個 JSON 物件: {"name": ..., "money": ..., "total": ..., "wins": ...}
+
+格式錯誤的行 (以及無法寫成目標格式的資料,例如 csv 的名字含逗號) 不會中斷轉換,
+而是記錄位置與原因後略過;錯誤記錄只保留前幾筆內容,其餘只計數。
+
+指令列用法:
+    python player_io.py players.txt players.jsonl
+    python player_io.py players.jsonl players.txt --max-errors 100
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from blackjack import format_win_rate
+from player_table import PlayerTable
+
+FORMATS = ('csv', 'jsonl')
+
+# 寫檔時的緩衝大小 (大檔案時減少系統呼叫次數)
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def detect_format(path):
+    """
+    依副檔名判斷檔案格式 (.jsonl / .ndjson 為 jsonl,其餘視為 csv)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+
+def parse_csv_line(line):
+    """
+    解析一行 players.txt 資料
+
+    回傳:
+        (名字, 金額, 總場數, 勝場數)
+
+    功能說明:
+        - 接受 4 欄或 5 欄 (勝率欄位會被忽略,由總場數/勝場數重新計算)
+        - 格式錯誤時丟出 ValueError
+    """
+    parts = line.split(',')
+    if len(parts) not in (4, 5):
+        raise ValueError(f"欄位數量應為 4 或 5,實際為 {len(parts)}")
+    name = parts[0]
+    if not name:
+        raise ValueError("名字不可為空")
+    return name, int(parts[1]), int(parts[2]), int(parts[3])
+
+
+def parse_jsonl_line(line):
+    """
+    解析一行 JSON Lines 資料,回傳 (名字, 金額, 總場數, 勝場數)
+    """
+    obj = json.loads(line)
+    if not isinstance(obj, dict):
+        raise ValueError("每行必須是 JSON 物件")
+    name = obj.get('name')
+    if not isinstance(name, str) or not name:
+        raise ValueError("缺少 name 欄位")
+    values = []
+    for key in ('money', 'total', 'wins'):
+        value = obj.get(key)
+        if type(value) is not int:
+            raise ValueError(f"{key} 欄位必須是整數")
+        values.append(value)
+    return (name, *values)
+
+
+def format_csv_line(name, money, total, wins):
+    """
+    組成一行 players.txt 資料 (與 save_player_data 的格式相同)
+    """
+    if ',' in name or '\n' in name:
+        raise ValueError(f"名字不可包含逗號或換行: {name!r}")
+    return f"{name},{money},{total},{wins},{format_win_rate(total, wins)}\n"
+
+
+def format_jsonl_line(name, money, total, wins):
+    """
+    組成一行 JSON Lines 資料
+    """
+    record = {'name': name, 'money': money, 'total': total, 'wins': wins}
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+_PARSERS = {'csv': parse_csv_line, 'jsonl': parse_jsonl_line}
+_FORMATTERS = {'csv': format_csv_line, 'jsonl': format_jsonl_line}
+
+
+class ErrorLog:
+    """
+    錯誤記錄: 計算總筆數,但只保留前 limit 筆內容
+
+    功能說明:
+        - 與列表一樣以 append() 加入,可直接傳給 read_players / write_players 的 errors
+        - 錯誤再多,記憶體用量也固定 (len() 為總筆數,迭代時只有保留的部分)
+    """
+
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.count = 0
+        self.samples = []
+
+    def append(self, entry):
+        self.count += 1
+        if len(self.samples) < self.limit:
+            self.samples.append(entry)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.samples)
+
+
+def read_players(path, fmt=None, errors=None):
+    """
+    逐筆讀取玩家資料 (generator)
+
+    參數:
+        path: 檔案路徑
+        fmt: 'csv' 或 'jsonl',預設依副檔名判斷
+        errors: 錯誤記錄 (ErrorLog 或列表);格式錯誤的行會以 (行號, 原始內容, 原因) 加入。
+                若為 None,遇到錯誤直接丟出 ValueError
+
+    回傳:
+        依序產生 (名字, 金額, 總場數, 勝場數)
+
+    功能說明:
+        - 一次只處理一行,記憶體用量與檔案大小無關 (錯誤請用 ErrorLog 記錄)
+        - 空行會被略過
+    """
+    fmt = fmt or detect_format(path)
+    parse = _PARSERS[fmt]
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_no, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield parse(line)
+            except ValueError as e:  # json.JSONDecodeError 也是 ValueError
+                if errors is None:
+                    raise ValueError(f"{path} 第 {line_no} 行: {e}") from None
+                errors.append((line_no, line, str(e)))
+
+
+def iter_players(players):
+    """
+    將 {名字: dict} 或 PlayerTable 轉成 (名字, 金額, 總場數, 勝場數) 的串流
+    """
+    for name, data in players.items():
+        yield name, data['money'], data['total'], data['wins']
+
+
+def write_players(records, path, fmt=None, errors=None):
+    """
+    將玩家資料串流寫入檔案
+
+    參數:
+        records: 產生 (名字, 金額, 總場數, 勝場數) 的可迭代物件
+        path: 輸出檔案路徑
+        fmt: 'csv' 或 'jsonl',預設依副檔名判斷
+        errors: 錯誤記錄 (ErrorLog 或列表);無法寫成目標格式的資料會以
+                (第幾筆, 名字, 原因) 加入後略過。若為 None,直接丟出 ValueError
+
+    回傳:
+        寫入的筆數
+
+    功能說明:
+        - 先寫入同一資料夾下的暫存檔,完成後再以 os.replace 原子性地取代目標檔
+        - 寫到一半失敗時,原本的檔案保持不變 (讀取端不會看到寫一半的檔案)
+    """
+    fmt = fmt or detect_format(path)
+    formatter = _FORMATTERS[fmt]
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.players-', suffix='.tmp')
+    count = 0
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as file:
+            write = file.write
+            for position, (name, money, total, wins) in enumerate(records, 1):
+                try:
+                    line = formatter(name, money, total, wins)
+                except ValueError as e:
+                    if errors is None:
+                        raise
+                    errors.append((position, name, str(e)))
+                    continue
+                write(line)
+                count += 1
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+def convert(src, dst, src_fmt=None, dst_fmt=None, errors=None, skipped=None):
+    """
+    轉換玩家資料檔案格式
+
+    參數:
+        src / dst: 來源與目標檔案路徑
+        src_fmt / dst_fmt: 來源與目標格式,預設依副檔名判斷
+        errors: 讀取時的錯誤記錄 (見 read_players)
+        skipped: 無法寫成目標格式的資料記錄 (見 write_players)
+
+    回傳:
+        寫入的筆數
+    """
+    return write_players(read_players(src, src_fmt, errors), dst, dst_fmt, skipped)
+
+
+def load_table(path, fmt=None, errors=None):
+    """
+    將檔案串流讀入 PlayerTable (不會先建立整份 dict)
+    """
+    table = PlayerTable()
+    for name, money, total, wins in read_players(path, fmt, errors):
+        table.add(name, money, total, wins)
+    return table
+
+
+def save_table(players, path, fmt=None):
+    """
+    將 PlayerTable (或一般的玩家 dict) 寫入檔案,回傳寫入筆數
+    """
+    return write_players(iter_players(players), path, fmt)
+
+
+# ======== 指令列介面 ========
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="玩家資料格式轉換")
+    parser.add_argument('src', help="來源檔案")
+    parser.add_argument('dst', help="目標檔案")
+    parser.add_argument('--from', dest='src_fmt', choices=FORMATS, help="來源格式")
+    parser.add_argument('--to', dest='dst_fmt', choices=FORMATS, help="目標格式")
+    parser.add_argument('--max-errors', type=int, default=20,
+                        help="最多列出幾筆錯誤 (預設 20)")
+    args = parser.parse_args(argv)
+
+    limit = max(args.max_errors, 0)
+    errors = ErrorLog(limit)
+    skipped = ErrorLog(limit)
+    try:
+        count = convert(args.src, args.dst, args.src_fmt, args.dst_fmt, errors, skipped)
+    except (OSError, ValueError) as e:
+        print(f"轉換失敗: {e}", file=sys.stderr)
+        return 1
+
+    print(f"已寫入 {count} 筆玩家資料 -> {args.dst}")
+    if errors:
+        print(f"略過 {len(errors)} 行格式錯誤的資料:", file=sys.stderr)
+        for line_no, line, reason in errors:
+            print(f"  第 {line_no} 行: {reason}  ({line[:60]})", file=sys.stderr)
+        if len(errors) > limit:
+            print(f"  ... 另有 {len(errors) - limit} 筆", file=sys.stderr)
+    if skipped:
+        print(f"略過 {len(skipped)} 筆無法寫成目標格式的資料:", file=sys.stderr)
+        for position, name, reason in skipped:
+            print(f"  第 {position} 筆: {reason}", file=sys.stderr)
+        if len(skipped) > limit:
+            print(f"  ... 另有 {len(skipped) - limit} 筆", file=sys.stderr)
+    return 2 if errors or skipped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+緊湊型玩家資料表
+
+每位玩家原本是一個 dict,內含四個獨立的 Python 物件 (其中 win_rate 字串
+每次存檔都會重新計算)。玩家數量到百萬級時,每人要花上數百 bytes。
+
+PlayerTable 改用欄位式 (columnar) 儲存:
+    - 名字 -> 索引 的 dict
+    - money / total / wins 各自是一條 int64 陣列 (array('q'))
+    - 勝率在讀取時才計算,不另外儲存
+
+同時提供與原本 dict 相容的介面,因此 save_player_data、update_game_result、
+check_bankruptcy 等既有函數可以直接使用:
+
+    players = PlayerTable.from_dict(load_player_data())
+    players['alice']['money'] += 10
+    save_player_data(players)
+
+若有安裝 numpy,總額、破產人數等整批運算會直接在欄位上向量化執行;
+沒有 numpy 時則退回純 Python 實作,結果相同。
+"""
+from array import array
+from collections.abc import MutableMapping
+
+from blackjack import format_win_rate
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為選用套件
+    np = None
+
+
+# 每筆紀錄的欄位 (順序與 players.txt 相同)
+FIELDS = ('money', 'total', 'wins', 'win_rate')
+
+# 新玩家的起始金額 (與 get_or_create_player 相同)
+STARTING_MONEY = 100
+
+
+class PlayerRecord(MutableMapping):
+    """
+    單一玩家的檢視物件
+
+    不保存任何資料,只記住自己在 PlayerTable 中的索引,
+    讀寫都直接對應到資料表的欄位。
+    'win_rate' 為唯讀計算值,寫入時會被忽略。
+    """
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        table = self._table
+        i = self._index
+        if key == 'money':
+            return table._money[i]
+        if key == 'total':
+            return table._total[i]
+        if key == 'wins':
+            return table._wins[i]
+        if key == 'win_rate':
+            return format_win_rate(table._total[i], table._wins[i])
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        table = self._table
+        i = self._index
+        if key == 'money':
+            table._money[i] = value
+        elif key == 'total':
+            table._total[i] = value
+        elif key == 'wins':
+            table._wins[i] = value
+        elif key == 'win_rate':
+            pass  # 勝率由 total / wins 推算
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        raise TypeError("玩家紀錄的欄位不可刪除")
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class PlayerTable(MutableMapping):
+    """
+    以欄位陣列儲存的玩家資料表 (名字 -> PlayerRecord)
+
+    注意: 刪除玩家後,先前取得的 PlayerRecord 可能指向錯誤的玩家,
+    請重新用名字取得。
+    """
+
+    def __init__(self):
+        self._index = {}
+        self._names = []
+        self._money = array('q')
+        self._total = array('q')
+        self._wins = array('q')
+
+    @classmethod
+    def from_dict(cls, players):
+        """
+        由 load_player_data() 回傳的 dict 建立資料表
+        """
+        table = cls()
+        for name, data in players.items():
+            table.add(name, data['money'], data['total'], data['wins'])
+        return table
+
+    def to_dict(self):
+        """
+        轉回原本的 {名字: dict} 格式
+        """
+        return {name: dict(self[name]) for name in self._names}
+
+    def add(self, name, money=STARTING_MONEY, total=0, wins=0):
+        """
+        新增 (或覆寫) 一位玩家,回傳其 PlayerRecord
+        """
+        i = self._index.get(name)
+        if i is None:
+            i = len(self._names)
+            self._index[name] = i
+            self._names.append(name)
+            self._money.append(money)
+            self._total.append(total)
+            self._wins.append(wins)
+        else:
+            self._money[i] = money
+            self._total[i] = total
+            self._wins[i] = wins
+        return PlayerRecord(self, i)
+
+    # ---- Mapping 介面 ----
+
+    def __getitem__(self, name):
+        return PlayerRecord(self, self._index[name])
+
+    def __setitem__(self, name, data):
+        self.add(name, data['money'], data['total'], data['wins'])
+
+    def __delitem__(self, name):
+        i = self._index.pop(name)
+        del self._names[i]
+        del self._money[i]
+        del self._total[i]
+        del self._wins[i]
+        for j in range(i, len(self._names)):
+            self._index[self._names[j]] = j
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return f"PlayerTable({len(self)} players)"
+
+    # ---- 整批運算 ----
+
+    def columns(self):
+        """
+        回傳 (money, total, wins) 三條欄位
+
+        有 numpy 時回傳零複製的 int64 ndarray 檢視,否則回傳 array('q')。
+        持有 ndarray 檢視期間不能新增或刪除玩家 (陣列無法調整大小)。
+        """
+        if np is not None:
+            return tuple(np.frombuffer(col, dtype=np.int64)
+                         for col in (self._money, self._total, self._wins))
+        return self._money, self._total, self._wins
+
+    def total_money(self):
+        """
+        所有玩家的持有金額總和
+        """
+        if np is not None and self._money:
+            return int(np.frombuffer(self._money, dtype=np.int64).sum())
+        return sum(self._money)
+
+    def bankrupt_count(self):
+        """
+        持有金額 <= 0 (下一局會觸發破產補助) 的玩家人數
+        """
+        if np is not None and self._money:
+            return int(np.count_nonzero(np.frombuffer(self._money, dtype=np.int64) <= 0))
+        return sum(1 for money in self._money if money <= 0)
+
+    def win_rates(self):
+        """
+        所有玩家的勝率 (0~1 的浮點數,沒有比賽紀錄者為 0)
+        """
+        if np is not None and self._total:
+            total = np.frombuffer(self._total, dtype=np.int64)
+            wins = np.frombuffer(self._wins, dtype=np.int64)
+            return np.divide(wins, total, out=np.zeros(len(total)), where=total > 0)
+        return [wins / total if total > 0 else 0.0
+                for total, wins in zip(self._total, self._wins)]
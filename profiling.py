@@ -0,0 +1,252 @@
+"""
+遊戲流程的效能量測 (計時器與計數器)
+
+在 play_game() 的各階段 (下注、洗牌、發牌、玩家回合、莊家回合、結算、存讀檔)
+以及 BlackjackGame.handle_action 的各個動作周圍加上具名計時器:
+
+    with PROFILER.phase('dealer_turn'):
+        dealer_turn(deck, dealer_hand)
+    PROFILER.count('cards_dealt', 2)
+
+停用時 phase() 直接回傳一個共用的空 context manager,count() 立即返回,
+幾乎沒有額外負擔。
+
+啟用方式:
+    - 環境變數 BLACKJACK_PROFILE=1             結束時把文字摘要印到 stderr
+    - 環境變數 BLACKJACK_PROFILE=輸出前綴        結束時寫出 前綴.txt / .json / .trace.json / .folded
+    - 指令列參數 --profile [輸出前綴]            (blackjack.py 與 blackjack_pygame.py)
+    - BLACKJACK_PROFILE 為空字串、0 或 off 時不啟用
+    - 程式中呼叫 PROFILER.enable()
+
+輸出格式:
+    .txt         各階段的次數、總時間、平均、最小、最大
+    .json        同上的機器可讀版本,另含計數器
+    .trace.json  Chrome trace event 格式 (chrome://tracing、Perfetto、speedscope 可開啟)
+    .folded      折疊堆疊格式 (flamegraph.pl、speedscope 可開啟)
+"""
+import atexit
+import json
+import os
+import sys
+import time
+
+PROFILE_ENV = 'BLACKJACK_PROFILE'
+
+# trace 事件數量上限 (避免長時間執行時記憶體無限成長)
+MAX_TRACE_EVENTS = 1000000
+
+
+class _NullPhase:
+    # 停用時使用的空 context manager
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._stack.append(self.name)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.profiler._record(self.name, self.start, end)
+        return False
+
+
+class Profiler:
+    """
+    具名計時器與計數器
+
+    參數:
+        enabled: 是否啟用
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.timers = {}        # 名稱 -> [次數, 總時間 ns, 最小, 最大]
+        self.counters = {}
+        self.folded = {}        # 堆疊路徑 -> 自身時間 ns
+        self.events = []        # (名稱, 開始 ns, 長度 ns)
+        self.dropped_events = 0
+        self._stack = []
+        self._child_time = [0]
+        self._origin = time.perf_counter_ns()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def phase(self, name):
+        """
+        回傳計時用的 context manager
+        """
+        if not self.enabled:
+            return _NULL_PHASE
+        self._child_time.append(0)
+        return _Phase(self, name)
+
+    def count(self, name, n=1):
+        """
+        計數器加 n
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _record(self, name, start, end):
+        elapsed = end - start
+        stats = self.timers.get(name)
+        if stats is None:
+            self.timers[name] = [1, elapsed, elapsed, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed < stats[2]:
+                stats[2] = elapsed
+            if elapsed > stats[3]:
+                stats[3] = elapsed
+
+        # 折疊堆疊只記自身時間 (扣掉子階段)
+        child = self._child_time.pop()
+        path = ';'.join(self._stack)
+        self.folded[path] = self.folded.get(path, 0) + elapsed - child
+        self._stack.pop()
+        self._child_time[-1] += elapsed
+
+        if len(self.events) < MAX_TRACE_EVENTS:
+            self.events.append((name, start - self._origin, elapsed))
+        else:
+            self.dropped_events += 1
+
+    # ---- 輸出 ----
+
+    def summary(self):
+        """
+        回傳 {名稱: {'count', 'total_ms', 'mean_ms', 'min_ms', 'max_ms'}}
+        """
+        result = {}
+        for name, (count, total, low, high) in self.timers.items():
+            result[name] = {
+                'count': count,
+                'total_ms': total / 1e6,
+                'mean_ms': total / count / 1e6,
+                'min_ms': low / 1e6,
+                'max_ms': high / 1e6,
+            }
+        return result
+
+    def format_text(self):
+        """
+        文字摘要 (依總時間排序)
+        """
+        lines = [f"{'階段':<28}{'次數':>8}{'總計(ms)':>12}{'平均(ms)':>12}{'最小(ms)':>12}{'最大(ms)':>12}"]
+        rows = sorted(self.summary().items(), key=lambda item: -item[1]['total_ms'])
+        for name, s in rows:
+            lines.append(f"{name:<28}{s['count']:>8}{s['total_ms']:>12.3f}{s['mean_ms']:>12.4f}"
+                         f"{s['min_ms']:>12.4f}{s['max_ms']:>12.4f}")
+        if self.counters:
+            lines.append("")
+            lines.append("計數器:")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"  {name:<26}{value:>10}")
+        return "\n".join(lines)
+
+    def to_json(self):
+        return {'timers': self.summary(), 'counters': dict(self.counters),
+                'dropped_events': self.dropped_events}
+
+    def trace_events(self):
+        """
+        Chrome trace event 格式的事件列表 (時間單位為微秒,巢狀階段由時間區間自動疊合)
+        """
+        pid = os.getpid()
+        return [{'name': name, 'ph': 'X', 'ts': start / 1000, 'dur': duration / 1000,
+                 'pid': pid, 'tid': 0}
+                for name, start, duration in self.events]
+
+    def format_folded(self):
+        """
+        折疊堆疊格式: 每行 "外層;內層 微秒"
+        """
+        return "\n".join(f"{path} {ns // 1000}" for path, ns in sorted(self.folded.items())
+                         if ns >= 1000)
+
+    def write_reports(self, prefix):
+        """
+        寫出 前綴.txt / .json / .trace.json / .folded
+        """
+        with open(prefix + '.txt', 'w', encoding='utf-8') as file:
+            file.write(self.format_text() + "\n")
+        with open(prefix + '.json', 'w', encoding='utf-8') as file:
+            json.dump(self.to_json(), file, ensure_ascii=False, indent=2)
+        with open(prefix + '.trace.json', 'w', encoding='utf-8') as file:
+            json.dump({'traceEvents': self.trace_events()}, file)
+        with open(prefix + '.folded', 'w', encoding='utf-8') as file:
+            file.write(self.format_folded() + "\n")
+
+
+PROFILER = Profiler()
+
+_report_prefix = None
+
+
+def _report_at_exit():
+    if not PROFILER.timers and not PROFILER.counters:
+        return
+    if _report_prefix:
+        try:
+            PROFILER.write_reports(_report_prefix)
+        except OSError as e:
+            # 程式結束時才寫檔: 無法寫入只印出警告,不留下 traceback
+            print(f"[效能] 報告無法寫入 {_report_prefix}.*: {e}", file=sys.stderr)
+            return
+        print(f"[效能] 報告已寫入 {_report_prefix}.*", file=sys.stderr)
+    else:
+        print(PROFILER.format_text(), file=sys.stderr)
+
+
+def configure(value):
+    """
+    啟用量測並在程式結束時輸出報告
+
+    參數:
+        value: '1' 表示印出文字摘要,其他值視為輸出檔案前綴;
+               None / '' / '0' / 'off' 表示不啟用
+    """
+    global _report_prefix
+    if value is None or value.strip().lower() in ('', '0', 'off'):
+        return
+    _report_prefix = None if value == '1' else value
+    if not PROFILER.enabled:
+        PROFILER.enable()
+        atexit.register(_report_at_exit)
+
+
+def add_profile_argument(parser):
+    """
+    在 argparse parser 加上 --profile [前綴] 參數
+    """
+    parser.add_argument('--profile', nargs='?', const='1', default=None, metavar='PREFIX',
+                        help="啟用效能量測;指定前綴時寫出 .txt/.json/.trace.json/.folded")
+
+
+configure(os.environ.get(PROFILE_ENV))
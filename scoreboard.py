@@ -0,0 +1,386 @@
+"""
+跨行程的即時記分板 (shared memory)
+
+每個 BlackjackGame 行程只看得到自己的 self.players,其他牌桌的結果要等重新讀檔才會出現。
+本模組把所有玩家的金額與戰績放在一塊具名的共享記憶體中,同一台電腦上的所有前端
+(pygame、文字版) 都直接寫入,顯示排行榜時不需要讀檔:
+
+    - 固定格式: 標頭 + capacity 筆固定長度的紀錄 (RECORD)
+    - 寫入: 以鎖定檔上的作業系統檔案鎖讓寫入者輪流寫,每筆紀錄以 seqlock 標記寫入中;
+      寫入者中止時鎖由作業系統自動釋放
+    - 讀取: 不加鎖;讀到的序號是奇數 (寫入中) 或前後不一致時重讀
+    - 已滿時新玩家覆蓋最久沒有更新的紀錄,記分板不會因為玩家太多而無法寫入
+
+記分板只是顯示用: publish() / leaderboard() 失敗時只印出一次警告,不會中斷遊戲。
+
+紀錄 (RECORD): 序號, 名字 (UTF-8, 最多 NAME_BYTES), 金額, 總場數, 勝場數, 更新時間
+
+共享記憶體名稱預設為 blackjack_scoreboard,可用環境變數 BLACKJACK_SCOREBOARD 改變;
+BLACKJACK_SCOREBOARD=off 則停用記分板。
+
+指令列用法:
+    python scoreboard.py show [--top 10] [--watch 1]
+    python scoreboard.py clear
+"""
+import os
+import struct
+import sys
+import tempfile
+import time
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # 沒有 shared_memory 的平台
+    shared_memory = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SCOREBOARD_ENV = 'BLACKJACK_SCOREBOARD'
+DEFAULT_NAME = 'blackjack_scoreboard'
+DEFAULT_CAPACITY = 1024
+
+NAME_BYTES = 32
+
+# 標頭: magic, 容量, 已使用筆數
+FILE_MAGIC = b'BJSCORE1'
+HEADER = struct.Struct('<8sII')
+# 紀錄: 序號 (seqlock), 名字, 金額, 總場數, 勝場數, 更新時間
+RECORD = struct.Struct(f'<I4x{NAME_BYTES}sqqqd')
+SEQ = struct.Struct('<I')
+
+# 讀取時遇到寫入中的紀錄最多重試幾次
+READ_RETRIES = 1000
+
+
+class _FileLock:
+    # 跨行程的鎖: 鎖定檔上的 fcntl.flock (Linux) / msvcrt.locking (Windows)。
+    # 鎖屬於開啟檔案的行程,行程中止時由作業系統釋放,不必判斷鎖是否過期,
+    # 也不會有兩個行程同時刪掉「過期」的鎖而一起進入的問題;鎖定檔本身不刪除。
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o666)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK 重試約 10 秒後放棄,繼續等待
+                        pass
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return self
+
+    def __exit__(self, *exc):
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+def _encode_name(name):
+    # 截斷到 NAME_BYTES 以內,且不切斷多位元組字元
+    data = name.encode('utf-8')[:NAME_BYTES]
+    return data.decode('utf-8', errors='ignore').encode('utf-8')
+
+
+class Scoreboard:
+    """
+    共享記憶體記分板
+
+    用法:
+        board = Scoreboard.open()
+        board.update('alice', 120, 5, 3)
+        board.leaderboard(5)    # [{'name': 'alice', 'money': 120, ...}, ...]
+    """
+
+    def __init__(self, shm):
+        self._shm = shm
+        self._buf = shm.buf
+        # 被截斷或別的程式建立的共享記憶體: 與其他無法使用的情況相同,丟出 ValueError
+        if len(self._buf) < HEADER.size:
+            raise ValueError(f"{shm.name} 不是記分板")
+        magic, self.capacity, _ = HEADER.unpack_from(self._buf, 0)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"{shm.name} 不是記分板")
+        if len(self._buf) < HEADER.size + self.capacity * RECORD.size:
+            raise ValueError(f"{shm.name} 記分板大小不符")
+        self.name = shm.name
+        self._lock = _FileLock(os.path.join(tempfile.gettempdir(), shm.name + '.lock'))
+        self._slots = {}
+        self._warned = False
+
+    @classmethod
+    def open(cls, name=DEFAULT_NAME, capacity=DEFAULT_CAPACITY):
+        """
+        連接到記分板,不存在時建立
+
+        功能說明:
+            - 記分板在所有行程結束後仍然保留 (不交給 resource_tracker 管理),
+              需要清除時呼叫 unlink() 或執行 python scoreboard.py clear
+        """
+        if shared_memory is None:
+            raise OSError("此平台不支援 shared_memory")
+        size = HEADER.size + capacity * RECORD.size
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            HEADER.pack_into(shm.buf, 0, FILE_MAGIC, capacity, 0)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+            # 剛被另一個行程建立、還沒寫入標頭時稍等一下
+            for _ in range(100):
+                if bytes(shm.buf[:len(FILE_MAGIC)]) == FILE_MAGIC:
+                    break
+                time.sleep(0.001)
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        try:
+            return cls(shm)
+        except ValueError:
+            shm.close()
+            raise
+
+    def _count(self):
+        return HEADER.unpack_from(self._buf, 0)[2]
+
+    def _offset(self, index):
+        return HEADER.size + index * RECORD.size
+
+    def read(self, index):
+        """
+        讀取第 index 筆紀錄 (不加鎖,seqlock 重讀)
+
+        回傳:
+            (名字, 金額, 總場數, 勝場數, 更新時間)
+        """
+        offset = self._offset(index)
+        buf = self._buf
+        for _ in range(READ_RETRIES):
+            seq, name, money, total, wins, updated = RECORD.unpack_from(buf, offset)
+            if seq & 1 == 0 and SEQ.unpack_from(buf, offset)[0] == seq:
+                return name.rstrip(b'\0').decode('utf-8'), money, total, wins, updated
+        raise RuntimeError("記分板紀錄一直在寫入中")
+
+    def _name_at(self, index):
+        # 第 index 筆紀錄的名字 (需持有鎖)
+        return RECORD.unpack_from(self._buf, self._offset(index))[1].rstrip(b'\0')
+
+    def _find(self, encoded):
+        # 在已使用的紀錄中找名字 (需持有鎖)
+        for index in range(self._count()):
+            if self._name_at(index) == encoded:
+                return index
+        return None
+
+    def _oldest(self):
+        # 最久沒有更新的紀錄 (需持有鎖)
+        updated = [RECORD.unpack_from(self._buf, self._offset(index))[5]
+                   for index in range(self._count())]
+        return updated.index(min(updated))
+
+    def update(self, name, money, total, wins):
+        """
+        寫入一位玩家的最新金額與戰績 (新玩家自動加入)
+
+        功能說明:
+            - 記分板已滿時,新玩家覆蓋最久沒有更新的紀錄
+        """
+        encoded = _encode_name(name)
+        with self._lock:
+            index = self._slots.get(encoded)
+            # 記住的位置可能已被其他行程讓給別的玩家,寫入前確認
+            if index is None or self._name_at(index) != encoded:
+                index = self._find(encoded)
+                if index is None:
+                    index = self._count()
+                    if index < self.capacity:
+                        RECORD.pack_into(self._buf, self._offset(index), 0, encoded, 0, 0, 0, 0.0)
+                        HEADER.pack_into(self._buf, 0, FILE_MAGIC, self.capacity, index + 1)
+                    else:
+                        index = self._oldest()
+                self._slots[encoded] = index
+
+            offset = self._offset(index)
+            seq = SEQ.unpack_from(self._buf, offset)[0]
+            seq += seq & 1                                  # 上一個寫入者中途結束時留下的奇數
+            SEQ.pack_into(self._buf, offset, seq + 1)      # 奇數: 寫入中
+            RECORD.pack_into(self._buf, offset, seq + 1, encoded, money, total, wins, time.time())
+            SEQ.pack_into(self._buf, offset, seq + 2)      # 偶數: 寫入完成
+
+    def remove(self, name):
+        """
+        刪除一位玩家的紀錄 (最後一筆搬到空出的位置),回傳是否有刪除
+        """
+        encoded = _encode_name(name)
+        with self._lock:
+            index = self._find(encoded)
+            if index is None:
+                return False
+            self._slots.pop(encoded, None)
+            last = self._count() - 1
+            if index != last:
+                _, moved, money, total, wins, updated = RECORD.unpack_from(self._buf,
+                                                                         self._offset(last))
+                offset = self._offset(index)
+                seq = SEQ.unpack_from(self._buf, offset)[0]
+                seq += seq & 1
+                SEQ.pack_into(self._buf, offset, seq + 1)
+                RECORD.pack_into(self._buf, offset, seq + 1, moved, money, total, wins, updated)
+                SEQ.pack_into(self._buf, offset, seq + 2)
+                self._slots.pop(moved.rstrip(b'\0'), None)
+            HEADER.pack_into(self._buf, 0, FILE_MAGIC, self.capacity, last)
+            return True
+
+    def prune(self, prefix, keep=()):
+        """
+        刪除名字以 prefix 開頭、但不在 keep 之中的紀錄 (例如上一次錦標賽的機器人)
+
+        回傳:
+            刪除的筆數
+        """
+        keep = {_encode_name(name) for name in keep}
+        stale = [entry['name'] for entry in self.entries()
+                 if entry['name'].startswith(prefix) and _encode_name(entry['name']) not in keep]
+        return sum(self.remove(name) for name in stale)
+
+    def _warn(self, error):
+        if not self._warned:
+            self._warned = True
+            print(f"記分板無法使用,遊戲照常進行: {error}")
+
+    def publish(self, name, player_data):
+        """
+        以玩家資料字典更新 (欄位同 players.txt)
+
+        功能說明:
+            - 前端使用的介面: 失敗時只印出一次警告,不丟出例外
+        """
+        try:
+            self.update(name, player_data['money'], player_data['total'], player_data['wins'])
+        except (OSError, ValueError, RuntimeError) as e:
+            self._warn(e)
+
+    def entries(self):
+        """
+        所有玩家的紀錄 (dict 列表);一直在寫入中的紀錄 (寫入者中途結束) 略過
+        """
+        result = []
+        for index in range(self._count()):
+            try:
+                name, money, total, wins, updated = self.read(index)
+            except (RuntimeError, UnicodeDecodeError):
+                continue
+            result.append({'name': name, 'money': money, 'total': total, 'wins': wins,
+                           'updated': updated})
+        return result
+
+    def leaderboard(self, top=10, key='money'):
+        """
+        依金額 (或 total / wins) 由大到小排序的前 top 名 (讀取失敗時為空列表)
+        """
+        try:
+            entries = self.entries()
+        except (OSError, ValueError, RuntimeError) as e:
+            self._warn(e)
+            return []
+        return sorted(entries, key=lambda entry: -entry[key])[:top]
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self):
+        """
+        刪除共享記憶體 (其他行程已連接的仍可使用到關閉為止)
+        """
+        # open() 已取消 resource_tracker 的登記,unlink() 會再取消一次,先登記回去
+        try:
+            resource_tracker.register(self._shm._name, 'shared_memory')
+        except Exception:
+            pass
+        self._shm.unlink()
+
+
+def open_scoreboard():
+    """
+    依環境變數 BLACKJACK_SCOREBOARD 連接記分板,停用或失敗時回傳 None
+
+    功能說明:
+        - 記分板只是顯示用,連接失敗時印出警告,遊戲照常進行
+    """
+    name = os.environ.get(SCOREBOARD_ENV) or DEFAULT_NAME
+    if name == 'off':
+        return None
+    try:
+        return Scoreboard.open(name)
+    except (OSError, ValueError) as e:
+        print(f"記分板無法使用: {e}")
+        return None
+
+
+def format_leaderboard(entries):
+    lines = [f"{'名次':>4}  {'玩家':<12}{'金額':>10}{'場數':>8}{'勝率':>8}"]
+    for rank, entry in enumerate(entries, 1):
+        rate = entry['wins'] / entry['total'] if entry['total'] else 0.0
+        lines.append(f"{rank:>4}  {entry['name']:<12}{entry['money']:>10}{entry['total']:>8}"
+                     f"{rate:>8.1%}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="共享記憶體記分板")
+    sub = parser.add_subparsers(dest='command', required=True)
+    show = sub.add_parser('show', help="顯示排行榜")
+    show.add_argument('--top', type=int, default=10)
+    show.add_argument('--watch', type=float, default=None, metavar='SECONDS',
+                      help="每隔幾秒重新顯示")
+    sub.add_parser('clear', help="刪除記分板")
+    args = parser.parse_args(argv)
+
+    name = os.environ.get(SCOREBOARD_ENV) or DEFAULT_NAME
+    try:
+        board = Scoreboard.open(name)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    try:
+        if args.command == 'clear':
+            board.unlink()
+            print(f"已刪除記分板 {name}")
+            return 0
+        while True:
+            print(format_leaderboard(board.leaderboard(args.top)))
+            if args.watch is None:
+                return 0
+            time.sleep(args.watch)
+            print()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        board.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
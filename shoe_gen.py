@@ -0,0 +1,260 @@
+"""
+大量洗牌產生器
+
+create_deck() + shuffle_deck() 每局都要建立 52 個元組再呼叫 random.shuffle,
+在自動模擬中這是最耗時的部分。本模組一次產生大量洗好的牌 (shoe):
+
+    - 每副 shoe 是一列 uint8 (牌的編號 0~51,多副牌時重複),整批為二維陣列
+    - 有 numpy 時以 Generator.permuted 一次打亂整批 (每列獨立排列);
+      沒有 numpy 時退回 bytearray + random.shuffle
+    - 可寫入檔案並以 memory map 讀取,大型模擬可以重複使用完全相同的牌序
+
+牌的編號與 blackjack_sim.card_to_tuple 相同: 花色 = 編號 // 13, 點數索引 = 編號 % 13。
+
+指令列用法:
+    python shoe_gen.py generate shoes.bin --count 100000 --decks 1 --seed 42
+    python shoe_gen.py info shoes.bin
+"""
+import mmap
+import os
+import random
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為選用套件
+    np = None
+
+
+CARDS_PER_DECK = 52
+
+# 檔案格式: 標頭 (magic, 版本, shoe 數量, 每副 shoe 張數, 幾副牌) + 連續的 uint8 資料
+FILE_MAGIC = b'BJSHOE'
+FILE_VERSION = 1
+HEADER = struct.Struct('<6sHQII')
+
+# 牌編號 -> 點數索引 的轉換表 (bytes.translate 以 C 速度轉換整列)
+RANK_TABLE = bytes(i % 13 for i in range(256))
+
+
+def _base_shoe(num_decks):
+    return bytes(range(CARDS_PER_DECK)) * num_decks
+
+
+def generate_shoes(count, num_decks=1, seed=None, rng=None):
+    """
+    一次產生多副洗好的牌
+
+    參數:
+        count: 產生幾副
+        num_decks: 每副 shoe 由幾副牌組成
+        seed: 亂數種子 (未提供 rng 時使用)
+        rng: numpy Generator 或 random.Random (可沿用以產生連續的批次)
+
+    回傳:
+        有 numpy 時為 shape (count, 52 * num_decks) 的 uint8 陣列,
+        否則為 bytearray 列表
+    """
+    base = _base_shoe(num_decks)
+    if np is not None:
+        if rng is None:
+            rng = np.random.default_rng(seed)
+        shoes = np.tile(np.frombuffer(base, dtype=np.uint8), (count, 1))
+        return rng.permuted(shoes, axis=1, out=shoes)
+
+    if rng is None:
+        rng = random.Random(seed)
+    shoes = []
+    for _ in range(count):
+        shoe = bytearray(base)
+        rng.shuffle(shoe)
+        shoes.append(shoe)
+    return shoes
+
+
+def to_ranks(shoe):
+    """
+    將一副 shoe (牌編號) 轉成 blackjack_sim 使用的點數索引列表
+    """
+    return list(bytes(shoe).translate(RANK_TABLE))
+
+
+def shoe_stream(num_decks=1, seed=None, batch_size=4096, limit=None):
+    """
+    無限 (或 limit 副) 的洗好牌序串流,每次產生一個點數索引列表
+
+    參數:
+        num_decks: 每副 shoe 由幾副牌組成
+        seed: 亂數種子 (相同種子產生相同序列)
+        batch_size: 每次整批產生幾副
+        limit: 最多產生幾副 (None = 無限)
+
+    功能說明:
+        - 可直接傳給 strategy_compare.compare_variants(shoes=...)
+          或 blackjack_sim.estimate_ev(shoes=...)
+    """
+    rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+    produced = 0
+    while limit is None or produced < limit:
+        n = batch_size if limit is None else min(batch_size, limit - produced)
+        for shoe in generate_shoes(n, num_decks, rng=rng):
+            yield to_ranks(shoe)
+        produced += n
+
+
+# ======== 檔案存取 ========
+
+def write_shoe_file(path, count, num_decks=1, seed=None, batch_size=4096):
+    """
+    產生 count 副洗好的牌並寫入檔案 (分批產生,記憶體用量固定)
+
+    回傳:
+        寫入的 shoe 數量
+    """
+    shoe_size = CARDS_PER_DECK * num_decks
+    rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(HEADER.pack(FILE_MAGIC, FILE_VERSION, count, shoe_size, num_decks))
+            written = 0
+            while written < count:
+                n = min(batch_size, count - written)
+                shoes = generate_shoes(n, num_decks, rng=rng)
+                if np is not None:
+                    file.write(shoes.tobytes())
+                else:
+                    for shoe in shoes:
+                        file.write(shoe)
+                written += n
+        os.replace(tmp_path, path)
+    except BaseException:
+        # 寫到一半失敗 (磁碟已滿、中斷) 時不留下暫存檔
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return count
+
+
+class ShoeFile:
+    """
+    以 memory map 開啟的 shoe 檔案 (唯讀)
+
+    用法:
+        with ShoeFile('shoes.bin') as shoes:
+            for ranks in shoes.stream():
+                play_hand(ranks)
+
+    參數:
+        path: 檔案路徑
+        num_decks: 提供時檢查檔案的副數,不符時丟出 ValueError (避免結果標錯規則)
+    """
+
+    def __init__(self, path, num_decks=None):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空檔案無法 mmap
+            self._file.close()
+            raise ValueError(f"{path} 不是有效的 shoe 檔案") from None
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} 不是有效的 shoe 檔案")
+        magic, version, count, shoe_size, file_decks = HEADER.unpack_from(self._map, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            self.close()
+            raise ValueError(f"{path} 不是有效的 shoe 檔案")
+        if len(self._map) < HEADER.size + count * shoe_size:
+            self.close()
+            raise ValueError(f"{path} 檔案不完整")
+        if num_decks is not None and file_decks != num_decks:
+            self.close()
+            raise ValueError(f"{path} 是 {file_decks} 副牌的牌序,與規則的 {num_decks} 副牌不符")
+        self.count = count
+        self.shoe_size = shoe_size
+        self.num_decks = file_decks
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """
+        取得第 index 副 shoe 的牌編號 (bytes)
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        start = HEADER.size + index * self.shoe_size
+        return self._map[start:start + self.shoe_size]
+
+    def array(self):
+        """
+        回傳整份資料的 (count, shoe_size) uint8 陣列 (零複製,需要 numpy)
+        """
+        if np is None:
+            raise RuntimeError("需要 numpy")
+        return np.frombuffer(self._map, dtype=np.uint8, count=self.count * self.shoe_size,
+                             offset=HEADER.size).reshape(self.count, self.shoe_size)
+
+    def stream(self, start=0, limit=None):
+        """
+        依序產生點數索引列表 (見 shoe_stream)
+        """
+        stop = self.count if limit is None else min(self.count, start + limit)
+        for i in range(start, stop):
+            yield to_ranks(self[i])
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ======== 指令列介面 ========
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="大量產生洗好的牌")
+    sub = parser.add_subparsers(dest='command', required=True)
+    gen = sub.add_parser('generate', help="產生 shoe 檔案")
+    gen.add_argument('path')
+    gen.add_argument('--count', type=int, default=100000, help="幾副 shoe")
+    gen.add_argument('--decks', type=int, default=1, help="每副 shoe 的牌數 (副)")
+    gen.add_argument('--seed', type=int, default=None, help="亂數種子")
+    info = sub.add_parser('info', help="顯示 shoe 檔案資訊")
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        start = time.perf_counter()
+        try:
+            write_shoe_file(args.path, args.count, args.decks, args.seed)
+        except OSError as e:
+            print(e, file=sys.stderr)
+            return 1
+        elapsed = time.perf_counter() - start
+        print(f"已產生 {args.count} 副 shoe ({args.decks} 副牌) -> {args.path}, "
+              f"{elapsed:.2f} 秒")
+        return 0
+
+    try:
+        with ShoeFile(args.path) as shoes:
+            print(f"{args.path}: {len(shoes)} 副 shoe, 每副 {shoes.shoe_size} 張 "
+                  f"({shoes.num_decks} 副牌)")
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+模擬用的串流統計
+
+長時間模擬時,無法事先知道要跑幾局才夠。本模組提供可逐批更新的統計量:
+    - RunningStats: Welford 演算法的平均數/變異數,可合併整批資料
+    - BatchMeans: 以各批平均數估計標準誤 (資料彼此相關時也適用,例如同一副牌連續發牌)
+    - SimulationStats: 上述兩者加上各種結果的次數,並可判斷信賴區間是否已夠窄
+    - ProgressReporter: 定時印出每秒局數與目前的信賴區間
+
+所有統計量都只保存固定數量的數字,不會保留原始資料。
+"""
+import math
+import sys
+import time
+from statistics import NormalDist
+
+
+def z_value(confidence):
+    """
+    雙尾信心水準對應的 z 值 (0.95 -> 1.96)
+
+    功能說明:
+        - confidence 必須介於 0 與 1 之間 (不含),否則丟出 ValueError
+    """
+    if not 0 < confidence < 1:
+        raise ValueError(f"信心水準必須介於 0 與 1 之間: {confidence}")
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+class RunningStats:
+    """
+    Welford 線上平均數 / 變異數
+    """
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x):
+        """
+        加入一筆資料
+        """
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, n, mean, m2):
+        """
+        合併另一組統計量 (Chan 的平行演算法)
+
+        參數:
+            n: 該組資料筆數
+            mean: 該組平均數
+            m2: 該組離均差平方和
+        """
+        if n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.m2 = n, mean, m2
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    def update_batch(self, values):
+        """
+        一次加入一整批資料 (列表或 numpy 陣列),回傳該批的平均數
+        """
+        n = len(values)
+        if n == 0:
+            return None
+        if hasattr(values, 'var'):  # numpy 陣列直接向量化計算
+            mean = float(values.mean())
+            m2 = float(values.var()) * n
+        else:
+            mean = sum(values) / n
+            m2 = sum((x - mean) ** 2 for x in values)
+        self.merge(n, mean, m2)
+        return mean
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float('nan')
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.n > 1 else float('nan')
+
+    @property
+    def stderr(self):
+        return self.std / math.sqrt(self.n) if self.n > 1 else float('inf')
+
+
+class BatchMeans:
+    """
+    批次平均數法 (batch means) 估計標準誤
+
+    將每一批的平均數視為一筆資料,批次夠大時各批之間近似獨立。
+    """
+    __slots__ = ('batches',)
+
+    def __init__(self):
+        self.batches = RunningStats()
+
+    def add_batch_mean(self, mean):
+        self.batches.update(mean)
+
+    @property
+    def stderr(self):
+        return self.batches.stderr
+
+
+class SimulationStats:
+    """
+    模擬結果的整體統計: 每局輸贏 (以下注單位計) + 各結果次數
+
+    參數:
+        outcome_names: 結果名稱列表 (例如 blackjack_sim.OUTCOME_NAMES)
+        confidence: 信心水準 (例如 0.95;見 z_value)
+    """
+
+    def __init__(self, outcome_names=(), confidence=0.95):
+        self.outcome_names = list(outcome_names)
+        self.counts = [0] * len(self.outcome_names)
+        self.ev = RunningStats()
+        self.batch_means = BatchMeans()
+        self.z = z_value(confidence)
+        self.confidence = confidence
+
+    def update_batch(self, results, outcomes=None):
+        """
+        加入一批模擬結果
+
+        參數:
+            results: 每局的輸贏 (下注單位)
+            outcomes: 每局的結果代碼 (可省略)
+        """
+        if len(results) == 0:
+            return
+        self.batch_means.add_batch_mean(self.ev.update_batch(results))
+        if outcomes is not None:
+            counts = self.counts
+            for code in outcomes:
+                counts[code] += 1
+
+    @property
+    def hands(self):
+        return self.ev.n
+
+    def stderr(self):
+        """
+        EV 的標準誤: 取 Welford 與 batch means 兩者中較保守 (較大) 的值
+        """
+        se = self.ev.stderr
+        if self.batch_means.batches.n >= 10:
+            se = max(se, self.batch_means.stderr)
+        return se
+
+    def confidence_interval(self):
+        """
+        回傳 EV 的信賴區間 (下限, 上限)
+        """
+        half = self.z * self.stderr()
+        return self.ev.mean - half, self.ev.mean + half
+
+    def half_width(self):
+        return self.z * self.stderr()
+
+    def converged(self, target_half_width):
+        """
+        信賴區間半寬是否已小於目標
+        """
+        return self.ev.n > 1 and self.half_width() < target_half_width
+
+    def outcome_rates(self):
+        """
+        各結果的比例 {名稱: 比例}
+        """
+        total = sum(self.counts)
+        if total == 0:
+            return {name: 0.0 for name in self.outcome_names}
+        return {name: c / total for name, c in zip(self.outcome_names, self.counts)}
+
+    def summary(self):
+        """
+        文字摘要
+        """
+        low, high = self.confidence_interval()
+        lines = [
+            f"局數: {self.hands}",
+            f"EV (每單位下注): {self.ev.mean:+.5f}  "
+            f"{self.confidence:.0%} 信賴區間 [{low:+.5f}, {high:+.5f}]",
+        ]
+        if any(self.counts):
+            lines.append("結果比例: " + ", ".join(
+                f"{name} {p:.2%}" for name, p in self.outcome_rates().items()))
+        return "\n".join(lines)
+
+
+class ProgressReporter:
+    """
+    定時印出模擬進度 (每秒局數與目前信賴區間)
+
+    參數:
+        interval: 最少間隔幾秒印一次
+        stream: 輸出位置 (預設 stderr,避免與結果混在一起)
+    """
+
+    def __init__(self, interval=1.0, stream=None):
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.start = time.perf_counter()
+        self.last = self.start
+
+    def __call__(self, stats, force=False):
+        now = time.perf_counter()
+        if not force and now - self.last < self.interval:
+            return
+        self.last = now
+        elapsed = max(now - self.start, 1e-9)
+        low, high = stats.confidence_interval()
+        print(f"[進度] {stats.hands} 局, {stats.hands / elapsed:,.0f} 局/秒, "
+              f"EV {stats.ev.mean:+.5f} [{low:+.5f}, {high:+.5f}]",
+              file=self.stream)
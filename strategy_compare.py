@@ -0,0 +1,215 @@
+"""
+共同亂數 (common random numbers) 比較工具
+
+比較兩種策略,或 3:2 與 6:5 的 Blackjack 賠率時,若每個方案各自洗牌,
+牌運的差異會蓋過方案本身的差異,需要極多局才看得出結果。
+
+本工具每局只洗一次牌,把同一副牌的複本依序發給所有方案 (lockstep),
+再以「同一副牌上的結果差」(paired difference) 估計差異及其標準誤。
+因為牌運對各方案的影響大多互相抵銷,需要的局數通常少一個數量級以上。
+
+指令列用法:
+    python strategy_compare.py --hands 200000 --variant mimic:1.5 --variant basic:1.5
+    python strategy_compare.py --variant basic:1.5 --variant basic:1.2 --variant basic:1.0
+    python strategy_compare.py --variant chart:1.5:double,split --variant chart:1.5:h17,double,split
+"""
+import math
+import sys
+
+from blackjack_sim import make_hand_player, resolve_strategy, settle
+from shoe_gen import ShoeFile, shoe_stream
+from sim_stats import RunningStats, z_value
+from table_rules import PYGAME_RULES, create_rules, play_key
+
+# 指令列方案描述中可用的規則旗標
+RULE_FLAGS = {
+    'h17': 'dealer_hits_soft_17',
+    'peek': 'dealer_peek',
+    'double': 'double',
+    'split': 'split',
+    'surrender': 'surrender',
+}
+
+
+def create_variant(name, strategy, rules=PYGAME_RULES):
+    """
+    建立一個比較方案
+
+    參數:
+        name: 顯示名稱
+        strategy: 玩家策略 (策略函數或 CompiledStrategy)
+        rules: 規則字典 (table_rules.create_rules)
+
+    回傳:
+        方案字典
+    """
+    return {
+        'name': name,
+        'strategy': strategy,
+        'rules': rules,
+    }
+
+
+def parse_variant(text):
+    """
+    解析指令列的方案描述 "策略:賠率[:規則旗標,...]",例如 "basic:1.5" 或 "chart:1.2:h17,double"
+
+    功能說明:
+        - 策略可以是 blackjack_sim.resolve_strategy 接受的任何名稱 (含 .bjs 策略表檔案)
+        - 規則旗標: h17, peek, double, split, surrender
+    """
+    strategy_name, _, rest = text.partition(':')
+    payout, _, flags = rest.partition(':')
+    overrides = {'blackjack_payout': float(payout or 1.5)}
+    for flag in filter(None, flags.split(',')):
+        if flag not in RULE_FLAGS:
+            raise ValueError(f"未知的規則旗標: {flag} (可用: {', '.join(RULE_FLAGS)})")
+        overrides[RULE_FLAGS[flag]] = True
+    rules = create_rules(**overrides)
+    return create_variant(text, resolve_strategy(strategy_name, rules), rules)
+
+
+def _strategy_key(strategy):
+    # 內容相同的策略表視為同一個策略
+    actions = getattr(strategy, 'actions', None)
+    return bytes(actions) if actions is not None else id(strategy)
+
+
+def compare_variants(variants, hands=100000, seed=None, shoes=None):
+    """
+    以相同的牌序比較多個方案
+
+    參數:
+        variants: create_variant 建立的方案列表,第一個為基準
+        hands: 比較局數
+        seed: 亂數種子
+        shoes: 預先洗好的牌序來源 (可迭代,每次產生一副點數索引列表);
+               預設為 shoe_gen.shoe_stream (整批洗牌)
+
+    回傳:
+        結果字典:
+            'hands'        實際比較的局數
+            'ev'           每個方案的 RunningStats (每單位下注的輸贏)
+            'diff'         每個方案相對於基準的成對差 RunningStats (基準本身為 None)
+
+    功能說明:
+        - 策略相同、只有賠率不同的方案,在同一副牌上的打法完全相同,
+          因此每副牌只模擬一次,再依各方案的賠率表分別結算;
+          掃描多種賠率的成本與只跑一種相同
+    """
+    if not variants:
+        raise ValueError("至少需要一個方案")
+    if hands < 1:
+        raise ValueError("比較局數至少為 1")
+    num_decks = variants[0]['rules']['num_decks']
+    if any(v['rules']['num_decks'] != num_decks for v in variants):
+        raise ValueError("所有方案必須使用相同副數的牌")
+    if shoes is None:
+        shoes = shoe_stream(num_decks, seed=seed, limit=hands)
+
+    # 依 (策略, 打法規則) 分組,每組每副牌只打一次
+    groups = {}
+    plans = []
+    settle_plan = []
+    for v in variants:
+        key = (_strategy_key(v['strategy']), play_key(v['rules']))
+        if key not in groups:
+            groups[key] = len(plans)
+            plans.append((make_hand_player(v['rules']), v['strategy']))
+        settle_plan.append((groups[key], v['rules']['payouts']))
+
+    ev = [RunningStats() for _ in variants]
+    diff = [None] + [RunningStats() for _ in variants[1:]]
+    single = len(plans) == 1
+
+    played = 0
+    for shoe in shoes:
+        if played >= hands:
+            break
+        if single:
+            outcomes = [plans[0][0](shoe, plans[0][1])]
+        else:
+            outcomes = [play(list(shoe), strategy) for play, strategy in plans]
+        results = [settle(outcomes[g], payouts) for g, payouts in settle_plan]
+        base = results[0]
+        ev[0].update(base)
+        for i in range(1, len(results)):
+            ev[i].update(results[i])
+            diff[i].update(results[i] - base)
+        played += 1
+
+    return {'hands': played, 'variants': variants, 'ev': ev, 'diff': diff}
+
+
+def format_comparison(result, confidence=0.95):
+    """
+    將 compare_variants 的結果整理成文字報告
+
+    功能說明:
+        - 列出每個方案的 EV
+        - 列出與基準的成對差、標準誤,以及「獨立洗牌時」的標準誤,
+          兩者比值的平方約等於共同亂數節省的局數倍數
+        - 沒有比較任何一局時 (例如牌序檔是空的) 只印出局數
+    """
+    z = z_value(confidence)
+    variants = result['variants']
+    ev = result['ev']
+    base_name = variants[0]['name']
+    lines = ["=" * 60, f"比較局數: {result['hands']} (基準: {base_name})"]
+    if result['hands'] == 0:
+        lines.append("  沒有可比較的牌局")
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+    for variant, stats in zip(variants, ev):
+        lines.append(f"  {variant['name']:<20} EV {stats.mean:+.5f} ± {z * stats.stderr:.5f}")
+
+    lines.append("-" * 60)
+    for i in range(1, len(variants)):
+        d = result['diff'][i]
+        independent_se = math.sqrt(ev[0].variance / ev[0].n + ev[i].variance / ev[i].n)
+        paired_se = d.stderr
+        lines.append(
+            f"  {variants[i]['name']} - {base_name}: {d.mean:+.5f} ± {z * paired_se:.5f}"
+            f"  (成對標準誤 {paired_se:.5f}, 獨立洗牌 {independent_se:.5f},"
+            f" 約省 {(independent_se / paired_se) ** 2 if paired_se > 0 else float('inf'):.1f} 倍局數)")
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+
+# ======== 指令列介面 ========
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="以相同牌序比較策略與賠率")
+    parser.add_argument('--variant', action='append', default=[],
+                        help="方案 策略:賠率[:規則旗標,...],可重複指定 (第一個為基準)")
+    parser.add_argument('--hands', type=int, default=100000, help="比較局數")
+    parser.add_argument('--seed', type=int, default=None, help="亂數種子")
+    parser.add_argument('--shoe-file', default=None, help="使用 shoe_gen.py 產生的牌序檔")
+    args = parser.parse_args(argv)
+    if args.hands < 1:
+        parser.error("比較局數至少為 1")
+
+    try:
+        variants = [parse_variant(v) for v in (args.variant or ['mimic:1.5', 'basic:1.5'])]
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.shoe_file:
+        try:
+            shoe_file = ShoeFile(args.shoe_file, variants[0]['rules']['num_decks'])
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 1
+        with shoe_file:
+            result = compare_variants(variants, args.hands, shoes=shoe_file.stream())
+    else:
+        result = compare_variants(variants, args.hands, args.seed)
+    print(format_comparison(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+"""
+策略查表 (strategy lookup table)
+
+以 Python 條件判斷執行策略,每次決策都要走過好幾個 if。本模組把策略「編譯」成
+一個平坦的 bytes 陣列,以 (玩家點數, 是否軟牌, 對子點數, 莊家明牌) 為索引:
+
+    索引 = ((點數 * 2 + 軟牌) * PAIR_SIZE + 對子) * UP_SIZE + 莊家明牌
+
+    點數: 0~21 (實際使用 4~21)
+    軟牌: 0 / 1
+    對子: 0 = 不是對子, 1 = 一對 A, 2~10 = 一對該點數 (J/Q/K 算 10)
+    莊家明牌: 2~11 (A 為 11,與 get_card_value 相同)
+
+每格存一個動作字元: H 要牌, S 停牌, D 加倍, P 分牌, R 投降。
+單次決策只需一次索引;有 numpy 時,整批決策是一次 fancy indexing。
+
+策略來源可以是:
+    - 策略函數 (例如 blackjack_sim.simple_basic_strategy) -> compile_strategy()
+    - 基本策略表 CSV (見 BASIC_STRATEGY_CHART) -> parse_chart() / load_chart()
+    - EV 求解器輸出的 {(點數, 軟牌, 對子, 明牌): 動作} -> from_decisions()
+
+指令列用法:
+    python strategy_table.py compile basic.csv basic.bjs
+    python strategy_table.py validate basic.bjs
+"""
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # numpy 為選用套件
+    np = None
+
+
+# 動作代碼 (以 ASCII 字元儲存,檔案可直接閱讀)
+HIT = ord('H')
+STAND = ord('S')
+DOUBLE = ord('D')
+SPLIT = ord('P')
+SURRENDER = ord('R')
+EMPTY = 0
+ACTIONS = 'HSDPR'
+
+# player_turn 只提供要牌 / 停牌
+PLAYER_TURN_ACTIONS = 'HS'
+
+TOTAL_SIZE = 22
+SOFT_SIZE = 2
+PAIR_SIZE = 11
+UP_SIZE = 12
+TABLE_SIZE = TOTAL_SIZE * SOFT_SIZE * PAIR_SIZE * UP_SIZE
+
+DEALER_UPCARDS = range(2, 12)
+
+# 檔案格式: magic + 版本 + 各維度大小 + 動作表
+FILE_MAGIC = b'BJSTRAT'
+FILE_VERSION = 1
+HEADER = struct.Struct('<7sBBBBB')
+
+
+def table_index(total, soft, pair, dealer_up):
+    """
+    計算查表索引
+    """
+    return ((total * 2 + soft) * PAIR_SIZE + pair) * UP_SIZE + dealer_up
+
+
+def pair_total(pair):
+    """
+    對子的兩張牌點數與是否軟牌 (一對 A 為軟 12)
+    """
+    if pair == 1:
+        return 12, 1
+    return pair * 2, 0
+
+
+def iter_cells():
+    """
+    依序產生所有實際會遇到的格子 (點數, 軟牌, 對子, 明牌)
+
+    功能說明:
+        - 非對子: 硬牌 4~21、軟牌 12~21
+        - 對子: 一對 A ~ 一對 10 (點數由對子決定)
+    """
+    for up in DEALER_UPCARDS:
+        for total in range(4, 22):
+            yield total, 0, 0, up
+        for total in range(12, 22):
+            yield total, 1, 0, up
+        for pair in range(1, 11):
+            total, soft = pair_total(pair)
+            yield total, soft, pair, up
+
+
+class CompiledStrategy:
+    """
+    編譯後的策略表
+
+    可直接當成 blackjack_sim 的策略函數使用:
+        play_hand(shoe, compiled)   # compiled(total, soft, dealer_up) -> 是否要牌
+
+    會遇到的格子都必須有動作 (from_decisions 與 resolve_strategy 會檢查);
+    EMPTY 只出現在不會遇到的格子,查表時不另做判斷。
+    """
+    __slots__ = ('actions', 'name')
+
+    def __init__(self, actions=None, name=""):
+        self.actions = bytearray(TABLE_SIZE) if actions is None else bytearray(actions)
+        if len(self.actions) != TABLE_SIZE:
+            raise ValueError(f"策略表大小應為 {TABLE_SIZE},實際為 {len(self.actions)}")
+        self.name = name
+
+    def set(self, total, soft, pair, dealer_up, action):
+        """
+        設定一格;索引超出範圍時丟出 ValueError (避免寫到相鄰的格子)
+        """
+        if not 0 <= total < TOTAL_SIZE:
+            raise ValueError(f"點數 {total} 超出範圍 0~{TOTAL_SIZE - 1}")
+        if soft not in (0, 1):
+            raise ValueError(f"軟牌應為 0 或 1,實際為 {soft}")
+        if not 0 <= pair < PAIR_SIZE:
+            raise ValueError(f"對子 {pair} 超出範圍 0~{PAIR_SIZE - 1}")
+        if dealer_up not in DEALER_UPCARDS:
+            raise ValueError(f"莊家明牌 {dealer_up} 超出範圍 2~11")
+        self.actions[table_index(total, soft, pair, dealer_up)] = ord(action)
+
+    def decide(self, total, soft, dealer_up, pair=0):
+        """
+        單次決策,回傳動作字元 ('H' / 'S' / 'D' / 'P' / 'R')
+        """
+        return chr(self.actions[((total * 2 + soft) * PAIR_SIZE + pair) * UP_SIZE + dealer_up])
+
+    def __call__(self, total, soft, dealer_up):
+        # blackjack_sim 的策略介面: 回傳是否要牌
+        return self.actions[(total * 2 + soft) * PAIR_SIZE * UP_SIZE + dealer_up] == HIT
+
+    def decide_many(self, totals, softs, dealer_ups, pairs=None):
+        """
+        整批決策
+
+        參數:
+            totals / softs / dealer_ups / pairs: 等長的序列 (有 numpy 時可傳 ndarray)
+
+        回傳:
+            動作字元組成的字串 (第 i 個字元為第 i 個決策;有 numpy 時以向量化查表)
+        """
+        if np is not None:
+            totals = np.asarray(totals, dtype=np.intp)
+            softs = np.asarray(softs, dtype=np.intp)
+            ups = np.asarray(dealer_ups, dtype=np.intp)
+            pairs = np.zeros_like(totals) if pairs is None else np.asarray(pairs, dtype=np.intp)
+            index = ((totals * 2 + softs) * PAIR_SIZE + pairs) * UP_SIZE + ups
+            codes = np.frombuffer(bytes(self.actions), dtype=np.uint8)[index]
+            return codes.tobytes().decode('ascii')
+        if pairs is None:
+            pairs = [0] * len(totals)
+        actions = self.actions
+        return "".join(chr(actions[table_index(t, int(s), p, u)])
+                       for t, s, p, u in zip(totals, softs, pairs, dealer_ups))
+
+    def restricted(self, allowed=PLAYER_TURN_ACTIONS):
+        """
+        回傳只使用 allowed 動作的新策略表
+
+        功能說明:
+            - D 加倍 -> 軟 18 以上停牌,其餘要牌
+            - R 投降 -> 要牌
+            - P 分牌 -> 改查同點數的非對子格
+        """
+        result = CompiledStrategy(self.actions, self.name)
+        for total, soft, pair, up in iter_cells():
+            i = table_index(total, soft, pair, up)
+            action = chr(self.actions[i])
+            if pair and action == 'P' and 'P' not in allowed:
+                action = chr(self.actions[table_index(total, soft, 0, up)])
+            if action == 'D' and 'D' not in allowed:
+                action = 'S' if soft and total >= 18 else 'H'
+            if action == 'R' and 'R' not in allowed:
+                action = 'H'
+            result.actions[i] = ord(action)
+        return result
+
+    # ---- 檔案存取 ----
+
+    def to_bytes(self):
+        return HEADER.pack(FILE_MAGIC, FILE_VERSION, TOTAL_SIZE, SOFT_SIZE,
+                           PAIR_SIZE, UP_SIZE) + bytes(self.actions)
+
+    @classmethod
+    def from_bytes(cls, data, name=""):
+        """
+        to_bytes 的反向操作,格式錯誤或資料不完整時丟出 ValueError
+        """
+        if len(data) < HEADER.size:
+            raise ValueError("不是有效的策略表檔案")
+        magic, version, *dims = HEADER.unpack_from(data, 0)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ValueError("不是有效的策略表檔案")
+        if dims != [TOTAL_SIZE, SOFT_SIZE, PAIR_SIZE, UP_SIZE]:
+            raise ValueError(f"策略表維度不符: {dims}")
+        if len(data) < HEADER.size + TABLE_SIZE:
+            raise ValueError("策略表檔案不完整")
+        return cls(data[HEADER.size:HEADER.size + TABLE_SIZE], name)
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read(), name=path)
+
+
+# ======== 編譯 ========
+
+def compile_strategy(func, name=""):
+    """
+    將 blackjack_sim 形式的策略函數編譯成策略表
+
+    參數:
+        func: func(total, soft, dealer_up) -> 是否要牌
+
+    功能說明:
+        - 對子格與同點數的非對子格相同 (策略函數不分牌)
+    """
+    table = CompiledStrategy(name=name or getattr(func, '__name__', ''))
+    for total, soft, pair, up in iter_cells():
+        table.set(total, soft, pair, up, 'H' if func(total, bool(soft), up) else 'S')
+    return table
+
+
+def from_decisions(decisions, name=""):
+    """
+    由 {(點數, 軟牌, 對子, 明牌): 動作字元} 建立策略表 (例如 EV 求解器的輸出)
+
+    功能說明:
+        - 動作未知、索引超出範圍,或有會遇到的格子沒有動作時丟出 ValueError
+    """
+    table = CompiledStrategy(name=name)
+    for (total, soft, pair, up), action in decisions.items():
+        if action not in ACTIONS:
+            raise ValueError(f"未知的動作: {action}")
+        table.set(total, int(soft), pair, up, action)
+    missing = [cell for cell in iter_cells() if table.actions[table_index(*cell)] == EMPTY]
+    if missing:
+        total, soft, pair, up = missing[0]
+        raise ValueError(f"有 {len(missing)} 格沒有動作 (例如 點數 {total}, 軟牌 {soft}, "
+                         f"對子 {pair}, 明牌 {up})")
+    return table
+
+
+def _parse_upcard(text):
+    text = text.strip().upper()
+    if text == 'A':
+        return 11
+    if text in ('T', 'J', 'Q', 'K'):
+        return 10
+    if not text.isdigit() or not 2 <= int(text) <= 10:
+        raise ValueError(f"無效的點數 {text}")
+    return int(text)
+
+
+def _parse_total(text, low_limit):
+    # 點數欄: 單一點數或範圍 (例如 13-16),必須介於 low_limit~21
+    low, _, high = text.partition('-')
+    if not low.isdigit() or not (high or low).isdigit():
+        raise ValueError(f"無效的點數 {text}")
+    low, high = int(low), int(high or low)
+    if not low_limit <= low <= high <= 21:
+        raise ValueError(f"點數 {text} 超出範圍 {low_limit}~21")
+    return range(low, high + 1)
+
+
+def _parse_chart_row(parts, upcards):
+    # 一列策略 -> ([(點數, 軟牌, 對子), ...], 動作列表)
+    if len(parts) < 3:
+        raise ValueError("欄位不足 (應為 類型,點數,動作...)")
+    kind, label, actions = parts[0], parts[1], parts[2:]
+    if len(actions) != len(upcards):
+        raise ValueError(f"應有 {len(upcards)} 個動作")
+    for action in actions:
+        if action not in ACTIONS:
+            raise ValueError(f"未知的動作 {action}")
+
+    if kind == 'pair':
+        pair = 1 if label.upper() == 'A' else _parse_upcard(label)
+        total, soft = pair_total(pair)
+        return [(total, soft, pair)], actions
+    if kind == 'hard':
+        return [(t, 0, 0) for t in _parse_total(label, 4)], actions
+    if kind == 'soft':
+        return [(t, 1, 0) for t in _parse_total(label, 12)], actions
+    raise ValueError(f"未知的類型 {kind}")
+
+
+def parse_chart(text, name=""):
+    """
+    解析基本策略表 CSV
+
+    格式:
+        - 第一列 (可省略): type,total,2,3,4,5,6,7,8,9,10,A
+        - hard,點數,...  硬牌
+        - soft,點數,...  軟牌 (點數為總點數,例如 A,7 為 soft,18)
+        - pair,點數,...  對子 (A 或 2~10)
+        - 點數欄可寫範圍,例如 hard,13-16,...
+        - # 開頭的行為註解
+        - 欄位不足、點數或動作無效時丟出 ValueError (訊息含行號)
+    """
+    table = CompiledStrategy(name=name)
+    upcards = list(DEALER_UPCARDS)
+    for line_no, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = [p.strip() for p in line.split(',')]
+        try:
+            if parts[0] == 'type':
+                upcards = [_parse_upcard(p) for p in parts[2:]]
+                continue
+            cells, actions = _parse_chart_row(parts, upcards)
+        except ValueError as e:
+            raise ValueError(f"第 {line_no} 行: {e}") from None
+
+        for total, soft, pair in cells:
+            for up, action in zip(upcards, actions):
+                table.set(total, soft, pair, up, action)
+    return table
+
+
+def load_chart(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return parse_chart(file.read(), name=path)
+
+
+# 基本策略表 (多副牌、莊家軟 17 停牌、分牌後可加倍)
+BASIC_STRATEGY_CHART = """\
+type,total,2,3,4,5,6,7,8,9,10,A
+hard,4-8,H,H,H,H,H,H,H,H,H,H
+hard,9,H,D,D,D,D,H,H,H,H,H
+hard,10,D,D,D,D,D,D,D,D,H,H
+hard,11,D,D,D,D,D,D,D,D,D,H
+hard,12,H,H,S,S,S,H,H,H,H,H
+hard,13-14,S,S,S,S,S,H,H,H,H,H
+hard,15,S,S,S,S,S,H,H,H,R,H
+hard,16,S,S,S,S,S,H,H,R,R,R
+hard,17-21,S,S,S,S,S,S,S,S,S,S
+soft,12,H,H,H,H,H,H,H,H,H,H
+soft,13-14,H,H,H,D,D,H,H,H,H,H
+soft,15-16,H,H,D,D,D,H,H,H,H,H
+soft,17,H,D,D,D,D,H,H,H,H,H
+soft,18,S,D,D,D,D,S,S,H,H,H
+soft,19-21,S,S,S,S,S,S,S,S,S,S
+pair,A,P,P,P,P,P,P,P,P,P,P
+pair,2,P,P,P,P,P,P,H,H,H,H
+pair,3,P,P,P,P,P,P,H,H,H,H
+pair,4,H,H,H,P,P,H,H,H,H,H
+pair,5,D,D,D,D,D,D,D,D,H,H
+pair,6,P,P,P,P,P,H,H,H,H,H
+pair,7,P,P,P,P,P,P,H,H,H,H
+pair,8,P,P,P,P,P,P,P,P,P,P
+pair,9,P,P,P,P,P,S,P,P,S,S
+pair,10,S,S,S,S,S,S,S,S,S,S
+"""
+
+
+def basic_strategy(allowed=PLAYER_TURN_ACTIONS):
+    """
+    回傳內建基本策略表,並限制在 allowed 動作內 (預設只有要牌/停牌)
+    """
+    return parse_chart(BASIC_STRATEGY_CHART, name="basic").restricted(allowed)
+
+
+# ======== 驗證 ========
+
+def validate(table, allowed=PLAYER_TURN_ACTIONS):
+    """
+    檢查策略表是否符合遊戲規則
+
+    參數:
+        table: CompiledStrategy
+        allowed: 規則允許的動作 (player_turn 只有 'HS')
+
+    回傳:
+        問題列表 (空列表表示通過)
+
+    功能說明:
+        - 每個會遇到的格子都必須有動作
+        - 動作必須是規則允許的
+        - 分牌只能出現在對子格
+        - 21 點要牌一定爆牌以外的結果都比停牌差,視為錯誤
+        - 莊家明牌必須涵蓋 2~A (dealer_turn 發出的任何明牌)
+    """
+    problems = []
+    for total, soft, pair, up in iter_cells():
+        code = table.actions[table_index(total, soft, pair, up)]
+        where = f"{'pair ' + str(pair) if pair else ('soft' if soft else 'hard')} {total} vs {up}"
+        if code == EMPTY:
+            problems.append(f"{where}: 沒有設定動作")
+            continue
+        action = chr(code)
+        if action not in ACTIONS:
+            problems.append(f"{where}: 未知的動作 {action!r}")
+        elif action not in allowed:
+            problems.append(f"{where}: 規則不允許動作 {action}")
+        elif action == 'P' and not pair:
+            problems.append(f"{where}: 非對子不能分牌")
+        elif total == 21 and action != 'S':
+            problems.append(f"{where}: 21 點應該停牌")
+    return problems
+
+
+# ======== 指令列介面 ========
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="策略表編譯與驗證")
+    sub = parser.add_subparsers(dest='command', required=True)
+    comp = sub.add_parser('compile', help="將策略 CSV 編譯成策略表檔案")
+    comp.add_argument('chart', help="策略 CSV (或 'basic' 使用內建基本策略)")
+    comp.add_argument('output')
+    comp.add_argument('--allowed', default=PLAYER_TURN_ACTIONS, help="允許的動作 (預設 HS)")
+    val = sub.add_parser('validate', help="驗證策略表檔案")
+    val.add_argument('path')
+    val.add_argument('--allowed', default=PLAYER_TURN_ACTIONS, help="允許的動作 (預設 HS)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'compile':
+            if args.chart == 'basic':
+                table = basic_strategy(args.allowed)
+            else:
+                table = load_chart(args.chart).restricted(args.allowed)
+            table.save(args.output)
+            print(f"已寫入策略表 -> {args.output}")
+        else:
+            table = CompiledStrategy.load(args.path)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    problems = validate(table, args.allowed)
+    for problem in problems:
+        print(f"  {problem}", file=sys.stderr)
+    if problems:
+        print(f"共 {len(problems)} 個問題", file=sys.stderr)
+        return 2
+    print("驗證通過")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+牌桌規則設定
+
+原本的規則散落在各個前端,而且彼此不一致:
+    - blackjack.py: Blackjack 透過 update_game_result(..., True) 以 1:1 賠付
+    - blackjack_pygame.py: game_over 以 int(self.bet * 1.5) 賠付 3:2
+    - 兩者都是莊家軟 17 停牌,沒有加倍、分牌、投降
+
+create_rules() 建立單一的規則字典,供模擬引擎、模擬器與兩個前端共用。
+建立時就預先算好查表,執行時不必再做規則判斷:
+
+    'dealer_hits'   以 點數 * 2 + 軟牌 為索引,莊家是否要牌 (H17 / S17)
+    'settlement'    以 (玩家結果, 莊家結果) 為索引的結果代碼
+    'payouts'       結果代碼 -> 每單位下注的輸贏
+    'actions'       玩家可用的動作字元 (H/S/D/P/R)
+
+用法:
+    rules = create_rules(dealer_hits_soft_17=True, blackjack_payout=1.2)
+    while dealer_should_hit(rules, total, soft):
+        ...
+"""
+import sys
+
+import artifact_cache
+import hand_index
+
+# 結果代碼 (與 blackjack_sim 相同)
+OUTCOME_BLACKJACK = 0
+OUTCOME_WIN = 1
+OUTCOME_PUSH = 2
+OUTCOME_LOSE = 3
+OUTCOME_SURRENDER = 4
+OUTCOME_NAMES = ['blackjack', 'win', 'push', 'lose', 'surrender']
+
+# 結算表中「點數」以外的兩個特殊值
+BUST = 22
+NATURAL = 23
+SETTLE_SIZE = 24
+
+# dealer_hits 表涵蓋的最大點數 (硬 16 再拿 10 點 = 26)
+MAX_TOTAL = 31
+
+DEALER_STAND = 17
+
+# 一張牌桌最多幾個座位
+MAX_SEATS = 7
+
+# 規則欄位與預設值 (預設即目前 blackjack_pygame.py 的規則)
+DEFAULT_RULES = {
+    'num_decks': 1,                 # 每局用幾副牌
+    'dealer_hits_soft_17': False,   # False = S17 (莊家軟 17 停牌), True = H17
+    'blackjack_payout': 1.5,        # Blackjack 賠率: 1.5 = 3:2, 1.2 = 6:5, 1.0 = 平賠
+    'dealer_peek': False,           # 莊家先檢查 Blackjack (False = 目前的規則,玩家 21 點直接獲勝)
+    'double': False,                # 前兩張牌可加倍
+    'split': False,                 # 對子可分牌 (只能分一次)
+    'surrender': False,             # 前兩張牌可投降 (輸一半)
+    'min_bet': 10,                  # 最低下注
+}
+# 保險 (insurance) 不列為規則: 它是莊家明牌 A 時另外下的邊注,兩個前端都沒有提供,
+# 模擬的策略 (基本策略) 也一律不買保險,設成規則不會有任何效果
+
+# 影響「怎麼打」的欄位 (不含賠率);相同時同一副牌的打法完全相同,只有結算不同
+PLAY_FIELDS = ('num_decks', 'dealer_hits_soft_17', 'dealer_peek', 'double', 'split', 'surrender')
+
+
+def _build_dealer_hits(hits_soft_17):
+    """
+    莊家要牌表: 點數 < 17 要牌;H17 時軟 17 也要牌
+    """
+    table = bytearray((MAX_TOTAL + 1) * 2)
+    for total in range(MAX_TOTAL + 1):
+        for soft in (0, 1):
+            hit = total < DEALER_STAND or (hits_soft_17 and soft and total == DEALER_STAND)
+            table[total * 2 + soft] = 1 if hit else 0
+    return bytes(table)
+
+
+def _build_settlement(dealer_peek):
+    """
+    結算表: settlement[玩家 * SETTLE_SIZE + 莊家] = 結果代碼
+
+    玩家 / 莊家的值為最終點數 (0~21)、BUST 或 NATURAL (前兩張 21 點)
+
+    功能說明:
+        - 玩家爆牌一定輸 (玩家先行動)
+        - 沒有 peek 時 (目前規則): 玩家 Blackjack 直接獲勝,
+          莊家的 Blackjack 只當作 21 點比大小
+        - 有 peek 時: 雙方 Blackjack 平手,莊家 Blackjack 勝過其他所有手牌
+    """
+    table = bytearray(SETTLE_SIZE * SETTLE_SIZE)
+    for player in range(SETTLE_SIZE):
+        for dealer in range(SETTLE_SIZE):
+            if player == BUST:
+                outcome = OUTCOME_LOSE
+            elif player == NATURAL:
+                outcome = OUTCOME_PUSH if dealer_peek and dealer == NATURAL else OUTCOME_BLACKJACK
+            elif dealer == NATURAL and dealer_peek:
+                outcome = OUTCOME_LOSE
+            else:
+                d = 21 if dealer == NATURAL else dealer
+                if dealer == BUST or player > d:
+                    outcome = OUTCOME_WIN
+                elif player < d:
+                    outcome = OUTCOME_LOSE
+                else:
+                    outcome = OUTCOME_PUSH
+            table[player * SETTLE_SIZE + dealer] = outcome
+    return bytes(table)
+
+
+def create_rules(**overrides):
+    """
+    建立規則字典
+
+    參數:
+        overrides: 要覆寫的規則欄位 (見 DEFAULT_RULES)
+
+    回傳:
+        規則字典,另含預先計算好的查表
+
+    功能說明:
+        - 不認得的欄位直接丟出 ValueError,避免拼錯字默默被忽略
+    """
+    unknown = set(overrides) - set(DEFAULT_RULES)
+    if unknown:
+        raise ValueError(f"未知的規則: {', '.join(sorted(unknown))}")
+    rules = dict(DEFAULT_RULES)
+    rules.update(overrides)
+    if rules['num_decks'] < 1:
+        raise ValueError("至少要一副牌")
+    if rules['blackjack_payout'] < 1:
+        raise ValueError("Blackjack 賠率不得低於 1:1")
+
+    actions = 'HS'
+    if rules['double']:
+        actions += 'D'
+    if rules['split']:
+        actions += 'P'
+    if rules['surrender']:
+        actions += 'R'
+
+    rules['dealer_hits'] = _build_dealer_hits(rules['dealer_hits_soft_17'])
+    rules['settlement'] = _build_settlement(rules['dealer_peek'])
+    rules['payouts'] = (rules['blackjack_payout'], 1.0, 0.0, -1.0, -0.5)
+    rules['actions'] = actions
+    return rules
+
+
+def rules_settings(rules):
+    """
+    只取出規則欄位 (不含預先計算的查表),可用於顯示、比較或當作快取的鍵
+    """
+    return {key: rules[key] for key in DEFAULT_RULES}
+
+
+def play_key(rules):
+    """
+    影響打法的規則組合;相同 play_key 的規則可以共用同一次模擬,只重新結算
+    """
+    return tuple(rules[key] for key in PLAY_FIELDS)
+
+
+def dealer_should_hit(rules, total, soft):
+    """
+    莊家是否要牌 (查表)
+
+    參數:
+        rules: 規則字典
+        total: 莊家目前點數 (已調整 A)
+        soft: 是否為軟牌
+    """
+    if total > MAX_TOTAL:
+        return False
+    return rules['dealer_hits'][total * 2 + (1 if soft else 0)] == 1
+
+
+def blackjack_winnings(rules, bet):
+    """
+    Blackjack 贏得的金額 (與 game_over 相同,以 int() 無條件捨去)
+    """
+    return int(bet * rules['blackjack_payout'])
+
+
+def bankruptcy_subsidy(rules):
+    """
+    破產補助金額 (持有金額 <= 0 時,下一局開始前補到此金額)
+
+    功能說明:
+        - 剛好夠下一局的最低下注;預設規則為 $10,與原本兩個前端相同
+    """
+    return rules['min_bet']
+
+
+def describe_rules(rules):
+    """
+    規則的簡短說明,例如 "S17, BJ 3:2, 1 副牌"
+    """
+    payout = rules['blackjack_payout']
+    payout_text = {1.5: '3:2', 1.2: '6:5', 1.0: '1:1'}.get(payout, f'{payout}x')
+    parts = ['H17' if rules['dealer_hits_soft_17'] else 'S17',
+             f"BJ {payout_text}", f"{rules['num_decks']} 副牌"]
+    for key, label in (('dealer_peek', 'peek'), ('double', 'double'), ('split', 'split'),
+                       ('surrender', 'surrender')):
+        if rules[key]:
+            parts.append(label)
+    return ", ".join(parts)
+
+
+# ======== 莊家結果機率 (無限副牌) ========
+
+# 無限副牌時每種點數的機率: A, 2~9 各 1/13, 10 點 4/13 (順序同 hand_index 的類別)
+CARD_PROBS = [(11, 1 / 13)] + [(v, 1 / 13) for v in range(2, 10)] + [(10, 4 / 13)]
+
+
+def dealer_final_distribution(rules, upcard):
+    """
+    莊家明牌為 upcard 時,最終點數的機率分布 (無限副牌近似)
+
+    參數:
+        rules: 規則字典 (使用 dealer_hits 查表)
+        upcard: 明牌點數 (A 為 11)
+
+    回傳:
+        {17: p, 18: p, 19: p, 20: p, 21: p, BUST: p, NATURAL: p}
+
+    功能說明:
+        - 依張數逐層展開莊家的要牌路徑;點數分布相同的手牌 (hand_index 的同一個狀態)
+          在同一層合併機率,不論先拿到哪張牌都只展開一次
+        - 暗牌與明牌組成 21 點時記為 NATURAL
+    """
+    dealer_hits = rules['dealer_hits']
+    total_of = hand_index.TOTAL
+    soft_of = hand_index.SOFT
+    natural_of = hand_index.BLACKJACK
+    next_state = hand_index.NEXT
+    classes = hand_index.CLASSES
+    class_probs = [p for _, p in CARD_PROBS]
+    result = {t: 0.0 for t in range(DEALER_STAND, 22)}
+    result[BUST] = 0.0
+    result[NATURAL] = 0.0
+
+    layer = {hand_index.extend(hand_index.EMPTY_STATE, hand_index.value_class(upcard)): 1.0}
+    while layer:
+        following = {}
+        for state, prob in layer.items():
+            total = total_of[state]
+            if total > 21:
+                result[BUST] += prob
+            elif natural_of[state]:
+                result[NATURAL] += prob
+            elif not dealer_hits[total * 2 + soft_of[state]]:
+                result[total] += prob
+            else:
+                row = state * classes
+                for cls, p in enumerate(class_probs):
+                    child = next_state[row + cls]
+                    following[child] = following.get(child, 0.0) + prob * p
+        layer = following
+    return result
+
+
+def dealer_distributions(rules, cache=None):
+    """
+    所有明牌 (2~A) 的莊家最終點數分布,結果會存入磁碟快取
+
+    參數:
+        rules: 規則字典
+        cache: artifact_cache 的快取物件 (預設為 default_cache())
+
+    回傳:
+        {明牌: dealer_final_distribution(rules, 明牌)}
+    """
+    if cache is None:
+        cache = artifact_cache.default_cache()
+    inputs = {'dealer_hits_soft_17': rules['dealer_hits_soft_17']}
+    return cache.get_or_compute(
+        'dealer_distributions', inputs,
+        lambda: {up: dealer_final_distribution(rules, up) for up in range(2, 12)},
+        code=sys.modules[__name__])
+
+
+# ======== 指令列參數 ========
+
+def add_rules_arguments(parser):
+    """
+    在 argparse parser 加上規則相關的參數
+    """
+    group = parser.add_argument_group("牌桌規則")
+    group.add_argument('--decks', type=int, default=DEFAULT_RULES['num_decks'], help="幾副牌")
+    group.add_argument('--h17', action='store_true', help="莊家軟 17 要牌")
+    group.add_argument('--blackjack-payout', type=float,
+                       default=DEFAULT_RULES['blackjack_payout'],
+                       help="Blackjack 賠率 (1.5 = 3:2, 1.2 = 6:5, 1.0 = 平賠)")
+    group.add_argument('--peek', action='store_true', help="莊家先檢查 Blackjack")
+    group.add_argument('--double', action='store_true', help="允許加倍")
+    group.add_argument('--split', action='store_true', help="允許分牌")
+    group.add_argument('--surrender', action='store_true', help="允許投降")
+    return group
+
+
+def rules_from_args(args):
+    """
+    由 add_rules_arguments 解析出的參數建立規則字典
+    """
+    return create_rules(num_decks=args.decks, dealer_hits_soft_17=args.h17,
+                        blackjack_payout=args.blackjack_payout, dealer_peek=args.peek,
+                        double=args.double, split=args.split, surrender=args.surrender)
+
+
+# 兩個前端目前的規則
+CLI_RULES = create_rules(blackjack_payout=1.0)
+PYGAME_RULES = create_rules(blackjack_payout=1.5)
@@ -0,0 +1,32 @@
+"""
+blackjack.py 從檢查點繼續牌局的測試 (python -m pytest -q)
+"""
+import blackjack
+
+
+def resume_snapshot(player_cards, dealer_cards, money=100, bet=10):
+    return {
+        'state': 'PLAYING', 'player': 'amy', 'money': money, 'total': 0, 'wins': 0,
+        'bet': bet, 'deck': [('♠', '2')] * 10, 'dealer': dealer_cards,
+        'hands': [player_cards], 'results': [None], 'active_seat': 0, 'message': '',
+    }
+
+
+def test_resumed_multi_card_21_is_not_blackjack(capsys):
+    player_data = {'money': 100, 'total': 0, 'wins': 0, 'win_rate': '0.0%'}
+    snapshot = resume_snapshot([('♠', '7'), ('♥', '7'), ('♦', '7')], [('♣', 'K'), ('♠', 'A')])
+    blackjack.play_game('amy', player_data, choose=blackjack.scripted_choices('S'),
+                        resume=snapshot)
+    assert player_data['money'] == 100
+    assert player_data['total'] == 1
+    assert player_data['wins'] == 0
+    assert "Blackjack" not in capsys.readouterr().out
+
+
+def test_resumed_two_card_21_is_blackjack():
+    player_data = {'money': 100, 'total': 0, 'wins': 0, 'win_rate': '0.0%'}
+    snapshot = resume_snapshot([('♠', 'A'), ('♥', 'K')], [('♣', '9'), ('♠', '8')])
+    blackjack.play_game('amy', player_data, choose=blackjack.scripted_choices(''),
+                        resume=snapshot)
+    assert player_data['money'] == 100 + blackjack.blackjack_winnings(blackjack.CLI_RULES, 10)
+    assert player_data['wins'] == 1